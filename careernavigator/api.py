@@ -1,11 +1,11 @@
-from django.core.exceptions import PermissionDenied, BadRequest
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, BadRequest
 
 from django.http import HttpRequest, HttpResponse
 from ninja import Swagger
 from ninja_extra import NinjaExtraAPI
 from ninja_jwt.authentication import AsyncJWTAuth
 
-from careernavigator.util.api import AsyncJWTController, Renderer
+from careernavigator.util.api import AsyncJWTController, OrjsonRenderer
 
 description = """
 This API provides the functionality for the mobile and web frontends of the \
@@ -16,7 +16,7 @@ api = NinjaExtraAPI(
     title="CareerNavigator API",
     description=description,
     auth=AsyncJWTAuth(),
-    renderer=Renderer(),
+    renderer=OrjsonRenderer(),
     docs=Swagger(settings={
         "persistAuthorization": True,
         "showCommonExtensions": True,
@@ -42,4 +42,13 @@ def bad_request_handler(request: HttpRequest, exc: BadRequest) -> HttpResponse:
         request,
         {"messages": list(exc.args)},
         status=400,
-    )
\ No newline at end of file
+    )
+
+
+@api.exception_handler(ObjectDoesNotExist)
+def not_found_handler(request: HttpRequest, exc: ObjectDoesNotExist) -> HttpResponse:
+    return api.create_response(
+        request,
+        {"messages": list(exc.args)},
+        status=404,
+    )
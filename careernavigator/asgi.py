@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'careernavigator.settings')
 
 application = get_asgi_application()
+
+# Write the buffered job counts in the background, not only during requests
+from jobs.counters import job_counters  # noqa: E402
+
+job_counters.start()
@@ -103,6 +103,21 @@ CSRF_COOKIE_HTTPONLY = False
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024 * 1024
 
+# How long (in seconds) cached API responses are kept. They are invalidated
+#  as soon as the underlying tables change, so this only bounds memory use.
+#  When running multiple workers, configure a shared CACHES backend in
+#  local.py so that all workers see the same version stamps.
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# How often (in seconds) the buffered job view, bookmark and application
+#  counts of each worker are written to the database. Pending counts are
+#  also written when a worker exits, but lost when it is killed.
+JOB_COUNTER_FLUSH_INTERVAL = 10
+
+# The total size (in bytes) of the generated resumes that each worker keeps
+#  in memory. The least recently downloaded resumes are dropped first.
+RESUME_CACHE_BYTES = 32 * 1024 * 1024
+
 try:
     from .local import *
 except:
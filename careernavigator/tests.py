@@ -1,23 +1,45 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from decimal import Decimal
+import io
 import json
 
+from django.core.handlers.asgi import ASGIRequest
 from django.http import HttpRequest
 from django.test import Client, TestCase as DjangoTestCase
+from ninja_jwt.tokens import RefreshToken
+from pydantic_core import Url
 
 from unittest import TestCase as UnittestTestCase
 
 from careernavigator.util.api import JobseekerPermission, MentorPermission, SuperuserPermission
+from careernavigator.util.pagination import encode_cursor
+from careernavigator.util.serialization import trusted_serializer
+from careernavigator.util.streaming import stream_list
 from careernavigator.util.test import seed_database
-from core.models import FailedLogin, User
+from core.api import TipSchema, UserSchema
+from core.models import FailedLogin, Tip, User
+from forum.models import Page
 
 
 class RendererRendersUrl(UnittestTestCase):
     def test_render_renders_url(self):
-        from .api import Renderer
+        from .util.api import Renderer
         renderer = Renderer()
         rendered = renderer.render(HttpRequest(), datetime(year=2020, month=11, day=7, hour=15, minute=31, second=2), response_status=200)
         self.assertEqual(rendered, '"2020-11-07T15:31:02"')
 
+    def test_orjson_renders_like_renderer(self):
+        from .util.api import OrjsonRenderer, Renderer
+        data = {
+            "url": Url("https://example.com/image.png"),
+            "date": datetime(year=2020, month=11, day=7, hour=15, minute=31, second=2, microsecond=123456, tzinfo=timezone.utc),
+            "salary": Decimal("1234.50"),
+            "items": [(1, "two"), {3: None}],
+        }
+        rendered = OrjsonRenderer().render(HttpRequest(), data, response_status=200)
+        self.assertEqual(json.loads(rendered), json.loads(Renderer().render(HttpRequest(), data, response_status=200)))
+        self.assertEqual(json.loads(rendered)["date"], "2020-11-07T15:31:02.123Z")
+
 
 class LoginTestCase(DjangoTestCase):
     def setUp(self):
@@ -103,3 +125,78 @@ class PermissionsWork(DjangoTestCase):
         self.assertTrue( p.has_permission(self._make_request(self.db_seed.mentor), None))
         self.assertFalse(p.has_permission(self._make_request(self.db_seed.noone), None))
 
+
+class KeysetPaginationWorks(DjangoTestCase):
+    def setUp(self) -> None:
+        self.db_seed = seed_database()
+        for i in range(4):
+            Page.objects.create(
+                owner=self.db_seed.superuser,
+                category=self.db_seed.category,
+                title=f"Page {i}",
+                description="",
+            )
+        self.url = f'/api/forum/categories/{self.db_seed.category.id}/pages'
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.db_seed.jobseeker).access_token}'}
+
+    def test_cursor_walks_all_pages(self) -> None:
+        client = Client()
+        response = json.loads(client.get(self.url, {'limit': 2}, headers=self.headers).content)
+        self.assertEqual(response["count"], 5)
+        titles = [page["title"] for page in response["items"]]
+
+        while response["next_cursor"]:
+            response = json.loads(client.get(self.url, {
+                'limit': 2,
+                'cursor': response["next_cursor"],
+                'with_count': False,
+            }, headers=self.headers).content)
+            self.assertIsNone(response["count"])
+            titles.extend(page["title"] for page in response["items"])
+
+        self.assertEqual(titles, ["Test Page", "Page 0", "Page 1", "Page 2", "Page 3"])
+
+    def test_offset_still_works(self) -> None:
+        response = json.loads(Client().get(self.url, {'limit': 2, 'offset': 3}, headers=self.headers).content)
+        self.assertEqual([page["title"] for page in response["items"]], ["Page 2", "Page 3"])
+        self.assertIsNone(response["next_cursor"])
+
+    def test_invalid_cursor(self) -> None:
+        response = Client().get(self.url, {'cursor': 'garbage'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        for after in ([123, 1], [None, 1], [{"a": 1}, 1], [[1], 1], ["2024-01-01T00:00:00", "x"]):
+            response = Client().get(self.url, {'cursor': encode_cursor({'after': after})}, headers=self.headers)
+            self.assertEqual(response.status_code, 400, after)
+        response = Client().get('/api/jobs', {'cursor': encode_cursor({'after': [None]})}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+class StreamListWorks(DjangoTestCase):
+    def test_streams_json_array(self) -> None:
+        for i in range(5):
+            Tip.objects.create(description=f"Tip {i}", url=f"https://example.com/{i}")
+        for chunk_size in (1, 2, 5, 10):
+            response = stream_list(HttpRequest(), Tip.objects.order_by('id'), TipSchema, chunk_size=chunk_size)
+            tips = json.loads(b"".join(response))
+            self.assertEqual([tip["description"] for tip in tips], [f"Tip {i}" for i in range(5)])
+            self.assertEqual(tips[0]["url"], "https://example.com/0")
+
+        self.assertEqual(json.loads(b"".join(stream_list(HttpRequest(), Tip.objects.none(), TipSchema))), [])
+
+        # WSGI servers get a synchronous iterator, which they can send as it is written
+        self.assertFalse(stream_list(HttpRequest(), Tip.objects.all(), TipSchema).is_async)
+        request = ASGIRequest({'type': 'http', 'method': 'GET', 'path': '/', 'headers': []}, io.BytesIO())
+        self.assertTrue(stream_list(request, Tip.objects.all(), TipSchema).is_async)
+
+
+class TrustedSerializationWorks(DjangoTestCase):
+    def test_matches_validation(self) -> None:
+        seed_database()
+        users = list(User.objects.prefetch_related('groups', 'user_permissions').order_by('id'))
+        self.assertEqual(trusted_serializer(list[UserSchema])(users), [UserSchema.from_orm(user).model_dump() for user in users])
+
+        Tip.objects.create(description="Tip", url="https://example.com/tip")
+        tips = Tip.objects.order_by('id')
+        trusted = json.loads(b"".join(stream_list(HttpRequest(), tips, TipSchema, trusted=True)))
+        self.assertEqual(trusted, json.loads(b"".join(stream_list(HttpRequest(), tips, TipSchema))))
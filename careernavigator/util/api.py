@@ -1,9 +1,11 @@
 from typing import Any, Optional
 
+import orjson
 from asgiref.sync import sync_to_async
 from django.http import HttpRequest
 from ninja import Schema
 from ninja.renderers import JSONRenderer
+from ninja.responses import NinjaJSONEncoder
 from ninja_extra import ControllerBase, api_controller, route
 from ninja_extra.permissions import AllowAny, BasePermission
 from ninja_jwt.controller import TokenVerificationController, TokenObtainPairController
@@ -15,8 +17,10 @@ from pydantic_core import Url
 
 from core.models import FailedLogin
 
+from .cache import store_response
 
-__all__ = ('AsyncJWTController', 'Renderer')
+
+__all__ = ('AsyncJWTController', 'OrjsonRenderer', 'Renderer')
 
 
 schema = SchemaControl(api_settings)
@@ -88,7 +92,41 @@ class Renderer(JSONRenderer):
             return value
 
     def render(self, request: HttpRequest, data: Any, *, response_status: int) -> Any:
-        return super().render(request, self.reshape(data), response_status=response_status)
+        content = super().render(request, self.reshape(data), response_status=response_status)
+        store_response(request, content, response_status)
+        return content
+
+
+_encoder = NinjaJSONEncoder()
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, Url):
+        return str(value)
+    return _encoder.default(value)
+
+class OrjsonRenderer(Renderer):
+    """Renderer that serializes responses in a single pass with orjson
+
+    Instead of first walking the whole response to convert URLs, the types
+    orjson doesn't know are converted as it meets them. Dates and times are
+    passed to the encoder of :class:`Renderer`, so they are formatted the
+    same way; the output only differs in leaving out insignificant spaces.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    @classmethod
+    def dumps(cls, data: Any) -> bytes:
+        """Serialize data the way responses are rendered
+
+        :param data: The data to serialize
+        :return: The JSON encoded data
+        """
+        return orjson.dumps(data, default=_orjson_default, option=cls.options)
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> Any:
+        content = self.dumps(data)
+        store_response(request, content, response_status)
+        return content
 
 class UserWithPermission(BasePermission):
     def __init__(self, permission: str) -> None:
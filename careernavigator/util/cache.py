@@ -0,0 +1,154 @@
+import hashlib
+import uuid
+from functools import wraps
+from typing import Any, Callable, Optional, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+from ninja_extra import ControllerBase
+
+
+__all__ = ('abump_version', 'astore_response', 'atable_version', 'bump_version', 'cached_response', 'store_response', 'table_version')
+
+
+def _version_key(model: Type[Model], user_id: Optional[int] = None) -> str:
+    key = f"table-version:{model._meta.label_lower}"
+    return key if user_id is None else f"{key}:user:{user_id}"
+
+
+def bump_version(*models: Type[Model], user_id: Optional[int] = None) -> None:
+    """Invalidate all cached responses that depend on the given models
+
+    :param models: The models whose tables have changed
+    :param user_id: Only invalidate the responses that depend on the rows of this user, for models passed as
+                    `per_user` to :func:`cached_response`, defaults to all responses
+    """
+    cache.set_many({_version_key(model, user_id): uuid.uuid4().hex for model in models}, timeout=None)
+
+
+async def abump_version(*models: Type[Model], user_id: Optional[int] = None) -> None:
+    """Like :func:`bump_version`, for async code, where cache backends such as the database one can't be used synchronously"""
+    await cache.aset_many({_version_key(model, user_id): uuid.uuid4().hex for model in models}, timeout=None)
+
+
+def table_version(*models: Type[Model]) -> str:
+    """Get a stamp of the given models, which changes whenever :func:`bump_version` is called for one of them
+
+    With a cache shared by all workers, this tells a worker that another
+    process, such as a management command, wrote to those tables.
+
+    :param models: The models
+    :return: The stamp
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return ":".join(versions[key] for key in keys)
+
+
+async def atable_version(*models: Type[Model]) -> str:
+    """Like :func:`table_version`, for async code"""
+    return ":".join(await _versions([_version_key(model) for model in models]))
+
+
+async def _versions(keys: list[str]) -> list[str]:
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A fresh version, so that responses cached before the old version
+            # was evicted can never be served again
+            await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def _timeout(timeout: Optional[int]) -> int:
+    return timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+
+
+def _json_response(content: Any) -> HttpResponse:
+    return HttpResponse(content, content_type="application/json; charset=utf-8")
+
+
+def cached_response(
+        *models: Type[Model],
+        per_user: tuple[Type[Model], ...] = (),
+        timeout: Optional[int] = None) -> Callable:
+    """Cache the responses of a route until one of the given models changes
+
+    Responses are keyed on the path, the query parameters and the version
+    stamps of the models, which :func:`bump_version` replaces whenever those
+    tables are written to, and on the current date, since which jobs are
+    open changes at midnight without any table being written to. Every
+    response carries an ETag derived from that key, so a conditional GET for
+    an unchanged resource is answered with 304 Not Modified without running
+    the route at all.
+
+    Responses that include rows of the current user, such as their
+    bookmarks, are cached per user by passing those models as `per_user`.
+    Their versions are kept per user, so `bump_version(model, user_id=...)`
+    only invalidates the responses of that user.
+
+    Place this between `@route` and `@paginate`.
+
+    :param models: The models the response is built from
+    :param per_user: The models of which the response includes the rows of the current user, defaults to none
+    :param timeout: How long to keep responses, defaults to `settings.RESPONSE_CACHE_TIMEOUT`
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(controller: ControllerBase, *args, **kwargs):
+            request: HttpRequest = controller.context.request
+            user_id = request.user.pk if per_user else None
+            versions = await _versions([
+                *(_version_key(model) for model in models),
+                *(_version_key(model, user_id) for model in per_user),
+            ])
+            query = sorted(request.GET.lists())
+            key = hashlib.sha256(repr((request.path, query, versions, user_id, timezone.localdate())).encode()).hexdigest()
+            etag = f'"{key[:32]}"'
+
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = HttpResponseNotModified()
+                response.headers['ETag'] = etag
+                return response
+
+            content = await cache.aget(f"response:{key}")
+            if content is not None:
+                response = _json_response(content)
+                response.headers['ETag'] = etag
+                return response
+
+            controller.context.response.headers['ETag'] = etag
+            request._response_cache = (f"response:{key}", timeout)
+            return await func(controller, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def store_response(request: HttpRequest, content: Any, response_status: int) -> None:
+    """Store a rendered response if its route is wrapped in :func:`cached_response`
+
+    :param request: The original HTTP request
+    :param content: The rendered response body
+    :param response_status: The status code of the response
+    """
+    key, timeout = getattr(request, '_response_cache', (None, None))
+    if key is not None and response_status == 200:
+        cache.set(key, content, _timeout(timeout))
+
+
+async def astore_response(request: HttpRequest, content: Any, response_status: int) -> None:
+    """Like :func:`store_response`, for async code"""
+    key, timeout = getattr(request, '_response_cache', (None, None))
+    if key is not None and response_status == 200:
+        await cache.aset(key, content, _timeout(timeout))
@@ -0,0 +1,67 @@
+from functools import lru_cache
+from typing import Optional, Type
+
+from django.core.exceptions import BadRequest, FieldDoesNotExist
+from django.db.models import QuerySet
+from ninja import Schema
+from pydantic import create_model
+
+
+__all__ = ('FieldSet',)
+
+
+@lru_cache(maxsize=256)
+def _trimmed(schema: Type[Schema], names: tuple[str, ...]) -> Type[Schema]:
+    return create_model(
+        f"{schema.__name__}Fields",
+        __base__=Schema,
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names},
+    )
+
+
+class FieldSet:
+    """The fields of a schema that a client asked for with a `fields` query parameter
+
+    Routes take an optional `fields` parameter holding comma separated field
+    names, such as `?fields=id,username`. Passing it to this class gives a
+    schema with only those fields, and :meth:`apply` loads only the columns
+    those fields need, so neither the database nor the response carries the
+    rest. Without `fields`, all fields of the schema are returned.
+    """
+    def __init__(self, schema: Type[Schema], fields: Optional[str] = None) -> None:
+        """
+        :param schema: The schema of the full response
+        :param fields: The requested comma separated fields, defaults to all fields
+        :raises BadRequest: When a requested field is not in the schema
+        """
+        if fields is None:
+            self.names = tuple(schema.model_fields)
+            self.schema = schema
+            return
+
+        self.names = tuple(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+        unknown = [name for name in self.names if name not in schema.model_fields]
+        if unknown:
+            raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+        if not self.names:
+            raise BadRequest("No fields requested")
+        self.schema = _trimmed(schema, self.names)
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        """Load only the columns and relations of the requested fields
+
+        :param queryset: The rows to return
+        :return: The queryset, deferring all other columns and prefetching the requested many-to-many fields
+        """
+        columns, related = [], []
+        for name in self.names:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Computed fields may read any column
+                return queryset
+            if field.many_to_many or field.one_to_many:
+                related.append(name)
+            else:
+                columns.append(name)
+        return queryset.only(*columns).prefetch_related(*related)
@@ -0,0 +1,172 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from typing import Any, Generic, List, Optional, TypeVar, Union
+
+from django.core.exceptions import BadRequest, ValidationError
+from django.db.models import Q, QuerySet
+from ninja import Field, Schema
+from ninja.conf import settings
+from ninja.pagination import PaginationBase
+from pydantic import field_validator
+
+
+__all__ = ('KeysetPagination', 'KeysetPaginationResponseSchema', 'WithExtras')
+
+
+T = TypeVar("T")
+
+
+class KeysetPaginationResponseSchema(Schema, Generic[T]):
+    count: Optional[int]
+    items: List[T]
+    next_cursor: Optional[str]
+
+    @field_validator("items", mode="before")
+    def validate_items(cls, value: Any) -> Any:
+        if value is not None and not isinstance(value, list):
+            value = list(value)
+        return value
+
+
+class WithExtras:
+    """Items to paginate, together with extra fields for the page
+
+    Routes using :class:`KeysetPagination` can return this instead of the
+    plain items to add fields, such as facet counts, next to `items`. The
+    response schema has to declare those fields.
+    """
+    def __init__(self, items: Union[QuerySet, Sequence], **extras: Any) -> None:
+        self.items = items
+        self.extras = extras
+
+
+def encode_cursor(position: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequest("Invalid cursor")
+    if not isinstance(position, dict):
+        raise BadRequest("Invalid cursor")
+    return position
+
+
+class KeysetPagination(PaginationBase):
+    """Pagination that can continue from an opaque cursor instead of an offset
+
+    Without a cursor this works like limit/offset pagination, so existing
+    clients keep working. Every page also contains a `next_cursor`; passing
+    that as `cursor` fetches the next page by filtering on the ordering key
+    and the primary key of the last item, which costs the same for the
+    thousandth page as for the first. Clients that don't need the total
+    count can pass `with_count=false` to skip the COUNT query.
+
+    A queryset that is already ordered is paginated in its own order, with
+    the primary key as tiebreaker; otherwise `ordering` is used. The fields
+    of the ordering must not be null.
+
+    Lists and other sequences, such as ranked search results, can't be
+    filtered on a key, so for those the cursor holds an offset.
+    """
+    class Input(Schema):
+        limit: int = Field(settings.PAGINATION_PER_PAGE, ge=1)
+        offset: int = Field(0, ge=0)
+        cursor: Optional[str] = None
+        with_count: bool = True
+
+    Output = KeysetPaginationResponseSchema
+
+    def __init__(self, ordering: tuple[str, ...] = (), page_size: int = settings.PAGINATION_PER_PAGE, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.ordering = self._with_tiebreaker(ordering)
+        self.page_size = page_size
+        self.Input = self.create_input()
+
+    def create_input(self) -> type[Input]:
+        class DynamicInput(KeysetPagination.Input):
+            limit: int = Field(self.page_size, ge=1)
+
+        return DynamicInput
+
+    @staticmethod
+    def _with_tiebreaker(ordering: tuple[str, ...]) -> tuple[str, ...]:
+        return (*ordering, '-pk' if ordering and ordering[-1].startswith('-') else 'pk')
+
+    def _ordering(self, queryset: QuerySet) -> tuple[str, ...]:
+        ordering = tuple(field for field in queryset.query.order_by if isinstance(field, str))
+        if not ordering or len(ordering) != len(queryset.query.order_by):
+            return self.ordering
+        return self._with_tiebreaker(ordering)
+
+    def _key(self, item: Any, ordering: tuple[str, ...]) -> list:
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(item, dict):
+                value = item['id' if name == 'pk' else name]
+            else:
+                value = getattr(item, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def _after(self, queryset: QuerySet, ordering: tuple[str, ...], values: list) -> QuerySet:
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise BadRequest("Invalid cursor")
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            # The ordering fields are never null, and the cursor only holds scalars
+            if value is None or isinstance(value, (list, dict)):
+                raise BadRequest("Invalid cursor")
+            name = field.lstrip('-')
+            try:
+                model_field = queryset.model._meta.pk if name == 'pk' else queryset.model._meta.get_field(name)
+                value = model_field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise BadRequest("Invalid cursor")
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        try:
+            # Filtering prepares the values for the database, which fails for values of the wrong type
+            return queryset.filter(condition)
+        except (ValidationError, TypeError, ValueError):
+            raise BadRequest("Invalid cursor")
+
+    def paginate_queryset(
+        self,
+        queryset: Union[QuerySet, Sequence],
+        pagination: Input,
+        **params: Any,
+    ) -> Any:
+        if isinstance(queryset, WithExtras):
+            return {**self.paginate_queryset(queryset.items, pagination, **params), **queryset.extras}
+
+        limit = min(pagination.limit, settings.PAGINATION_MAX_LIMIT)
+        count = self._items_count(queryset) if pagination.with_count else None
+
+        if not isinstance(queryset, QuerySet):
+            offset = pagination.offset
+            if pagination.cursor is not None:
+                offset = decode_cursor(pagination.cursor).get('offset')
+                if not isinstance(offset, int) or offset < 0:
+                    raise BadRequest("Invalid cursor")
+            items = list(queryset[offset:offset + limit + 1])
+            next_cursor = encode_cursor({'offset': offset + limit}) if len(items) > limit else None
+            return {"items": items[:limit], "count": count, "next_cursor": next_cursor}
+
+        ordering = self._ordering(queryset)
+        page = queryset.order_by(*ordering)
+        if pagination.cursor is not None:
+            page = self._after(page, ordering, decode_cursor(pagination.cursor).get('after'))
+        else:
+            page = page[pagination.offset:]
+        items = list(page[:limit + 1])
+        next_cursor = encode_cursor({'after': self._key(items[limit - 1], ordering)}) if len(items) > limit else None
+        return {"items": items[:limit], "count": count, "next_cursor": next_cursor}
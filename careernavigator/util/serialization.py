@@ -0,0 +1,136 @@
+import types
+import typing
+from functools import lru_cache, wraps
+from typing import Any, Callable
+
+from django.db.models import Manager, QuerySet
+from django.db.models.fields.files import FieldFile
+from django.http import HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+from ninja import Schema
+from ninja_extra import ControllerBase
+from pydantic import BaseModel
+
+from .api import OrjsonRenderer
+from .cache import astore_response
+
+
+__all__ = ('trusted_response', 'trusted_serializer')
+
+
+_MISSING = object()
+
+_UNIONS = (typing.Union, types.UnionType)
+
+
+def _convert(value: Any) -> Any:
+    # The same conversions as ninja.schema.DjangoGetter
+    if isinstance(value, Manager):
+        return list(value.all())
+    if isinstance(value, QuerySet):
+        return list(value)
+    if isinstance(value, FieldFile):
+        return value.url if value else None
+    if callable(value):
+        return value()
+    return value
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _validated(model: type[BaseModel]) -> Callable[[Any], Any]:
+    def serialize(value: Any) -> Any:
+        return (model.from_orm(value) if issubclass(model, Schema) else model.model_validate(value, from_attributes=True)).model_dump()
+    return serialize
+
+
+def _model_serializer(model: type[BaseModel]) -> Callable[[Any], Any]:
+    own_validators = set(model.__pydantic_decorators__.model_validators) - set(Schema.__pydantic_decorators__.model_validators)
+    if getattr(model, '_ninja_resolvers', None) or own_validators:
+        # Resolvers and validators can compute anything, so those models are validated as usual
+        return _validated(model)
+
+    fields = []
+    for name, field in model.model_fields.items():
+        source = field.validation_alias if isinstance(field.validation_alias, str) else field.alias or name
+        default = field.get_default(call_default_factory=True) if not field.is_required() else _MISSING
+        fields.append((name, source, default, trusted_serializer(field.annotation)))
+
+    def serialize(value: Any) -> dict:
+        data = {}
+        for name, source, default, serializer in fields:
+            if isinstance(value, dict):
+                item = value.get(source, value.get(name, default))
+            else:
+                item = getattr(value, source, default)
+            if item is _MISSING:
+                raise AttributeError(f"{type(value).__name__} has no field {source!r} for {model.__name__}")
+            item = _convert(item)
+            data[name] = None if item is None else serializer(item)
+        return data
+    return serialize
+
+
+@lru_cache(maxsize=None)
+def trusted_serializer(annotation: Any) -> Callable[[Any], Any]:
+    """Compile a function that turns trusted data into the output of a type, without validating it
+
+    The data is read the way ninja reads ORM objects, so model instances,
+    their relations and dictionaries from `.values()` can all be passed. The
+    data is trusted to already have the right types, as rows from our own
+    database do, so nothing is converted except nested models, lists, and
+    many-to-many links. Models with resolvers or model validators of their
+    own are validated as usual; field validators are not run.
+
+    :param annotation: The type to serialize to, such as a schema or `list[Schema]`
+    :return: A function that takes the data and returns what `model_dump()` would
+    """
+    origin = typing.get_origin(annotation)
+    if origin in _UNIONS:
+        options = [option for option in typing.get_args(annotation) if option is not type(None)]
+        return trusted_serializer(options[0]) if len(options) == 1 else _identity
+    if origin in (list, tuple, set, frozenset, typing.Sequence) or annotation in (list, typing.List):
+        args = typing.get_args(annotation)
+        item = trusted_serializer(args[0]) if args else _identity
+        return lambda value: [item(_convert(element)) for element in _convert(value)]
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return _model_serializer(annotation)
+        if annotation.__name__ == 'M2MLink':
+            # ninja's many-to-many fields hold the primary keys of the related rows
+            return lambda value: getattr(value, 'pk', value)
+    return _identity
+
+
+def trusted_response(schema: Any) -> Callable:
+    """Render what a route returns with :func:`trusted_serializer` instead of validating it
+
+    Routes whose data comes straight from the database can use this to skip
+    pydantic validation of every row. The route keeps declaring the same
+    schema as its response for the OpenAPI documentation.
+
+    Place this below `@cached_response` and above `@paginate`.
+
+    :param schema: The response schema of the route
+    """
+    serialize = trusted_serializer(schema)
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(controller: ControllerBase, *args, **kwargs):
+            result = await func(controller, *args, **kwargs)
+            if isinstance(result, HttpResponseBase):
+                return result
+            request: HttpRequest = controller.context.request
+            content = OrjsonRenderer.dumps(serialize(result))
+            await astore_response(request, content, 200)
+            response = HttpResponse(content, content_type="application/json; charset=utf-8")
+            for header, value in controller.context.response.headers.items():
+                response.headers.setdefault(header, value)
+            return response
+
+        return wrapper
+
+    return decorator
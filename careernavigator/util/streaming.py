@@ -0,0 +1,73 @@
+from typing import Any, AsyncIterator, Callable, Iterator, Type
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import QuerySet
+from django.http import HttpRequest, StreamingHttpResponse
+from ninja import Schema
+
+from .api import OrjsonRenderer
+from .serialization import trusted_serializer
+
+
+__all__ = ('stream_list',)
+
+
+def _json_array(queryset: QuerySet, serialize: Callable[[Any], Any], chunk_size: int) -> Iterator[bytes]:
+    separator = b"["
+    rows = []
+    for item in queryset.iterator(chunk_size=chunk_size):
+        rows.append(OrjsonRenderer.dumps(serialize(item)))
+        if len(rows) >= chunk_size:
+            yield separator + b",".join(rows)
+            separator, rows = b",", []
+    if rows or separator == b"[":
+        yield separator + b",".join(rows)
+    yield b"]"
+
+
+async def _ajson_array(queryset: QuerySet, serialize: Callable[[Any], Any], chunk_size: int) -> AsyncIterator[bytes]:
+    separator = b"["
+    rows = []
+    async for item in queryset.aiterator(chunk_size=chunk_size):
+        rows.append(OrjsonRenderer.dumps(serialize(item)))
+        if len(rows) >= chunk_size:
+            yield separator + b",".join(rows)
+            separator, rows = b",", []
+    if rows or separator == b"[":
+        yield separator + b",".join(rows)
+    yield b"]"
+
+
+def stream_list(
+        request: HttpRequest,
+        queryset: QuerySet,
+        schema: Type[Schema],
+        chunk_size: int = 500,
+        trusted: bool = False) -> StreamingHttpResponse:
+    """Respond with a queryset as a JSON array that is written while it is read
+
+    The rows are fetched in chunks with a server side cursor where the
+    database supports it, and every row is validated by the schema and
+    serialized like :class:`OrjsonRenderer` would, so memory use doesn't grow
+    with the number of rows and the first rows go out before the last are
+    read. Routes keep declaring `list[schema]` as their response for the
+    OpenAPI documentation; the response itself bypasses validation.
+
+    Under ASGI the rows are read asynchronously. A WSGI server can only
+    stream a synchronous iterator, and would read an asynchronous one to the
+    end before sending anything, so there the rows are read synchronously.
+
+    :param request: The original HTTP request
+    :param queryset: The rows to return, with their relations selected or prefetched
+    :param schema: The schema of a single row
+    :param chunk_size: The number of rows fetched and written at once, defaults to 500
+    :param trusted: Serialize the rows with :func:`trusted_serializer` instead of validating them, defaults to False
+    :return: The streaming response
+    """
+    if trusted:
+        serialize = trusted_serializer(schema)
+    else:
+        def serialize(item: Any) -> dict:
+            return schema.from_orm(item).model_dump()
+    write = _ajson_array if isinstance(request, ASGIRequest) else _json_array
+    return StreamingHttpResponse(write(queryset, serialize, chunk_size), content_type="application/json; charset=utf-8")
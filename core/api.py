@@ -1,6 +1,6 @@
 import base64
-from io import BytesIO
 import json
+from datetime import datetime
 from typing import Optional
 
 from asgiref.sync import sync_to_async
@@ -9,20 +9,21 @@ from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
 from django.http import HttpRequest, HttpResponse
 from django.core.exceptions import PermissionDenied
+from django.db.models import Count, Max, Q
 
 from ninja import ModelSchema, Schema
 from ninja.errors import HttpError
 from ninja_extra import ControllerBase
 from ninja_extra.controllers import api_controller, route
 
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
 from martor.utils import markdownify
 from pydantic import TypeAdapter
 
 from careernavigator.util.api import MentorPermission
+from careernavigator.util.fields import FieldSet
+from careernavigator.util.streaming import stream_list
 from core.models import Company, Tip, User
+from core.resume import resume_cache
 
 class EducationItem(Schema):
     institution: str
@@ -101,6 +102,20 @@ _Education = TypeAdapter(list[EducationItem])
 _WorkExperience = TypeAdapter(list[WorkExperienceItem])
 _Contact = TypeAdapter(list[ContactItem])
 
+class MenteeSummarySchema(Schema):
+    id: int
+    username: str
+    first_name: str
+    last_name: str
+    email: str
+    last_login: Optional[datetime]
+    applications: int
+    sent: int
+    processed: int
+    interviewed: int
+    tested: int
+    latest_application: Optional[datetime]
+
 class PlainStringPayload(Schema):
     content: str
 
@@ -116,21 +131,48 @@ class MentorCountroller(ControllerBase):
         return await User.objects.filter(id=request.user.mentor_id).afirst()
     
     @route.get('/mentees', operation_id='get_mentees')
-    async def get_mentees(self, request) -> list[UserSchema]:
+    async def get_mentees(self, request, fields: Optional[str] = None) -> list[UserSchema]:
         """List all the mentees for the current user
 
         :param request: The original HTTP request
+        :param fields: The comma separated fields to return, such as "id,username", defaults to all of them
         :return: a list of mentees
         """
-        return get_user_model().objects.filter(mentor__id=request.user.id)
+        fieldset = FieldSet(UserSchema, fields)
+        return stream_list(request, fieldset.apply(get_user_model().objects.filter(mentor__id=request.user.id)), fieldset.schema, trusted=True)
+
+    @route.get('/dashboard', operation_id='mentor_dashboard', permissions=[MentorPermission()])
+    async def dashboard(self, request: HttpRequest) -> list[MenteeSummarySchema]:
+        """List all the mentees for the current user, with how far their applications got
+
+        The counts are aggregated for all mentees in a single query.
+
+        :param request: The original HTTP request
+        :return: The mentees, with the number of applications in each stage and the date of the latest one
+        """
+        return User.objects\
+            .filter(mentor=request.user)\
+            .values('id', 'username', 'first_name', 'last_name', 'email', 'last_login')\
+            .annotate(
+                applications=Count('jobapplication'),
+                sent=Count('jobapplication', filter=Q(jobapplication__sent=True)),
+                processed=Count('jobapplication', filter=Q(jobapplication__processed=True)),
+                interviewed=Count('jobapplication', filter=Q(jobapplication__interviewed=True)),
+                tested=Count('jobapplication', filter=Q(jobapplication__tested=True)),
+                latest_application=Max('jobapplication__applied_date'),
+            )\
+            .order_by('username')
 
     @route.get('/nomentor', operation_id='nomemtor')
-    async def get_empty(self) -> list[UserSchema]:
+    async def get_empty(self, fields: Optional[str] = None) -> list[UserSchema]:
         """Get a list of users that are wanting for a mentor
 
+        :param fields: The comma separated fields to return, such as "id,username", defaults to all of them
         :return: list of users wanting a mentor
         """
-        return get_user_model().objects.filter(mentor__isnull=True, is_jobseeker=True, complete_question=True)
+        fieldset = FieldSet(UserSchema, fields)
+        users = get_user_model().objects.filter(mentor__isnull=True, is_jobseeker=True, complete_question=True)
+        return stream_list(self.context.request, fieldset.apply(users), fieldset.schema, trusted=True)
 
     @route.post('/accept', operation_id='accept')
     async def accept(self, request, username: str) -> UserSchema:
@@ -223,7 +265,7 @@ class TipController(ControllerBase):
 
         :return: All tips
         """
-        return Tip.objects
+        return stream_list(self.context.request, Tip.objects.order_by('id'), TipSchema, trusted=True)
 
 @api_controller('/account', tags=['Account'])
 class AccountController(ControllerBase):
@@ -332,93 +374,11 @@ class ResumeController(ControllerBase):
         if (not request.user.is_mentor) and user.id != request.user.id:
             raise PermissionDenied("You can only see resumes of other users as a mentor")
 
-        pdf = BytesIO()
-
         if user.resume_pdf:
             text = base64.b64encode(user.resume_pdf.open('rb').read()).decode('utf-8')
             return text
 
-        p = canvas.Canvas(pdf, pagesize=letter)
-
-        p.setFont("Helvetica", 12)
-        p.setStrokeColor(colors.black)
-
-        p.setFont("Helvetica-Bold", 18)
-        p.drawString(100, 750, "Curriculum Vitae")
-        p.line(100, 740, 320, 740)
-
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, 710, "Personal Information")
-        p.setFont("Helvetica", 12)
-        p.drawString(100, 690, f"Name: {user.get_full_name()}")
-        p.linkURL(
-            f"mailto:{user.email}",
-            (
-                100 + p.stringWidth("Name: ", "Helvetica", 12),
-                685,
-                100 + p.stringWidth(f"Name: {user.email}", "Helvetica", 12),
-                665
-            ), relative=1)
-        p.drawString(100, 670, f"Email: {user.email}")
-
-        y_position = 660
-
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, 630, "Education")
-        y_position = 610
-        p.setFont("Helvetica", 12)
-        for education in user.education:
-            p.drawString(100, y_position, f"Institution: {education['institution']}")
-            p.drawString(100, y_position - 20, f"Duration: {education['duration']}")
-            p.drawString(100, y_position - 40, f"Degree: {education['degree']}")
-            y_position -= 80
-
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, y_position - 40, "Work Experience")
-        y_position -= 60
-        p.setFont("Helvetica", 12)
-        for experience in user.work_experience:
-            p.drawString(100, y_position, f"Company: {experience['company']}")
-            p.drawString(100, y_position - 20, f"Position: {experience['position']}")
-            p.drawString(100, y_position - 40, f"Duration: {experience['duration']}")
-            y_position -= 80
-
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, y_position - 40, "Interests")
-        y_position -= 60
-        p.setFont("Helvetica", 12)
-        interest_text = p.beginText(100, y_position)
-        for line in user.interest.splitlines(False):
-            interest_text.textLine(line.rstrip())
-        p.drawText(interest_text)
-        y_position = interest_text.getY() - 20
-
-        y_position -= 5
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, y_position, "Skills")
-        y_position -= 20
-        p.setFont("Helvetica", 12)
-        skill_text = p.beginText(100, y_position)
-        for line in user.skill.splitlines(False):
-            skill_text.textLine(line.rstrip())
-        p.drawText(skill_text)
-        y_position = skill_text.getY() - 20
-
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, y_position, "Other")
-        y_position -= 20
-        p.setFont("Helvetica", 12)
-        other_text = p.beginText(100, y_position)
-        for line in user.others.splitlines(False):
-            other_text.textLine(line.rstrip())
-        p.drawText(other_text)
-        y_position = other_text.getY() - 20
-
-        p.showPage()
-        p.save()
-
-        text = base64.b64encode(pdf.getvalue()).decode('utf-8')
-        return text
+        return resume_cache.get(user)
 
     @route.post("/upload", operation_id='upload_pdf')
     async def upload_pdf(self, request, file: PlainStringPayload):
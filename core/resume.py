@@ -0,0 +1,173 @@
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Optional
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from .models import User
+
+
+__all__ = ('ResumeCache', 'render_resume', 'resume_cache', 'resume_hash')
+
+
+# The user fields the generated resume is drawn from
+RESUME_FIELDS = ('first_name', 'last_name', 'email', 'education', 'work_experience', 'interest', 'skill', 'others')
+
+
+def resume_hash(user: User) -> str:
+    """Hash everything the generated resume of a user shows
+
+    :param user: The user
+    :return: A hash that only changes when the resume would look different
+    """
+    fields = {field: getattr(user, field) for field in RESUME_FIELDS}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def render_resume(user: User) -> bytes:
+    """Draw the resume of a user who did not upload one
+
+    :param user: The user
+    :return: The resume as PDF
+    """
+    pdf = BytesIO()
+
+    p = canvas.Canvas(pdf, pagesize=letter)
+
+    p.setFont("Helvetica", 12)
+    p.setStrokeColor(colors.black)
+
+    p.setFont("Helvetica-Bold", 18)
+    p.drawString(100, 750, "Curriculum Vitae")
+    p.line(100, 740, 320, 740)
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, 710, "Personal Information")
+    p.setFont("Helvetica", 12)
+    p.drawString(100, 690, f"Name: {user.get_full_name()}")
+    p.linkURL(
+        f"mailto:{user.email}",
+        (
+            100 + p.stringWidth("Name: ", "Helvetica", 12),
+            685,
+            100 + p.stringWidth(f"Name: {user.email}", "Helvetica", 12),
+            665
+        ), relative=1)
+    p.drawString(100, 670, f"Email: {user.email}")
+
+    y_position = 660
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, 630, "Education")
+    y_position = 610
+    p.setFont("Helvetica", 12)
+    for education in user.education:
+        p.drawString(100, y_position, f"Institution: {education['institution']}")
+        p.drawString(100, y_position - 20, f"Duration: {education['duration']}")
+        p.drawString(100, y_position - 40, f"Degree: {education['degree']}")
+        y_position -= 80
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, y_position - 40, "Work Experience")
+    y_position -= 60
+    p.setFont("Helvetica", 12)
+    for experience in user.work_experience:
+        p.drawString(100, y_position, f"Company: {experience['company']}")
+        p.drawString(100, y_position - 20, f"Position: {experience['position']}")
+        p.drawString(100, y_position - 40, f"Duration: {experience['duration']}")
+        y_position -= 80
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, y_position - 40, "Interests")
+    y_position -= 60
+    p.setFont("Helvetica", 12)
+    interest_text = p.beginText(100, y_position)
+    for line in user.interest.splitlines(False):
+        interest_text.textLine(line.rstrip())
+    p.drawText(interest_text)
+    y_position = interest_text.getY() - 20
+
+    y_position -= 5
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, y_position, "Skills")
+    y_position -= 20
+    p.setFont("Helvetica", 12)
+    skill_text = p.beginText(100, y_position)
+    for line in user.skill.splitlines(False):
+        skill_text.textLine(line.rstrip())
+    p.drawText(skill_text)
+    y_position = skill_text.getY() - 20
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, y_position, "Other")
+    y_position -= 20
+    p.setFont("Helvetica", 12)
+    other_text = p.beginText(100, y_position)
+    for line in user.others.splitlines(False):
+        other_text.textLine(line.rstrip())
+    p.drawText(other_text)
+    y_position = other_text.getY() - 20
+
+    p.showPage()
+    p.save()
+
+    return pdf.getvalue()
+
+
+class ResumeCache:
+    """Generated resumes by the hash of what they show
+
+    Since resumes are keyed on their content, a changed profile simply gets
+    a new entry, and nothing has to be invalidated. The least recently used
+    resumes are dropped once their total size exceeds the budget.
+    """
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def max_bytes(self) -> int:
+        return settings.RESUME_CACHE_BYTES if self._max_bytes is None else self._max_bytes
+
+    def reset(self) -> None:
+        """Drop all cached resumes"""
+        with self._lock:
+            self._entries: OrderedDict[str, str] = OrderedDict()
+            self.size = 0
+
+    def get(self, user: User) -> str:
+        """Get the generated resume of a user, rendering it if it is not cached
+
+        :param user: The user
+        :return: The resume as base64-encoded PDF
+        """
+        key = resume_hash(user)
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                return text
+
+        text = base64.b64encode(render_resume(user)).decode('utf-8')
+        with self._lock:
+            if key not in self._entries and len(text) <= self.max_bytes:
+                self._entries[key] = text
+                self.size += len(text)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return text
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+resume_cache = ResumeCache()
@@ -1,5 +1,9 @@
+import json
+
 from django.http import HttpRequest
+from django.db import connection
 from django.test import Client, TestCase as DjangoTestCase
+from django.test.utils import CaptureQueriesContext
 from ninja_jwt.tokens import RefreshToken
 from unittest import IsolatedAsyncioTestCase
 
@@ -7,7 +11,10 @@ from pydantic import TypeAdapter
 
 from careernavigator.util.test import seed_database
 from core.api import UserSchema
-from core.models import User
+from core.models import Company, User
+from core.resume import ResumeCache, resume_cache
+from jobs.models import JobApplication
+from jobs.tests import create_job
 
 
 class RenderMarkdownTest(IsolatedAsyncioTestCase):
@@ -44,15 +51,29 @@ class TestMentors(DjangoTestCase):
     def test_get_mentees_works(self) -> None:
         ret = RefreshToken.for_user(self.db_seed.mentor)
         response = self.client.get('/api/mentor/mentees', headers={'Authorization': f'Bearer {ret.access_token}'})
-        mentees: list[User] = TypeAdapter(list[UserSchema]).validate_json(response.content)
+        mentees: list[User] = TypeAdapter(list[UserSchema]).validate_json(b"".join(response))
 
         self.assertEqual(len(mentees), 1)
         self.assertEqual(mentees[0].id, self.db_seed.jobseeker.id)
 
+    def test_sparse_fields(self) -> None:
+        ret = RefreshToken.for_user(self.db_seed.mentor)
+        headers = {'Authorization': f'Bearer {ret.access_token}'}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/mentor/mentees', {'fields': 'id,username,groups'}, headers=headers)
+            mentees = json.loads(b"".join(response))
+        self.assertEqual(mentees, [{"id": self.db_seed.jobseeker.id, "username": self.db_seed.jobseeker.username, "groups": []}])
+        listing = [query['sql'] for query in queries.captured_queries if '"mentor_id" =' in query['sql']]
+        self.assertEqual(len(listing), 1)
+        self.assertNotIn('"education"', listing[0])
+
+        response = self.client.get('/api/mentor/nomentor', {'fields': 'username,password'}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
     def test_get_empty_works(self) -> None:
         ret = RefreshToken.for_user(self.db_seed.mentor)
         response = self.client.get('/api/mentor/nomentor', headers={'Authorization': f'Bearer {ret.access_token}'})
-        mentees: list[User] = TypeAdapter(list[UserSchema]).validate_json(response.content)
+        mentees: list[User] = TypeAdapter(list[UserSchema]).validate_json(b"".join(response))
 
         self.assertEqual(len(mentees), 1)
         self.assertEqual(mentees[0].id, self.db_seed.sad_jobseeker.id)
@@ -63,7 +84,56 @@ class TestMentors(DjangoTestCase):
         self.assertEqual(response.status_code, 200)
 
         response = self.client.get(f'/api/mentor/mentees', headers={'Authorization': f'Bearer {ret.access_token}'})
-        mentees: list[User] = TypeAdapter(list[UserSchema]).validate_json(response.content)
+        mentees: list[User] = TypeAdapter(list[UserSchema]).validate_json(b"".join(response))
 
         self.assertEqual(len(mentees), 2)
         self.assertEqual(len(list(filter(lambda mentee: mentee.id == self.db_seed.sad_jobseeker.id, mentees))), 1)
+
+    def test_dashboard_works(self) -> None:
+        company = Company.objects.create(name="Acme", slug="acme", description="")
+        first, second = create_job(company, title="First"), create_job(company, title="Second")
+        JobApplication.objects.create(user=self.db_seed.jobseeker, job=first, sent=True, interviewed=True)
+        JobApplication.objects.create(user=self.db_seed.jobseeker, job=second, sent=True)
+        JobApplication.objects.create(user=self.db_seed.sad_jobseeker, job=first, sent=True)
+        self.db_seed.lazy_jobseeker.mentor = self.db_seed.mentor
+        self.db_seed.lazy_jobseeker.save()
+
+        ret = RefreshToken.for_user(self.db_seed.mentor)
+        response = self.client.get('/api/mentor/dashboard', headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        mentees = {mentee["username"]: mentee for mentee in response.json()}
+        self.assertEqual(set(mentees), {self.db_seed.jobseeker.username, self.db_seed.lazy_jobseeker.username})
+        jobseeker = mentees[self.db_seed.jobseeker.username]
+        self.assertEqual(
+            [jobseeker[key] for key in ('applications', 'sent', 'processed', 'interviewed', 'tested')],
+            [2, 2, 0, 1, 0],
+        )
+        self.assertIsNotNone(jobseeker["latest_application"])
+        self.assertEqual(mentees[self.db_seed.lazy_jobseeker.username]["applications"], 0)
+        self.assertIsNone(mentees[self.db_seed.lazy_jobseeker.username]["latest_application"])
+
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        response = self.client.get('/api/mentor/dashboard', headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_resume_is_cached(self) -> None:
+        resume_cache.reset()
+        ret = RefreshToken.for_user(self.db_seed.mentor)
+        url = f'/api/resume/download/{self.db_seed.jobseeker.username}'
+        first = self.client.get(url, headers={'Authorization': f'Bearer {ret.access_token}'}).json()
+        second = self.client.get(url, headers={'Authorization': f'Bearer {ret.access_token}'}).json()
+        self.assertEqual(first, second)
+        self.assertEqual(len(resume_cache), 1)
+
+        User.objects.filter(id=self.db_seed.jobseeker.id).update(skill="Welding")
+        third = self.client.get(url, headers={'Authorization': f'Bearer {ret.access_token}'}).json()
+        self.assertNotEqual(first, third)
+        self.assertEqual(len(resume_cache), 2)
+
+        # Only the most recently used resume fits
+        jobseeker, lazy_jobseeker = (ResumeCache().get(user) for user in (self.db_seed.jobseeker, self.db_seed.lazy_jobseeker))
+        cache = ResumeCache(max_bytes=len(jobseeker) + len(lazy_jobseeker) - 1)
+        cache.get(self.db_seed.jobseeker)
+        cache.get(self.db_seed.lazy_jobseeker)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, len(lazy_jobseeker))
@@ -6,10 +6,11 @@ from django.db.models import Count, F
 
 from ninja import ModelSchema, Schema
 from ninja_extra import ControllerBase, api_controller, route, paginate
-from ninja_extra.schemas import NinjaPaginationResponseSchema
 from martor.utils import markdownify
 from profanity_check import predict
 
+from careernavigator.util.pagination import KeysetPagination, KeysetPaginationResponseSchema
+from careernavigator.util.serialization import trusted_response
 from core.api import UserSchema
 
 from .models import Category, Page, Comment
@@ -79,8 +80,8 @@ class ForumController(ControllerBase):
 
 @api_controller('/forum/categories', tags=['Forum.Category'])
 class CategoryController(ControllerBase):
-    @route.get('', response=NinjaPaginationResponseSchema[CategorySchema], operation_id='category_list')
-    @paginate(page_size=50)
+    @route.get('', response=KeysetPaginationResponseSchema[CategorySchema], operation_id='category_list')
+    @paginate(KeysetPagination, page_size=50)
     async def list(self):
         return Category.objects.all()
 
@@ -105,12 +106,14 @@ class CategoryController(ControllerBase):
 
 @api_controller('/forum/categories/{int:category}/pages', tags=['Forum.Page'])
 class PageController(ControllerBase):
-    @route.get('', response=NinjaPaginationResponseSchema[PageListEntryScema], operation_id='page_list')
-    @paginate(page_size=50)
+    @route.get('', response=KeysetPaginationResponseSchema[PageListEntryScema], operation_id='page_list')
+    @trusted_response(KeysetPaginationResponseSchema[PageListEntryScema])
+    @paginate(KeysetPagination, ordering=('created_at',), page_size=50)
     async def list(self, category: int) -> list[int]:
         return Page.objects.filter(category__pk=category)\
             .annotate(num_comments=Count('comment'))\
-            .select_related('owner')
+            .select_related('owner')\
+            .prefetch_related('owner__groups', 'owner__user_permissions')
     
     @route.post('', operation_id='page_new')
     async def post(self, request: HttpRequest, page: PageCreateSchema, category: int) -> PageSchema:
@@ -193,8 +196,8 @@ class PageController(ControllerBase):
 
 @api_controller('/forum/categories/{int:category}/pages/{int:page}/comments', tags=['Forum.Comment'])
 class CommentController(ControllerBase):
-    @route.get('', response=NinjaPaginationResponseSchema[CommentListEntrySchema], operation_id='comment_list')
-    @paginate(page_size=50)
+    @route.get('', response=KeysetPaginationResponseSchema[CommentListEntrySchema], operation_id='comment_list')
+    @paginate(KeysetPagination, ordering=('created_at',), page_size=50)
     async def list(self, category: int, page: int):
         return Comment.objects.filter(page__pk=page)\
             .annotate(owner_email=F('owner__email'))\
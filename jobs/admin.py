@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _lazy
 
-from .models import Job, JobBookmark, JobApplication
+from .models import Job, JobBookmark, JobApplication, JobTrait
 
 
 def custom_titled_filter(title):
@@ -16,8 +16,8 @@ def custom_titled_filter(title):
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
-    list_display = ['title', 'company']
-    list_filter = [('company__name', custom_titled_filter(_lazy('Company')))]
+    list_display = ['title', 'company', 'deadline', 'archived']
+    list_filter = [('company__name', custom_titled_filter(_lazy('Company'))), 'archived']
 
 @admin.register(JobBookmark)
 class JobBookmarkAdmin(admin.ModelAdmin):
@@ -26,3 +26,8 @@ class JobBookmarkAdmin(admin.ModelAdmin):
 @admin.register(JobApplication)
 class JobApplication(admin.ModelAdmin):
     list_display = ['user', 'job', 'applied_date']
+
+@admin.register(JobTrait)
+class JobTraitAdmin(admin.ModelAdmin):
+    list_display = ['job', 'kind', 'value']
+    list_filter = ['kind']
@@ -1,22 +1,45 @@
-from typing import Optional, Type
+from typing import Literal, Optional, Type
 from datetime import datetime
+from asgiref.sync import sync_to_async
 from django.http import HttpRequest
-from django.utils.text import slugify
 from ninja import ModelSchema, Schema
 from ninja.orm import create_schema
 from ninja_extra import ControllerBase, api_controller, ModelConfig, \
     paginate, route
-from ninja_extra.schemas import NinjaPaginationResponseSchema
-from django.db.models import Q
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import BadRequest, PermissionDenied
+from django.db.models import F
 
 from careernavigator.util.api import MentorPermission
+from careernavigator.util.cache import abump_version, atable_version, cached_response
+from careernavigator.util.pagination import KeysetPagination, KeysetPaginationResponseSchema, WithExtras
+from careernavigator.util.serialization import trusted_response
+from careernavigator.util.streaming import stream_list
 from core.models import Company, User
 from questionnaire.models import QuestionResult
  
-from .models import Job, JobApplication, JobBookmark
+from .bulk import create_jobs_with_companies, upsert_companies
+from .counters import job_counters
+from .models import Job, JobApplication, JobBookmark, JobNeighbor, JobTrait, UserRecommendation
+from .recommend import job_recommender
+from .search import RankedJobs, job_index
+from .suggest import job_suggestions
 
-JobSchema: Type[ModelSchema] = create_schema(Job, depth=1)
+# Columns the application maintains itself; the counters change without bumping the cache version
+INTERNAL_JOB_FIELDS = ['archived', *Job.SALARY_FIELDS, *Job.POPULARITY_WEIGHTS, 'popularity']
+
+JobSchema: Type[ModelSchema] = create_schema(Job, depth=1, exclude=INTERNAL_JOB_FIELDS)
+
+ApplicationStatus = Literal['applied', 'sent', 'processed', 'interviewed', 'tested']
+
+class UserJobSchema(JobSchema):
+    is_bookmarked: bool = False
+    application_status: Optional[ApplicationStatus] = None
+
+class RecommendedJobSchema(JobSchema):
+    score: float
+
+class SimilarJobSchema(JobSchema):
+    score: float
 
 class JobApplicationCreateSchema(ModelSchema):
     class Meta:
@@ -30,7 +53,13 @@ class JobCreateSchema(ModelSchema):
     class Meta:
         model=Job
         fields = '__all__'
-        exclude = ['company', 'id']
+        exclude = ['company', 'id', *INTERNAL_JOB_FIELDS]
+
+class JobCreatedSchema(Schema):
+    id: int
+    title: str
+    company_id: int
+    company_slug: str
 
 class BookmarkSchema(ModelSchema):
     #user: UserSchema
@@ -40,7 +69,33 @@ class BookmarkSchema(ModelSchema):
         model = JobBookmark
         fields = "__all__"
 
+class FacetCountSchema(Schema):
+    value: str
+    count: int
+
+class JobFacetsSchema(Schema):
+    company: list[FacetCountSchema]
+    location: list[FacetCountSchema]
+    job_fields: list[FacetCountSchema]
+    deadline: list[FacetCountSchema]
+
+SalarySort = Literal['salary', '-salary']
+
+class JobPageSchema(KeysetPaginationResponseSchema[UserJobSchema]):
+    facets: Optional[JobFacetsSchema] = None
+
+def facet_counts(facets: dict[str, list[tuple[str, int]]]) -> dict[str, list[dict]]:
+    return {
+        facet: [{'value': value, 'count': count} for value, count in counts]
+        for facet, counts in facets.items()
+    }
+
+class SuggestionSchema(Schema):
+    text: str
+    jobs: int
+
 class ApplicationOut(Schema):
+    id: int
     applied_date: datetime
     organization: str
     location: str
@@ -60,43 +115,42 @@ class JobApplicationSchema(ModelSchema):
         model = JobApplication
         fields = "__all__"
 
+FEEDBACK_FIELDS = ["sent", "processed", "interviewed", "tested", "feedback"]
+
 class FeedbackRequestSchema(ModelSchema):
     class Meta:
         model = JobApplication
-        fields = (
-            "sent",
-            "processed",
-            "interviewed",
-            "tested",
-            "feedback",
-        )
+        fields = FEEDBACK_FIELDS
+
+class BatchFeedbackSchema(FeedbackRequestSchema):
+    id: int
 
 @api_controller('/jobs/applications', tags='Application')
 class JobApplicationController(ControllerBase):
-    @route.get('', response=NinjaPaginationResponseSchema[ApplicationOut], operation_id='list_applications')
-    @paginate(page_size=50)
+    @route.get('', response=KeysetPaginationResponseSchema[ApplicationOut], operation_id='list_applications')
+    @paginate(KeysetPagination, page_size=50)
     async def list_applications(self, request: HttpRequest):
         """List all applications for the current user
 
         :param request: The original HTTP request
         :return: All the applications done by the current user
         """
-        return [
-            ApplicationOut(
-                applied_date=application.applied_date,
-                organization=application.job.company.name,
-                position=application.job.title,
-                location=application.job.location,
-                image=application.job.image,
-                keywords=application.job.keywords,
-                sent=application.sent,
-                processed=application.processed,
-                interviewed=application.interviewed,
-                tested=application.tested,
-                feedback=application.feedback,
+        return JobApplication.objects\
+            .filter(user=request.user)\
+            .values(
+                'id',
+                'applied_date',
+                'sent',
+                'processed',
+                'interviewed',
+                'tested',
+                'feedback',
+                organization=F('job__company__name'),
+                position=F('job__title'),
+                location=F('job__location'),
+                image=F('job__image'),
+                keywords=F('job__keywords'),
             )
-            async for application in JobApplication.objects.filter(user=request.user).select_related('job', 'job__company').aiterator()
-        ]
     
     @route.post('/', operation_id='create_application')
     async def create(self, request: HttpRequest, application: JobApplicationCreateSchema) -> JobApplicationSchema:
@@ -110,6 +164,8 @@ class JobApplicationController(ControllerBase):
             user=request.user,
             job=Job(id=application.job),
         )
+        await job_counters.aadd(application.job, 'application_count')
+        await abump_version(JobApplication, user_id=request.user.id)
 
         return await JobApplication.objects.filter(user=request.user, job=Job(id=application.job)).select_related('job').afirst()
 
@@ -128,7 +184,7 @@ class JobApplicationController(ControllerBase):
         if not (request.user.is_mentor and mentee.mentor_id == request.user.id) and request.user != mentee:
             raise PermissionDenied("Can only fetch applications for mentees or yourself")
 
-        return JobApplication.objects.filter(user=mentee).select_related('job')
+        return stream_list(request, JobApplication.objects.filter(user=mentee).select_related('job', 'job__company'), JobApplicationSchema, trusted=True)
     
     @route.get('get-by-id/{id}', operation_id='get_application')
     async def get_application(self, request: HttpRequest, id: int) -> Optional[JobApplicationSchema]:
@@ -169,65 +225,259 @@ class JobApplicationController(ControllerBase):
         application.feedback = feedback.feedback
 
         await application.asave()
+        await abump_version(JobApplication, user_id=application.user_id)
         return application
 
+    @route.post('set-feedback', operation_id='set_feedback_batch', response=list[JobApplicationSchema])
+    async def update_progress_batch(self, request: HttpRequest, feedback: list[BatchFeedbackSchema]):
+        """Update the feedback for many job applications at once
+
+        All applications are checked in one query, and updated together in
+        one transaction, so either all of them change or none do.
+
+        :param request: The original HTTP request
+        :param feedback: The new feedback information, with the ID of the application it belongs to
+        :raises BadRequest: When an application is given more than once
+        :raises PermissionDenied: When any of the applications doesn't exist or is not of one of your mentees
+        :return: The updated job applications
+        """
+        changes = {item.id: item for item in feedback}
+        if len(changes) != len(feedback):
+            raise BadRequest("Each application can only be given once")
+
+        applications = JobApplication.objects\
+            .filter(id__in=changes, user__mentor=request.user)\
+            .select_related('job', 'job__company')\
+            .order_by('id')
+        applications = [application async for application in applications]
+        if len(applications) != len(changes):
+            raise PermissionDenied("Cannot feed back on applications for users which are not your mentees")
+
+        for application in applications:
+            for field in FEEDBACK_FIELDS:
+                setattr(application, field, getattr(changes[application.id], field))
+
+        # bulk_update writes all rows in a single transaction
+        await sync_to_async(JobApplication.objects.bulk_update)(applications, FEEDBACK_FIELDS)
+        for user_id in {application.user_id for application in applications}:
+            await abump_version(JobApplication, user_id=user_id)
+        return applications
+
 @api_controller('/jobs', tags='Job')
 class JobController(ControllerBase):
     @route.get('/by-id/{id}', operation_id='find_one')
-    async def find_one(self, id: int) -> JobSchema: # type: ignore
+    async def find_one(self, request: HttpRequest, id: int) -> UserJobSchema:
         """Find a job by its ID
 
+        :param request: The original HTTP request
+        :param id: The ID of the job
+        :return: The actual job, with whether the current user bookmarked and applied to it
+        """
+        await job_counters.aadd(id, 'view_count')
+        return await self._find_job(request, id)
+
+    @cached_response(Job, Company, per_user=(JobBookmark, JobApplication))
+    async def _find_job(self, request: HttpRequest, id: int) -> Job:
+        return await Job.objects.active().select_related('company').with_user_state(request.user).aget(pk=id)
+
+    @route.get('/popular', response=KeysetPaginationResponseSchema[UserJobSchema], operation_id='popular_jobs')
+    @trusted_response(KeysetPaginationResponseSchema[UserJobSchema])
+    @paginate(KeysetPagination, page_size=50)
+    async def popular(self, request: HttpRequest):
+        """Return the open jobs that are viewed, bookmarked and applied to the most
+
+        :param request: The original HTTP request
+        :return: All open jobs, most popular first
+        """
+        return Job.objects.active().select_related('company').with_user_state(request.user).order_by('-popularity')
+
+    @route.get('/by-id/{id}/similar', response=list[SimilarJobSchema], operation_id='similar_jobs')
+    @cached_response(Job, Company, JobNeighbor)
+    async def similar(self, id: int, limit: int = 10):
+        """Find the jobs most similar to a job, by their text and traits
+
+        The similar jobs are precomputed by the `update_similar_jobs` command.
+
         :param id: The ID of the job
-        :return: The actual job
+        :param limit: The maximum number of jobs to return, defaults to 10
+        :return: The similar jobs that are still open, with their similarity, most similar first
+        :raises Job.DoesNotExist: When the job doesn't exist or is closed
         """
-        return await Job.objects.select_related('company').aget(pk=id)
+        return await self._neighbors(id, JobNeighbor.Kind.SIMILAR, limit)
 
-    @route.get('', response=NinjaPaginationResponseSchema[JobSchema], operation_id='list')
-    @paginate(page_size=50)
-    async def list_jobs(self) -> list[Job]:
-        """Return all jobs
+    @route.get('/by-id/{id}/also-applied', response=list[SimilarJobSchema], operation_id='also_applied_jobs')
+    @cached_response(Job, Company, JobNeighbor)
+    async def also_applied(self, id: int, limit: int = 10):
+        """Find the jobs that users who applied to a job also applied to
 
-        :return: All jobs
+        The jobs are precomputed by the `train_recommender` command.
+
+        :param id: The ID of the job
+        :param limit: The maximum number of jobs to return, defaults to 10
+        :return: The jobs that are still open, with how strongly they co-occur, strongest first
+        :raises Job.DoesNotExist: When the job doesn't exist or is closed
         """
-        return Job.objects.select_related('company')
+        return await self._neighbors(id, JobNeighbor.Kind.APPLIED, limit)
+
+    async def _neighbors(self, id: int, kind: str, limit: int) -> list[Job]:
+        if not await Job.objects.active().filter(pk=id).aexists():
+            raise Job.DoesNotExist("Job matching query does not exist.")
+        neighbors = JobNeighbor.objects\
+            .filter(job_id=id, kind=kind, neighbor__in=Job.objects.active())\
+            .select_related('neighbor', 'neighbor__company')\
+            .order_by('rank')[:limit]
+        jobs = []
+        async for neighbor in neighbors:
+            neighbor.neighbor.score = neighbor.score
+            jobs.append(neighbor.neighbor)
+        return jobs
+
+    @route.get('', response=JobPageSchema, operation_id='list')
+    @cached_response(Job, Company, per_user=(JobBookmark, JobApplication))
+    @trusted_response(JobPageSchema)
+    @paginate(KeysetPagination, page_size=50)
+    async def list_jobs(
+            self,
+            request: HttpRequest,
+            facets: bool = False,
+            min_salary: Optional[int] = None,
+            max_salary: Optional[int] = None,
+            sort: Optional[SalarySort] = None):
+        """Return all open jobs
+
+        Salaries are compared as yearly amounts. Sorting by salary uses the
+        lower end of the salary, or the upper end for `-salary`, and leaves
+        out jobs that don't state it. Every job says whether the current user
+        bookmarked it, and how far their application to it got.
+
+        :param request: The original HTTP request
+        :param facets: Whether to count the jobs per company, location, field and deadline, defaults to False
+        :param min_salary: Only return jobs whose yearly salary can be at least this, defaults to no minimum
+        :param max_salary: Only return jobs whose yearly salary can be at most this, defaults to no maximum
+        :param sort: Order by salary instead of by creation, defaults to None
+        :return: All open jobs
+        """
+        jobs = Job.objects.active().salary_between(min_salary, max_salary).select_related('company').with_user_state(request.user)
+        if sort is not None:
+            jobs = jobs.order_by_salary(descending=sort == '-salary')
+        if not facets:
+            return jobs
+        if min_salary is None and max_salary is None:
+            counts = await sync_to_async(job_index.facets)()
+        else:
+            ids = await sync_to_async(job_index.search)("", min_salary=min_salary, max_salary=max_salary)
+            counts = await sync_to_async(job_index.facets)(ids)
+        return WithExtras(jobs, facets=facet_counts(counts))
     
-    @route.get('/recommended', operation_id='recommended', response=Optional[list[JobSchema]])
-    async def get_recommended(self, request: HttpRequest):
+    @route.get('/suggest', operation_id='suggest_jobs')
+    async def suggest(self, q: str, limit: int = 10) -> list[SuggestionSchema]:
+        """Complete a partially typed search string
+
+        :param q: What the user has typed so far
+        :param limit: The maximum number of suggestions, defaults to 10
+        :return: Job titles, keywords and company names starting with the query, most common first
+        """
+        version = await atable_version(Job, Company)
+        if not job_suggestions.is_current(version):
+            await sync_to_async(job_suggestions.ensure_built)(version)
+        return [SuggestionSchema(text=text, jobs=jobs) for text, jobs in job_suggestions.suggest(q, limit=min(limit, 50), version=version)]
+
+    @route.get('/recommended/collaborative', operation_id='recommended_collaborative', response=list[RecommendedJobSchema])
+    async def get_recommended_collaborative(self, request: HttpRequest, limit: int = 20):
+        """Get jobs for the current user based on what similar users bookmarked and applied to
+
+        The recommendations are precomputed by the `train_recommender` command.
+
+        :param request: The original HTTP request
+        :param limit: The maximum number of jobs to return, defaults to 20
+        :return: The recommended jobs that are still open, with their scores, best first
+        """
+        recommendations = UserRecommendation.objects\
+            .filter(user=request.user, source=UserRecommendation.Source.COLLABORATIVE, job__in=Job.objects.active())\
+            .select_related('job', 'job__company')\
+            .order_by('rank')[:limit]
+        jobs = []
+        async for recommendation in recommendations:
+            recommendation.job.score = recommendation.score
+            jobs.append(recommendation.job)
+        return jobs
+
+    @route.get('/recommended', operation_id='recommended', response=Optional[list[RecommendedJobSchema]])
+    async def get_recommended(self, request: HttpRequest, limit: int = 20):
         """Get recommended jobs for the current uesr
 
+        Jobs that share an MBTI type, Holland code or field with the latest
+        questionnaire result of the user are ranked by how well they match it,
+        together with the skills and interests of the user.
+
+        Recommendations are precomputed by the `precompute_recommendations`
+        command, and only computed on request for users it has not handled
+        since they last changed their questionnaire result or profile.
+
         :param request: The original HTTP request
-        :return: All recommended jobs for the current user
+        :param limit: The maximum number of jobs to return, defaults to 20
+        :return: The recommended jobs with their scores, or nothing if the user did not complete the questionnaire
         """
-        qs = await QuestionResult.objects.filter(user=request.user).afirst()
-        if (qs != None):
-            codeOne = qs.codeOne
-            codeTwo = qs.codeTwo
-            mbti = qs.MbtiType
-            c1 = qs.category_one
-            c2 = qs.category_two
-            c3 = qs.category_three
-            return Job.objects\
-                .select_related('company')\
-                .filter(Q(mbti__contains=mbti) | Q(holland__contains=codeOne) | Q(holland__contains=codeTwo)
-                        | Q(job_fields__contains=c1) | Q(job_fields__contains=c2) | Q(job_fields__contains=c3))
-        else:
+        recommendations = UserRecommendation.objects\
+            .filter(user=request.user, source=UserRecommendation.Source.PROFILE, job__in=Job.objects.active())\
+            .select_related('job', 'job__company')\
+            .order_by('rank')[:limit]
+        recommended = []
+        async for recommendation in recommendations:
+            recommendation.job.score = recommendation.score
+            recommended.append(recommendation.job)
+        if recommended:
+            return recommended
+
+        result = await QuestionResult.objects.filter(user=request.user).order_by('-id').afirst()
+        if result is None:
             return
 
+        candidates = [id async for id in JobTrait.candidates(result)]
+
+        ranked = await sync_to_async(job_recommender.recommend)(result, request.user, limit=limit, candidates=candidates)
+        jobs = await sync_to_async(Job.objects.active().select_related('company').in_bulk)([id for id, _ in ranked])
+        recommended = []
+        for id, score in ranked:
+            if id in jobs:
+                jobs[id].score = score
+                recommended.append(jobs[id])
+        return recommended
+
+    @route.get('/search', response=JobPageSchema, operation_id='search_jobs')
+    @cached_response(Job, Company, per_user=(JobBookmark, JobApplication))
+    @trusted_response(JobPageSchema)
+    @paginate(KeysetPagination, page_size=50)
+    async def get_jobs(
+            self,
+            request: HttpRequest,
+            search: str,
+            company: str = "",
+            facets: bool = False,
+            min_salary: Optional[int] = None,
+            max_salary: Optional[int] = None,
+            sort: Optional[SalarySort] = None):
+        """Return jobs by search string, best match first
+
+        Like in `list_jobs`, every job says whether the current user bookmarked
+        and applied to it.
 
-    @route.get('/search', response=list[JobSchema], operation_id='search_jobs')
-    async def get_jobs(self, search: str, company: str = ""):
-        """Return jobs by search string
-
+        :param request: The original HTTP request
         :param search: The search string
         :param company: The company that should be filtered on, defaults to ""
+        :param facets: Whether to count the found jobs per company, location, field and deadline, defaults to False
+        :param min_salary: Only return jobs whose yearly salary can be at least this, defaults to no minimum
+        :param max_salary: Only return jobs whose yearly salary can be at most this, defaults to no maximum
+        :param sort: Order by salary instead of by relevance, like in `list_jobs`, defaults to None
         :return: All jobs that have been found
         """
-        jobs = Job.objects\
-            .select_related('company')\
-            .filter(Q(title__contains=search) | Q(description__contains=search) | Q(keywords__contains=search) | Q(company__name__contains=search))
-        if company != "":
-            jobs = jobs.filter(company_name__contains=search)
-        return jobs
+        ids = await sync_to_async(job_index.search)(search, company=company, min_salary=min_salary, max_salary=max_salary)
+        if sort is not None:
+            ids = await sync_to_async(job_index.sort_by_salary)(ids, descending=sort == '-salary')
+        jobs = RankedJobs(ids, Job.objects.select_related('company').with_user_state(request.user))
+        if not facets:
+            return jobs
+        return WithExtras(jobs, facets=facet_counts(await sync_to_async(job_index.facets)(ids)))
 
 
 @api_controller('/jobs/manage', tags='Job', permissions=[MentorPermission()])
@@ -251,17 +501,8 @@ class JobCreateController(ControllerBase):
 
         :param job: Data for the job to create
         """
-        try:
-            company = await Company.objects.aget(name=job.company_name)
-        except Company.DoesNotExist:
-            company = Company(name=job.company_name, 
-                              slug=slugify(job.company_name))
- 
-            
-        print(job.company_description)
-        if job.company_description != "":
-            company.description = job.company_description
-            await company.asave()
+        companies = await sync_to_async(upsert_companies)({job.company_name: job.company_description})
+        company = companies[job.company_name]
 
         await Job.objects.acreate(
             title=job.title,
@@ -281,15 +522,31 @@ class JobCreateController(ControllerBase):
             additional=job.additional
         )
 
+    @route.post('/bulk', operation_id='create_jobs', response=list[JobCreatedSchema])
+    async def create_many(self, jobs: list[JobCreateSchema]):
+        """Create many jobs at once
+
+        All companies are looked up in one query, and missing ones are created
+        together. Either all jobs are created, or none are.
+
+        :param jobs: Data for the jobs to create
+        :return: For each job, in the same order, the ID of the job and its company
+        """
+        created = await sync_to_async(create_jobs_with_companies)(jobs)
+        return [
+            JobCreatedSchema(id=job.id, title=job.title, company_id=job.company_id, company_slug=job.company.slug)
+            for job in created
+        ]
+
 @api_controller('/bookmark', tags='Bookmark')
 class BookmarkController(ControllerBase): 
-    @route.get('', response=NinjaPaginationResponseSchema[JobSchema], operation_id='get_bookmarks')
-    @paginate(page_size=50)   
+    @route.get('', response=KeysetPaginationResponseSchema[JobSchema], operation_id='get_bookmarks')
+    @paginate(KeysetPagination, page_size=50)
     async def get_bookmarks(self, request: HttpRequest):
         """List all bookmarks for the currently logged in user
 
         :param request: The original HTTP request
-        :return: All bookmarked jobs
+        :return: All bookmarked jobs, including closed ones, which clients can tell apart by their deadline
         """
         return Job.objects.filter(jobbookmark__user=request.user)
 
@@ -301,7 +558,10 @@ class BookmarkController(ControllerBase):
         :param jobid: The ID of the job to bookmark
         :return: The final bookmark
         """
-        return await JobBookmark.objects.acreate(user=request.user, job_id=jobid)
+        bookmark = await JobBookmark.objects.acreate(user=request.user, job_id=jobid)
+        await job_counters.aadd(jobid, 'bookmark_count')
+        await abump_version(JobBookmark, user_id=request.user.id)
+        return bookmark
 
     @route.delete('', operation_id='delete_bookmark')
     async def delete_bookmark(self, request: HttpRequest, job_id: int) -> None:
@@ -310,4 +570,7 @@ class BookmarkController(ControllerBase):
         :param request: The original HTTP request
         :param job_id: The ID of the job for which we'll delete the bookmark
         """
-        await JobBookmark.objects.filter(user=request.user, job__id=job_id).adelete()
+        deleted, _ = await JobBookmark.objects.filter(user=request.user, job__id=job_id).adelete()
+        if deleted:
+            await job_counters.aadd(job_id, 'bookmark_count', -deleted)
+            await abump_version(JobBookmark, user_id=request.user.id)
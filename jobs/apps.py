@@ -6,3 +6,6 @@ class JobsConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
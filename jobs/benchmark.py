@@ -0,0 +1,29 @@
+import datetime
+
+from core.models import Company
+
+from .models import Job
+
+
+__all__ = ('sample_jobs',)
+
+
+def sample_jobs(count: int) -> list[Job]:
+    """Make up unsaved jobs with realistic field sizes, to benchmark serializing them
+
+    :param count: The number of jobs
+    :return: The jobs, with their company and the per-user state of `JobQuerySet.with_user_state`
+    """
+    company = Company(id=1, name="Acme", slug="acme", description="A company that makes everything")
+    deadline = datetime.date.today() + datetime.timedelta(days=30)
+    jobs = [
+        Job(id=i, company=company, title=f"Developer {i}", location="Enschede", description="Writes code. " * 20,
+            requirements="Python, Django", salary="€3.000 - €4.000 per month", instructions="Apply online",
+            deadline=deadline, keywords="python, django", image=f"https://example.com/jobs/{i}.png",
+            contact_info="jobs@example.com", mbti="INTJ", job_fields="IT", holland="IC", additional="")
+        for i in range(count)
+    ]
+    for job in jobs:
+        job.is_bookmarked = job.id % 3 == 0
+        job.application_status = "applied" if job.id % 5 == 0 else None
+    return jobs
@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.utils.text import slugify
+from ninja import Schema
+
+from core.models import Company
+
+from .models import Job
+from .signals import jobs_created
+
+
+__all__ = ('company_slugs', 'create_jobs', 'create_jobs_with_companies', 'upsert_companies')
+
+
+# The room kept free at the end of a long slug for a numeric suffix such as "-12"
+_SLUG_SUFFIX_LENGTH = 8
+
+
+def company_slugs(names: set[str]) -> dict[str, str]:
+    """Get unique slugs for new companies
+
+    A slug that is already taken, by an existing company or by another name in
+    the same call, gets a numeric suffix. Names without any characters that
+    can go in a slug get "company" as their base.
+
+    :param names: The names of the new companies
+    :return: The slugs, shortened to fit in :attr:`Company.slug`, by name
+    """
+    max_length = Company._meta.get_field('slug').max_length
+    bases = {name: slugify(name)[:max_length].rstrip('-') or "company" for name in sorted(names)}
+    taken = set(Company.objects.filter(slug__in=set(bases.values())).values_list('slug', flat=True))
+    searched = set()
+
+    slugs = {}
+    for name, base in bases.items():
+        slug = base
+        if slug in taken:
+            stem = base[:max_length - _SLUG_SUFFIX_LENGTH]
+            if stem not in searched:
+                searched.add(stem)
+                taken.update(Company.objects.filter(slug__startswith=stem).values_list('slug', flat=True))
+            number = 2
+            while slug in taken:
+                suffix = f"-{number}"
+                slug = base[:max_length - len(suffix)].rstrip('-') + suffix
+                number += 1
+        taken.add(slug)
+        slugs[name] = slug
+    return slugs
+
+
+def upsert_companies(companies: dict[str, str]) -> dict[str, Company]:
+    """Look up companies by name, creating the ones that don't exist yet
+
+    Existing companies get their description updated when a non-empty one is
+    passed. When several companies share a name, the oldest one is used. This
+    takes one query to look up all companies, plus one for all updates, one or
+    more to pick unique slugs and one for all inserts.
+
+    :param companies: The descriptions of the companies, by exact name
+    :return: The companies, by name
+    """
+    found: dict[str, Company] = {}
+    for company in Company.objects.filter(name__in=companies.keys()).order_by('id'):
+        found.setdefault(company.name, company)
+
+    changed = []
+    for name, company in found.items():
+        description = companies[name]
+        if description and company.description != description:
+            company.description = description
+            changed.append(company)
+    Company.objects.bulk_update(changed, ['description'])
+
+    missing = companies.keys() - found.keys()
+    slugs = company_slugs(missing) if missing else {}
+    created = Company.objects.bulk_create([
+        Company(name=name, slug=slug, description=companies[name])
+        for name, slug in slugs.items()
+    ])
+    found.update((company.name, company) for company in created)
+    return found
+
+
+def create_jobs(jobs: list[Job], batch_size: int = 1000) -> list[Job]:
+    """Insert jobs with as few queries as possible
+
+    Unlike :meth:`QuerySet.bulk_create`, this keeps the parsed salaries, the
+    job traits and the in-memory indexes up to date.
+
+    :param jobs: The unsaved jobs, with their company set
+    :param batch_size: The maximum number of jobs per INSERT, defaults to 1000
+    :return: The created jobs
+    """
+    for job in jobs:
+        job.parse_salary()
+    jobs = Job.objects.bulk_create(jobs, batch_size=batch_size)
+    jobs_created.send(sender=Job, instances=jobs)
+    return jobs
+
+
+def create_jobs_with_companies(items: list[Schema], batch_size: int = 1000) -> list[Job]:
+    """Create jobs together with the companies they refer to, in one transaction
+
+    :param items: The jobs to create, as :class:`jobs.api.JobCreateSchema`
+    :param batch_size: The maximum number of jobs per INSERT, defaults to 1000
+    :return: The created jobs, in the same order as the items
+    """
+    descriptions: dict[str, str] = {}
+    for item in items:
+        if item.company_description or item.company_name not in descriptions:
+            descriptions[item.company_name] = item.company_description
+
+    with transaction.atomic():
+        companies = upsert_companies(descriptions)
+        return create_jobs([
+            Job(company=companies[item.company_name],
+                **item.model_dump(exclude={'company_name', 'company_description'}))
+            for item in items
+        ], batch_size=batch_size)
@@ -0,0 +1,179 @@
+import time
+from typing import NamedTuple
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from careernavigator.util.cache import bump_version
+
+from .models import Job, JobApplication, JobBookmark, JobNeighbor, UserRecommendation
+from .ranking import INSERT_BATCH_SIZE, RECOMMENDATIONS, top_k
+
+
+__all__ = ('TrainingReport', 'interactions', 'item_similarity', 'top_scores', 'train')
+
+
+# How much a bookmark and an application say about the interest of a user
+BOOKMARK_WEIGHT = 1.0
+APPLICATION_WEIGHT = 2.0
+
+# The number of most similar jobs kept per job; the rest of the similarities
+# are dropped, which keeps the item-item matrix sparse
+ITEM_NEIGHBORS = 50
+
+# The number of users scored at once
+USER_CHUNK_SIZE = 1000
+
+
+class TrainingReport(NamedTuple):
+    """What a training run did, and how long each step took in seconds"""
+    users: int
+    jobs: int
+    interactions: int
+    recommendations: int
+    also_applied: int
+    timings: dict[str, float]
+
+
+def interactions(pairs: list[tuple[int, int]], user_ids: np.ndarray, job_ids: np.ndarray, weight: float) -> sparse.csr_matrix:
+    """Build a sparse user × job matrix from interactions
+
+    :param pairs: Pairs of user ID and job ID
+    :param user_ids: The sorted user IDs of the rows
+    :param job_ids: The sorted job IDs of the columns
+    :param weight: The weight of one interaction; repeated pairs are added up
+    :return: The matrix
+    """
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    matrix = sparse.csr_matrix(
+        (np.full(len(pairs), weight, dtype=np.float32),
+         (np.searchsorted(user_ids, pairs[:, 0]), np.searchsorted(job_ids, pairs[:, 1]))),
+        shape=(len(user_ids), len(job_ids)),
+    )
+    matrix.sum_duplicates()
+    return matrix
+
+
+def item_similarity(matrix: sparse.csr_matrix, neighbors: int = ITEM_NEIGHBORS) -> sparse.csr_matrix:
+    """Compute how often jobs are interacted with by the same users
+
+    This is the cosine similarity between the columns of the binarized
+    matrix, so popular jobs don't dominate, pruned to the most similar jobs
+    per job.
+
+    :param matrix: The user × job interaction matrix
+    :param neighbors: The number of similarities to keep per job, defaults to :data:`ITEM_NEIGHBORS`
+    :return: A sparse job × job matrix, without the diagonal
+    """
+    binary = matrix.copy()
+    binary.data[:] = 1
+    counts = np.asarray(binary.sum(axis=0)).ravel()
+    norms = sparse.diags(1 / np.sqrt(np.maximum(counts, 1)))
+    similarity = (norms @ (binary.T @ binary) @ norms).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    # Keep only the highest similarities of every row
+    rows, columns, values = [], [], []
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if end - start > neighbors:
+            keep = start + np.argpartition(-similarity.data[start:end], neighbors - 1)[:neighbors]
+        else:
+            keep = np.arange(start, end)
+        rows.append(np.full(len(keep), row))
+        columns.append(similarity.indices[keep])
+        values.append(similarity.data[keep])
+    if not rows:
+        return similarity
+    return sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+        shape=similarity.shape,
+    )
+
+
+def top_scores(row: sparse.csr_matrix, exclude: np.ndarray, limit: int) -> list[tuple[int, float]]:
+    """Find the highest positive scores in a sparse row
+
+    :param row: The scores, as a sparse matrix with one row
+    :param exclude: The columns that must not be returned
+    :param limit: The maximum number of columns to return
+    :return: Pairs of column and score, highest first
+    """
+    columns, scores = row.indices, row.data
+    keep = ~np.isin(columns, exclude) & (scores > 0)
+    columns, scores = columns[keep], scores[keep]
+    best, best_scores = top_k(scores, limit)
+    return [(int(columns[i]), float(score)) for i, score in zip(best, best_scores)]
+
+
+def train(limit: int = RECOMMENDATIONS) -> TrainingReport:
+    """Train the collaborative model and store its recommendations
+
+    Bookmarks and applications form an implicit feedback user × job matrix.
+    From it, an item-item co-occurrence model is computed with sparse matrix
+    products. Users are scored against all jobs in chunks, by summing the
+    similarities of the jobs they interacted with, and their top jobs are
+    stored as :class:`UserRecommendation`. For every job, the jobs most
+    often applied to by the same users are stored as :class:`JobNeighbor`.
+    Only open jobs are recommended.
+
+    :param limit: The number of recommendations to store per user and per job, defaults to :data:`RECOMMENDATIONS`
+    :return: What was done, and how long it took
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    bookmarks = list(JobBookmark.objects.values_list('user_id', 'job_id').iterator())
+    applied = list(JobApplication.objects.values_list('user_id', 'job_id').iterator())
+    user_ids = np.unique(np.array([user_id for user_id, _ in bookmarks + applied], dtype=np.int64))
+    job_ids = np.unique(np.array([job_id for _, job_id in bookmarks + applied], dtype=np.int64))
+    applications = interactions(applied, user_ids, job_ids, 1.0)
+    matrix = interactions(bookmarks, user_ids, job_ids, BOOKMARK_WEIGHT) + applications * APPLICATION_WEIGHT
+    applications.data[:] = 1
+    closed = np.flatnonzero(~np.isin(job_ids, np.fromiter(Job.objects.active().values_list('id', flat=True).iterator(), dtype=np.int64)))
+    timings['matrix'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    similarity = item_similarity(matrix)
+    applied_similarity = item_similarity(applications)
+    timings['similarity'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recommendations = []
+    for chunk in range(0, len(user_ids), USER_CHUNK_SIZE):
+        scores = (matrix[chunk:chunk + USER_CHUNK_SIZE] @ similarity).tocsr()
+        for offset in range(scores.shape[0]):
+            row = chunk + offset
+            seen = matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]
+            recommendations.extend(
+                UserRecommendation(user_id=int(user_ids[row]), job_id=int(job_ids[column]),
+                                   source=UserRecommendation.Source.COLLABORATIVE, rank=rank, score=score)
+                for rank, (column, score) in enumerate(top_scores(scores[offset], np.concatenate((seen, closed)), limit))
+            )
+    also_applied = [
+        JobNeighbor(job_id=int(job_ids[row]), neighbor_id=int(job_ids[column]),
+                    kind=JobNeighbor.Kind.APPLIED, rank=rank, score=score)
+        for row in range(applied_similarity.shape[0])
+        for rank, (column, score) in enumerate(top_scores(applied_similarity[row], closed, limit))
+    ]
+    timings['scoring'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with transaction.atomic():
+        UserRecommendation.objects.filter(source=UserRecommendation.Source.COLLABORATIVE).delete()
+        UserRecommendation.objects.bulk_create(recommendations, batch_size=INSERT_BATCH_SIZE)
+        JobNeighbor.objects.filter(kind=JobNeighbor.Kind.APPLIED).delete()
+        JobNeighbor.objects.bulk_create(also_applied, batch_size=INSERT_BATCH_SIZE)
+    bump_version(JobNeighbor, UserRecommendation)
+    timings['storing'] = time.perf_counter() - start
+
+    return TrainingReport(
+        users=len(user_ids),
+        jobs=len(job_ids),
+        interactions=matrix.nnz,
+        recommendations=len(recommendations),
+        also_applied=len(also_applied),
+        timings=timings,
+    )
@@ -0,0 +1,142 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+
+from .models import Job
+
+
+__all__ = ('JobCounters', 'job_counters')
+
+
+logger = logging.getLogger(__name__)
+
+# Flush early when this many jobs have pending counts, to bound memory use
+MAX_PENDING_JOBS = 10000
+
+# The number of jobs per UPDATE query
+UPDATE_CHUNK_SIZE = 500
+
+
+class JobCounters:
+    """Buffer for the view, bookmark and application counts of jobs
+
+    Writing a row on every view would make popular jobs a write hotspot, so
+    increments are added up in memory and written every
+    `settings.JOB_COUNTER_FLUSH_INTERVAL` seconds. A flush updates the
+    counters and the popularity of every job with `F()` expressions, with one
+    UPDATE per distinct set of increments, so most flushes take only a few
+    queries whatever the traffic.
+
+    Server processes call :meth:`start`, which writes the counts from a
+    background thread and once more when the process exits. Requests that
+    count an event also write the counts when they are due.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[int, Counter] = defaultdict(Counter)
+        self._last_flush = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _interval() -> float:
+        return getattr(settings, 'JOB_COUNTER_FLUSH_INTERVAL', 10)
+
+    def start(self) -> None:
+        """Write the pending counts in the background every interval, and when the process exits"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='job-counters', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stop the background thread, and write the counts that are still pending"""
+        self._stopped.set()
+        self._flush_logged()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval()):
+            if self._pending and self.due():
+                self._flush_logged()
+                # Don't hold on to the connection of this thread between flushes
+                connections.close_all()
+
+    def _flush_logged(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            # The counts are kept for the next attempt
+            logger.exception("Could not write the job counters")
+
+    def add(self, job_id: int, field: str, amount: int = 1) -> None:
+        """Count an event for a job
+
+        :param job_id: The ID of the job
+        :param field: The counter to increment, one of :attr:`Job.POPULARITY_WEIGHTS`
+        :param amount: How much to add, which may be negative, defaults to 1
+        """
+        if field not in Job.POPULARITY_WEIGHTS:
+            raise ValueError(f"Unknown counter {field!r}")
+        with self._lock:
+            self._pending[job_id][field] += amount
+
+    def due(self) -> bool:
+        """Whether the pending counts should be written now"""
+        return len(self._pending) >= MAX_PENDING_JOBS or time.monotonic() - self._last_flush >= self._interval()
+
+    async def aadd(self, job_id: int, field: str, amount: int = 1) -> None:
+        """Count an event for a job, and write all pending counts when they are due
+
+        :param job_id: The ID of the job
+        :param field: The counter to increment, one of :attr:`Job.POPULARITY_WEIGHTS`
+        :param amount: How much to add, which may be negative, defaults to 1
+        """
+        self.add(job_id, field, amount)
+        if self.due():
+            await sync_to_async(self.flush)()
+
+    def flush(self) -> int:
+        """Write all pending counts to the database
+
+        :return: The number of jobs that were updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._last_flush = time.monotonic()
+
+        # Jobs with the same increments are updated together
+        groups: dict[tuple[int, ...], list[int]] = defaultdict(list)
+        for job_id, counts in pending.items():
+            groups[tuple(counts[field] for field in Job.POPULARITY_WEIGHTS)].append(job_id)
+
+        updated = 0
+        try:
+            for increments, ids in groups.items():
+                changes = {field: F(field) + amount for field, amount in zip(Job.POPULARITY_WEIGHTS, increments) if amount}
+                popularity = sum(weight * amount for weight, amount in zip(Job.POPULARITY_WEIGHTS.values(), increments))
+                for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+                    chunk = ids[start:start + UPDATE_CHUNK_SIZE]
+                    if changes:
+                        updated += Job.objects.filter(id__in=chunk).update(**changes, popularity=F('popularity') + popularity)
+                    for job_id in chunk:
+                        del pending[job_id]
+        finally:
+            # Keep the counts that were not written for the next flush
+            if pending:
+                with self._lock:
+                    for job_id, counts in pending.items():
+                        self._pending[job_id].update(counts)
+        return updated
+
+
+job_counters = JobCounters()
@@ -0,0 +1,242 @@
+import datetime
+import random
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+from django.utils import timezone
+
+from core.models import Company, User
+from questionnaire.models import QuestionResult
+
+from .bulk import create_jobs
+from .collaborative import APPLICATION_WEIGHT, BOOKMARK_WEIGHT, interactions, item_similarity, top_scores
+from .models import Job, JobApplication, JobBookmark, JobTrait
+from .recommend import job_recommender
+from .traits import HOLLAND_CODES, MBTI_TYPES
+
+
+__all__ = ('Evaluation', 'RECOMMENDERS', 'Split', 'evaluate', 'generate_synthetic', 'time_split')
+
+
+# Takes a user ID and a number of jobs, and returns the IDs of the recommended jobs
+Recommender = Callable[[int, int], list[int]]
+
+
+class Split(NamedTuple):
+    """Interactions divided into what a recommender may learn from and what it should predict"""
+    train: dict[int, set[int]]
+    test: dict[int, set[int]]
+    train_applications: list[tuple[int, int]]
+    train_bookmarks: list[tuple[int, int]]
+    active: set[int]
+    cutoff: Optional[datetime.datetime]
+
+
+class Evaluation(NamedTuple):
+    """How well and how fast a recommender predicted the held out interactions"""
+    users: int
+    precision: float
+    recall: float
+    coverage: float
+    setup: float
+    latency: tuple[float, float, float]
+    memory: tuple[float, float]
+
+
+def time_split(test_fraction: float = 0.2) -> Split:
+    """Hold out the most recent applications
+
+    Applications from before the cutoff, and all bookmarks, which have no
+    date, are used for training. Later applications to jobs that are still
+    open, and that the user did not interact with before, are to be predicted.
+
+    :param test_fraction: The fraction of the applications to hold out, defaults to 0.2
+    :return: The split
+    """
+    applications = sorted(JobApplication.objects.values_list('applied_date', 'user_id', 'job_id').iterator())
+    bookmarks = list(JobBookmark.objects.values_list('user_id', 'job_id').iterator())
+    active = set(Job.objects.active().values_list('id', flat=True).iterator())
+
+    held_out = int(len(applications) * test_fraction)
+    split_at = len(applications) - held_out
+    cutoff = applications[split_at][0] if held_out else None
+    train_applications = [(user_id, job_id) for _, user_id, job_id in applications[:split_at]]
+
+    train: dict[int, set[int]] = defaultdict(set)
+    for user_id, job_id in (*train_applications, *bookmarks):
+        train[user_id].add(job_id)
+    test: dict[int, set[int]] = defaultdict(set)
+    for _, user_id, job_id in applications[split_at:]:
+        if job_id in active and job_id not in train[user_id]:
+            test[user_id].add(job_id)
+    return Split(dict(train), dict(test), train_applications, bookmarks, active, cutoff)
+
+
+def profile_recommender(split: Split) -> Recommender:
+    """Recommend with :class:`jobs.recommend.JobRecommender`, from the latest questionnaire result of each user"""
+    job_recommender.ensure_fitted()
+    results: dict[int, QuestionResult] = {}
+    for result in QuestionResult.objects.filter(user_id__in=split.test).select_related('user').order_by('-id'):
+        results.setdefault(result.user_id, result)
+
+    def recommend(user_id: int, k: int) -> list[int]:
+        result = results.get(user_id)
+        if result is None:
+            return []
+        seen = split.train.get(user_id, set())
+        # Rank the same candidates as the recommended route and precompute_recommendations
+        candidates = list(JobTrait.candidates(result))
+        ranked = job_recommender.recommend(result, result.user, limit=k + len(seen), candidates=candidates)
+        return [job_id for job_id, _ in ranked if job_id not in seen][:k]
+    return recommend
+
+
+def collaborative_recommender(split: Split) -> Recommender:
+    """Recommend with the item-item model of :mod:`jobs.collaborative`, trained on the training interactions"""
+    pairs = split.train_applications + split.train_bookmarks
+    user_ids = np.unique(np.array([user_id for user_id, _ in pairs], dtype=np.int64))
+    job_ids = np.unique(np.array([job_id for _, job_id in pairs], dtype=np.int64))
+    matrix = interactions(split.train_bookmarks, user_ids, job_ids, BOOKMARK_WEIGHT)\
+        + interactions(split.train_applications, user_ids, job_ids, APPLICATION_WEIGHT)
+    similarity = item_similarity(matrix)
+    closed = np.flatnonzero(~np.isin(job_ids, np.fromiter(split.active, dtype=np.int64)))
+    rows = {int(user_id): row for row, user_id in enumerate(user_ids)}
+
+    def recommend(user_id: int, k: int) -> list[int]:
+        row = rows.get(user_id)
+        if row is None:
+            return []
+        seen = matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]
+        scores = (matrix[row] @ similarity).tocsr()
+        return [int(job_ids[column]) for column, _ in top_scores(scores, np.concatenate((seen, closed)), k)]
+    return recommend
+
+
+def popular_recommender(split: Split) -> Recommender:
+    """Recommend the open jobs with the most training interactions, as a baseline"""
+    counts = Counter(job_id for jobs in split.train.values() for job_id in jobs if job_id in split.active)
+    ranked = [job_id for job_id, _ in counts.most_common()]
+
+    def recommend(user_id: int, k: int) -> list[int]:
+        seen = split.train.get(user_id, set())
+        return [job_id for job_id in ranked if job_id not in seen][:k]
+    return recommend
+
+
+RECOMMENDERS: dict[str, Callable[[Split], Recommender]] = {
+    'profile': profile_recommender,
+    'collaborative': collaborative_recommender,
+    'popular': popular_recommender,
+}
+
+
+def evaluate(name: str, split: Split, k: int = 10) -> Evaluation:
+    """Replay the held out interactions against a recommender
+
+    Every user with held out interactions is given `k` recommendations.
+    Latency is measured per user without tracing, after which the peak memory
+    allocated per user is measured in a second pass with :mod:`tracemalloc`.
+
+    :param name: The recommender to evaluate, one of :data:`RECOMMENDERS`
+    :param split: The interactions to learn from and to predict
+    :param k: The number of recommendations per user, defaults to 10
+    :return: The precision and recall at `k` averaged over users, the fraction of open jobs ever recommended,
+             the seconds it took to set up, the 50th, 95th and 99th percentile latency in milliseconds,
+             and the mean and maximum memory per user in KiB
+    """
+    start = time.perf_counter()
+    recommend = RECOMMENDERS[name](split)
+    setup = time.perf_counter() - start
+
+    users = sorted(split.test)
+    latencies, recommended = [], set()
+    precision = recall = 0.0
+    for user_id in users:
+        start = time.perf_counter()
+        jobs = recommend(user_id, k)
+        latencies.append(time.perf_counter() - start)
+        hits = len(split.test[user_id].intersection(jobs))
+        precision += hits / k
+        recall += hits / len(split.test[user_id])
+        recommended.update(jobs)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for user_id in users:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            recommend(user_id, k)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    count = max(len(users), 1)
+    return Evaluation(
+        users=len(users),
+        precision=precision / count,
+        recall=recall / count,
+        coverage=len(recommended) / max(len(split.active), 1),
+        setup=setup,
+        latency=tuple(np.percentile(latencies, (50, 95, 99)) * 1000) if latencies else (0.0, 0.0, 0.0),
+        memory=(float(np.mean(peaks)) / 1024, max(peaks) / 1024) if peaks else (0.0, 0.0),
+    )
+
+
+SYNTHETIC_FIELDS = ("Science", "Health care", "Food", "IT", "Finance", "Education", "Law", "Art")
+
+
+def generate_synthetic(users: int, jobs: int, days: int = 90, seed: int = 0) -> None:
+    """Fill the database with made up jobs, users, questionnaire results and interactions
+
+    Every user gets the traits of a random job, and mostly bookmarks and
+    applies to jobs that share an MBTI type or field with it, on random dates
+    over the last `days` days, so that both recommenders have a signal to find.
+
+    :param users: The number of users to create
+    :param jobs: The number of jobs to create
+    :param days: The number of days the applications are spread over, defaults to 90
+    :param seed: The seed of the random generator, defaults to 0
+    """
+    rng = random.Random(seed)
+    company = Company.objects.create(name="Synthetic", slug=f"synthetic-{seed}", description="")
+    deadline = timezone.localdate() + datetime.timedelta(days=60)
+    created = create_jobs([
+        Job(company=company, title=f"{field} job {i}", location="Enschede", description="", requirements="",
+            salary="", instructions="", deadline=deadline, keywords=field.lower(), image="https://example.com/image.png",
+            contact_info="", mbti=rng.choice(MBTI_TYPES), job_fields=field, holland="".join(rng.sample(HOLLAND_CODES, 2)),
+            additional="")
+        for i, field in ((i, rng.choice(SYNTHETIC_FIELDS)) for i in range(jobs))
+    ])
+
+    people = User.objects.bulk_create([User(username=f"synthetic-{seed}-{i}", password="!") for i in range(users)])
+    results, applications, bookmarks = [], [], []
+    now = timezone.now()
+    for user in people:
+        taste = rng.choice(created)
+        results.append(QuestionResult(user=user, MbtiType=taste.mbti, codeOne=taste.holland[0], codeTwo=taste.holland[1],
+                                      category_one=taste.job_fields))
+        weights = [4 if job.mbti == taste.mbti or job.job_fields == taste.job_fields else 1 for job in created]
+        chosen = []
+        while len(chosen) < min(rng.randint(3, 10), len(created)):
+            job = rng.choices(created, weights)[0]
+            if job not in chosen:
+                chosen.append(job)
+        split = rng.randint(0, len(chosen) // 3)
+        bookmarks.extend(JobBookmark(user=user, job=job) for job in chosen[:split])
+        applications.extend(
+            JobApplication(user=user, job=job, applied_date=now - datetime.timedelta(days=rng.uniform(0, days)))
+            for job in chosen[split:]
+        )
+    QuestionResult.objects.bulk_create(results)
+    JobBookmark.objects.bulk_create(bookmarks)
+
+    # The application dates are overwritten on insert, since they are auto_now_add
+    dates = [application.applied_date for application in applications]
+    applications = JobApplication.objects.bulk_create(applications)
+    for application, date in zip(applications, dates):
+        application.applied_date = date
+    JobApplication.objects.bulk_update(applications, ['applied_date'], batch_size=1000)
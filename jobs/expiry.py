@@ -0,0 +1,50 @@
+import datetime
+import heapq
+
+
+__all__ = ('ExpiryQueue',)
+
+
+class ExpiryQueue:
+    """The deadlines of the jobs in an in-memory index, soonest first
+
+    Indexes only hold open jobs, but jobs close by themselves as their
+    deadline passes. Indexes push every job they add here, and before
+    answering a query they drop whatever :meth:`pop_expired` returns, so they
+    stay proportional to the number of open jobs without a query.
+    """
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime.date, int]] = []
+        self._deadlines: dict[int, datetime.date] = {}
+
+    def push(self, job_id: int, deadline: datetime.date) -> None:
+        """Start tracking a job, or update its deadline
+
+        :param job_id: The ID of the job
+        :param deadline: The deadline of the job
+        """
+        if self._deadlines.get(job_id) != deadline:
+            self._deadlines[job_id] = deadline
+            heapq.heappush(self._heap, (deadline, job_id))
+
+    def discard(self, job_id: int) -> None:
+        """Stop tracking a job
+
+        :param job_id: The ID of the job
+        """
+        self._deadlines.pop(job_id, None)
+
+    def pop_expired(self, today: datetime.date) -> list[int]:
+        """Stop tracking all jobs whose deadline is before a date
+
+        :param today: The current date
+        :return: The IDs of the expired jobs
+        """
+        expired = []
+        while self._heap and self._heap[0][0] < today:
+            deadline, job_id = heapq.heappop(self._heap)
+            # Entries of jobs that were discarded or got a new deadline are stale
+            if self._deadlines.get(job_id) == deadline:
+                del self._deadlines[job_id]
+                expired.append(job_id)
+        return expired
@@ -0,0 +1,69 @@
+import threading
+from typing import Optional
+
+from careernavigator.util.cache import table_version
+from core.models import Company
+
+from .models import Job
+
+
+__all__ = ('JobIndex',)
+
+
+class JobIndex:
+    """Base for the in-memory indexes over the open jobs
+
+    An index is built from the database on first use, and afterwards kept up
+    to date by the signal handlers in :mod:`jobs.signals`. It remembers the
+    version of the jobs it was built from, and is rebuilt when that version
+    changes without it, because another process wrote to them.
+
+    Subclasses set up their empty contents in :meth:`_clear`, and fill them
+    from the database in :meth:`_build`; both are called with the lock held.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.reset()
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def _build(self) -> None:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Drop the contents of the index; it will be rebuilt on next use"""
+        with self._lock:
+            self.built = False
+            self.version: Optional[str] = None
+            self._clear()
+
+    def is_current(self, version: str) -> bool:
+        """Check whether the index is built from the given version of the jobs"""
+        return self.built and self.version == version
+
+    def ensure_built(self, version: Optional[str] = None) -> None:
+        """Build the index from the database if that has not happened yet, or if the jobs changed elsewhere
+
+        :param version: The current version of the jobs, defaults to reading it with :func:`table_version`
+        """
+        version = table_version(Job, Company) if version is None else version
+        if self.is_current(version):
+            return
+        with self._lock:
+            if self.is_current(version):
+                return
+            self.reset()
+            self._build()
+            self.version = version
+            self.built = True
+
+    def follow_version(self, previous: str, current: str) -> None:
+        """Take on a new version of the jobs, after the change that caused it was applied to the index
+
+        :param previous: The version before the change
+        :param current: The version after the change
+        """
+        with self._lock:
+            if self.version == previous:
+                self.version = current
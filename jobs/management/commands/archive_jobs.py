@@ -0,0 +1,45 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from careernavigator.util.cache import bump_version
+from core.models import Company
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Archive jobs whose deadline has long passed, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="How many days after its deadline a job is archived")
+        parser.add_argument('--batch-size', type=int, default=1000, help="The number of jobs to archive per transaction")
+
+    def handle(self, *args, days: int, batch_size: int, **options):
+        if days < 0:
+            raise CommandError("The number of days can't be negative")
+        if batch_size < 1:
+            raise CommandError("The batch size must be positive")
+
+        cutoff = timezone.localdate() - datetime.timedelta(days=days)
+        # This walks the partial index over jobs that are not archived yet
+        expired = Job.objects.filter(archived=False, deadline__lt=cutoff).order_by('deadline', 'id')
+        start = time.perf_counter()
+        archived = 0
+        while True:
+            with transaction.atomic():
+                ids = list(expired.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                # Bookmarks and applications of archived jobs are kept; the
+                # queries that serve them only join open jobs
+                archived += Job.objects.filter(id__in=ids).update(archived=True)
+            self.stdout.write(f"Archived {archived} jobs")
+
+        if archived:
+            # Queryset updates don't send signals, so drop cached responses here
+            bump_version(Job, Company)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} jobs with a deadline before {cutoff.isoformat()} in {time.perf_counter() - start:.1f}s"))
@@ -0,0 +1,40 @@
+import json
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpRequest
+
+from careernavigator.util.api import OrjsonRenderer, Renderer
+from jobs.api import JobPageSchema
+from jobs.benchmark import sample_jobs
+
+
+class Command(BaseCommand):
+    help = "Compare how long the API renderers take to render a page of jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1000, help="The number of jobs on the page")
+        parser.add_argument('--repeat', type=int, default=20, help="The number of times each renderer renders the page")
+
+    def _payload(self, count: int) -> dict:
+        # The same data the renderer gets from a route
+        return JobPageSchema.model_validate({"items": sample_jobs(count), "count": count, "next_cursor": None}).model_dump()
+
+    def handle(self, *args, jobs: int, repeat: int, **options):
+        if jobs < 1 or repeat < 1:
+            raise CommandError("The number of jobs and repeats must be positive")
+
+        data = self._payload(jobs)
+        request = HttpRequest()
+        renderers = {'json': Renderer(), 'orjson': OrjsonRenderer()}
+        outputs = {name: renderer.render(request, data, response_status=200) for name, renderer in renderers.items()}
+        if json.loads(outputs['json']) != json.loads(outputs['orjson']):
+            raise CommandError("The renderers disagree on the output")
+
+        timings = {}
+        for name, renderer in renderers.items():
+            seconds = min(timeit.repeat(lambda: renderer.render(request, data, response_status=200), number=1, repeat=repeat))
+            timings[name] = seconds
+            self.stdout.write(f"{name:<7} {seconds * 1000:8.2f}ms  {len(outputs[name]) / 1024:8.1f}KiB")
+        self.stdout.write(self.style.SUCCESS(
+            f"orjson renders {jobs} jobs {timings['json'] / timings['orjson']:.1f}x as fast as the JSON renderer"))
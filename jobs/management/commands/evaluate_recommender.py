@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from jobs.evaluation import RECOMMENDERS, evaluate, generate_synthetic, time_split
+from jobs.recommend import job_recommender
+from jobs.search import job_index
+from jobs.suggest import job_suggestions
+
+
+class Command(BaseCommand):
+    help = "Evaluate the recommenders by replaying the most recent applications, and measure their latency and memory use"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=10, help="The number of recommendations per user")
+        parser.add_argument('--test-fraction', type=float, default=0.2, help="The fraction of the applications to hold out")
+        parser.add_argument('--recommender', choices=RECOMMENDERS, action='append',
+                            help="A recommender to evaluate, can be repeated, defaults to all of them")
+        parser.add_argument('--synthetic', type=int, metavar='USERS',
+                            help="Evaluate on this many made up users instead, which are rolled back afterwards")
+        parser.add_argument('--synthetic-jobs', type=int, default=200, help="The number of made up jobs")
+        parser.add_argument('--seed', type=int, default=0, help="The seed for the made up data")
+
+    def handle(self, *args, k: int, test_fraction: float, recommender: list[str], synthetic: int, synthetic_jobs: int,
+               seed: int, **options):
+        if k < 1:
+            raise CommandError("k must be positive")
+        if not 0 < test_fraction < 1:
+            raise CommandError("The test fraction must be between 0 and 1")
+        if synthetic is not None and (synthetic < 1 or synthetic_jobs < 1):
+            raise CommandError("The number of synthetic users and jobs must be positive")
+
+        job_recommender.reset()
+        try:
+            with transaction.atomic():
+                if synthetic is not None:
+                    generate_synthetic(synthetic, synthetic_jobs, seed=seed)
+                self._evaluate(recommender or list(RECOMMENDERS), k, test_fraction)
+                transaction.set_rollback(synthetic is not None)
+        finally:
+            if synthetic is not None:
+                # The in-memory indexes have seen the made up jobs
+                job_index.reset()
+                job_suggestions.reset()
+                job_recommender.reset()
+
+    def _evaluate(self, recommenders: list[str], k: int, test_fraction: float) -> None:
+        split = time_split(test_fraction)
+        cutoff = split.cutoff.isoformat(timespec='seconds') if split.cutoff else "-"
+        self.stdout.write(
+            f"Split at {cutoff}: {sum(map(len, split.train.values()))} training interactions, "
+            f"{sum(map(len, split.test.values()))} held out for {len(split.test)} users, {len(split.active)} open jobs")
+        if not split.test:
+            raise CommandError("There are no held out applications to evaluate against")
+
+        for name in recommenders:
+            result = evaluate(name, split, k)
+            self.stdout.write(
+                f"{name:<14} precision@{k} {result.precision:.3f}  recall@{k} {result.recall:.3f}  "
+                f"coverage {result.coverage:.1%}  setup {result.setup:.2f}s  "
+                f"latency p50/p95/p99 {'/'.join(f'{ms:.2f}' for ms in result.latency)}ms  "
+                f"memory mean/max {result.memory[0]:.1f}/{result.memory[1]:.1f}KiB per user")
+        self.stdout.write(self.style.SUCCESS(f"Evaluated {len(recommenders)} recommenders on {len(split.test)} users"))
@@ -0,0 +1,79 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from django.core.management.base import BaseCommand, CommandError
+from pydantic import ValidationError
+
+from jobs.api import JobCreateSchema
+from jobs.bulk import create_jobs_with_companies
+
+
+class Command(BaseCommand):
+    help = "Import jobs from a CSV or JSON Lines file, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="The file to import, or - to read from standard input")
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help="The format of the file, defaults to guessing it from the extension")
+        parser.add_argument('--batch-size', type=int, default=1000, help="The number of jobs to insert per transaction")
+
+    def handle(self, *args, file: str, format: str, batch_size: int, **options):
+        if format is None:
+            format = 'jsonl' if file.endswith(('.jsonl', '.ndjson')) else 'csv'
+        if batch_size < 1:
+            raise CommandError("The batch size must be positive")
+
+        stream = sys.stdin if file == '-' else open(file, newline='', encoding='utf-8')
+        try:
+            rows = self._read_csv(stream) if format == 'csv' else self._read_jsonl(stream)
+            self._import(rows, batch_size)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def _read_csv(self, stream) -> Iterator[dict]:
+        yield from csv.DictReader(stream)
+
+    def _read_jsonl(self, stream) -> Iterator[Any]:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise CommandError(f"Line {line_number} is not valid JSON: {e}") from e
+
+    def _validate(self, rows: Iterable[Any]) -> Iterator[JobCreateSchema]:
+        for row_number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                self.skipped += 1
+                self.stderr.write(f"Skipping row {row_number}: expected an object, got {type(row).__name__}")
+                continue
+            row.setdefault('company_description', "")
+            try:
+                yield JobCreateSchema.model_validate(row)
+            except ValidationError as e:
+                self.skipped += 1
+                self.stderr.write(f"Skipping row {row_number}: {e.error_count()} invalid field(s): "
+                                  + ", ".join(".".join(map(str, error['loc'])) for error in e.errors()))
+
+    def _import(self, rows: Iterable[dict], batch_size: int) -> None:
+        self.skipped = 0
+        imported = 0
+        start = time.perf_counter()
+        jobs = self._validate(rows)
+
+        while batch := list(islice(jobs, batch_size)):
+            create_jobs_with_companies(batch, batch_size=batch_size)
+            imported += len(batch)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"Imported {imported} jobs ({imported / elapsed:.0f} rows/s)")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} jobs in {elapsed:.1f}s ({imported / elapsed if elapsed else 0:.0f} rows/s), "
+            f"skipped {self.skipped} invalid rows"
+        ))
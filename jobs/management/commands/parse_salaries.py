@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from careernavigator.util.cache import bump_version
+from core.models import Company
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Parse the salaries of existing jobs into their structured salary fields, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="The number of jobs to update per query")
+
+    def handle(self, *args, batch_size: int, **options):
+        if batch_size < 1:
+            raise CommandError("The batch size must be positive")
+
+        start = time.perf_counter()
+        checked = updated = 0
+        last_id = 0
+        while True:
+            jobs = list(Job.objects.filter(id__gt=last_id).order_by('id').only('id', 'salary', *Job.SALARY_FIELDS)[:batch_size])
+            if not jobs:
+                break
+            last_id = jobs[-1].id
+
+            changed = []
+            for job in jobs:
+                before = [getattr(job, field) for field in Job.SALARY_FIELDS]
+                job.parse_salary()
+                if [getattr(job, field) for field in Job.SALARY_FIELDS] != before:
+                    changed.append(job)
+            # This doesn't send signals; the search indexes of running servers
+            # are rebuilt once the version is bumped below
+            Job.objects.bulk_update(changed, Job.SALARY_FIELDS)
+            checked += len(jobs)
+            updated += len(changed)
+            self.stdout.write(f"Checked {checked} jobs, updated {updated}")
+
+        if updated:
+            bump_version(Job, Company)
+        self.stdout.write(self.style.SUCCESS(
+            f"Parsed the salaries of {checked} jobs, of which {updated} changed, in {time.perf_counter() - start:.1f}s"))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.precompute import precompute_recommendations
+from jobs.ranking import RECOMMENDATIONS
+
+
+class Command(BaseCommand):
+    help = "Precompute the recommended jobs of the users whose questionnaire result, profile or jobs changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute every user, even if nothing changed")
+        parser.add_argument('--limit', type=int, default=RECOMMENDATIONS, help="The number of recommendations to store per user")
+
+    def handle(self, *args, all: bool, limit: int, **options):
+        if limit < 1:
+            raise CommandError("The limit must be positive")
+
+        start = time.perf_counter()
+        computed, users = precompute_recommendations(full=all, limit=limit)
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed the recommendations of {computed} of {users} users in {time.perf_counter() - start:.1f}s"))
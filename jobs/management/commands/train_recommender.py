@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.collaborative import train
+from jobs.ranking import RECOMMENDATIONS
+
+
+class Command(BaseCommand):
+    help = "Retrain the collaborative recommendations from all bookmarks and applications"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=RECOMMENDATIONS,
+                            help="The number of recommendations to store per user, and of also applied jobs per job")
+
+    def handle(self, *args, limit: int, **options):
+        if limit < 1:
+            raise CommandError("The limit must be positive")
+
+        start = time.perf_counter()
+        report = train(limit=limit)
+        self.stdout.write(
+            f"Trained on {report.interactions} interactions between {report.users} users and {report.jobs} jobs")
+        for phase, seconds in report.timings.items():
+            self.stdout.write(f"  {phase}: {seconds:.2f}s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {report.recommendations} recommendations and {report.also_applied} also applied jobs "
+            f"in {time.perf_counter() - start:.1f}s"))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.similar import NEIGHBORS, update_neighbors
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed similar jobs of the jobs affected by changes to the catalog"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute the similar jobs of every job")
+        parser.add_argument('--limit', type=int, default=NEIGHBORS, help="The number of similar jobs to store per job")
+
+    def handle(self, *args, all: bool, limit: int, **options):
+        if limit < 1:
+            raise CommandError("The limit must be positive")
+
+        start = time.perf_counter()
+        updated = update_neighbors(full=all, limit=limit)
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed the similar jobs of {updated} jobs in {time.perf_counter() - start:.1f}s"))
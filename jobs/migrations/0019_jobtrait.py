@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_jobapplication_feedback_jobapplication_interviewed_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobTrait',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('mbti', 'MBTI type'), ('holland', 'Holland code'), ('field', 'job field')], max_length=8)),
+                ('value', models.CharField(max_length=100)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='traits', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'job trait',
+                'verbose_name_plural': 'job traits',
+                'indexes': [models.Index(fields=['kind', 'value'], name='jobtrait_kind_value')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobtrait',
+            constraint=models.UniqueConstraint(fields=('job', 'kind', 'value'), name='jtconstraint'),
+        ),
+    ]
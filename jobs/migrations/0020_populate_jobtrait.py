@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from jobs.traits import parse_holland, parse_job_fields, parse_mbti
+
+
+def populate_traits(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobTrait = apps.get_model('jobs', 'JobTrait')
+
+    traits = []
+    for job in Job.objects.only('id', 'mbti', 'holland', 'job_fields').iterator(chunk_size=2000):
+        traits.extend(JobTrait(job_id=job.id, kind='mbti', value=value) for value in parse_mbti(job.mbti))
+        traits.extend(JobTrait(job_id=job.id, kind='holland', value=value) for value in parse_holland(job.holland))
+        traits.extend(JobTrait(job_id=job.id, kind='field', value=value) for value in dict.fromkeys(
+            field[:100] for field in parse_job_fields(job.job_fields)))
+        if len(traits) >= 2000:
+            JobTrait.objects.bulk_create(traits)
+            traits = []
+    JobTrait.objects.bulk_create(traits)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_jobtrait'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_traits, migrations.RunPython.noop),
+    ]
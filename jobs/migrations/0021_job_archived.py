@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_alter_user_employer_alter_user_mentor'),
+        ('jobs', '0020_populate_jobtrait'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['deadline'], name='job_active_deadline'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0021_job_archived'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNeighborUpdate',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'pending neighbor update',
+                'verbose_name_plural': 'pending neighbor updates',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='jobs.job')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'job neighbor',
+                'verbose_name_plural': 'job neighbors',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobneighbor',
+            constraint=models.UniqueConstraint(fields=('job', 'rank'), name='jnconstraint'),
+        ),
+    ]
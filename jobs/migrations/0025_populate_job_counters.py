@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+
+    jobs = Job.objects\
+        .annotate(bookmarks=Count('jobbookmark', distinct=True), applications=Count('jobapplication', distinct=True))\
+        .only('id')
+    changed = []
+    for job in jobs.iterator(chunk_size=2000):
+        job.bookmark_count = job.bookmarks
+        job.application_count = job.applications
+        job.popularity = 5 * job.bookmarks + 10 * job.applications
+        changed.append(job)
+        if len(changed) >= 2000:
+            Job.objects.bulk_update(changed, ['bookmark_count', 'application_count', 'popularity'])
+            changed = []
+    Job.objects.bulk_update(changed, ['bookmark_count', 'application_count', 'popularity'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0024_job_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.2 on 2026-10-18 04:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0025_populate_job_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('collaborative', 'similar users')], max_length=16)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'user recommendation',
+                'verbose_name_plural': 'user recommendations',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='jobneighbor',
+            name='jnconstraint',
+        ),
+        migrations.AddField(
+            model_name='jobneighbor',
+            name='kind',
+            field=models.CharField(choices=[('similar', 'similar job'), ('applied', 'also applied to')], default='similar', max_length=8),
+        ),
+        migrations.AddConstraint(
+            model_name='jobneighbor',
+            constraint=models.UniqueConstraint(fields=('job', 'kind', 'rank'), name='jnkindconstraint'),
+        ),
+        migrations.AddField(
+            model_name='userrecommendation',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.job'),
+        ),
+        migrations.AddField(
+            model_name='userrecommendation',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='userrecommendation',
+            constraint=models.UniqueConstraint(fields=('user', 'source', 'rank'), name='urconstraint'),
+        ),
+    ]
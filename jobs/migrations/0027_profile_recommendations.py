@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 04:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_alter_user_employer_alter_user_mentor'),
+        ('jobs', '0026_collaborative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationInput',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('profile_hash', models.CharField(max_length=64)),
+                ('catalog_hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'verbose_name': 'recommendation input',
+                'verbose_name_plural': 'recommendation inputs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='userrecommendation',
+            name='source',
+            field=models.CharField(choices=[('collaborative', 'similar users'), ('profile', 'questionnaire and profile')], max_length=16),
+        ),
+    ]
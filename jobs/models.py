@@ -1,8 +1,74 @@
+import datetime
+from typing import Optional
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _lazy
 from martor.models import MartorField
 from core.models import Company
+from questionnaire.models import QuestionResult
+
+from .salary import PERIODS_PER_YEAR, parse_salary
+from .traits import parse_holland, parse_job_fields, parse_mbti
+
+
+class JobQuerySet(models.QuerySet):
+    def active(self) -> "JobQuerySet":
+        """Only the jobs that are open for applications
+
+        This filters on the partial index over the deadlines of jobs that are
+        not archived, so its cost is proportional to the number of open jobs.
+        """
+        return self.filter(archived=False, deadline__gte=timezone.localdate())
+
+    def salary_between(self, minimum: Optional[int] = None, maximum: Optional[int] = None) -> "JobQuerySet":
+        """Only the jobs whose salary range overlaps a range
+
+        Jobs with an open ended salary, such as "from €3000", match when the
+        stated end fits. Jobs without a parsed salary never match.
+
+        :param minimum: The lowest acceptable yearly salary, defaults to no minimum
+        :param maximum: The highest acceptable yearly salary, defaults to no maximum
+        """
+        jobs = self
+        if minimum is not None:
+            jobs = jobs.filter(models.Q(salary_max__gte=minimum) | models.Q(salary_max=None, salary_min__isnull=False))
+        if maximum is not None:
+            jobs = jobs.filter(models.Q(salary_min__lte=maximum) | models.Q(salary_min=None, salary_max__isnull=False))
+        return jobs
+
+    def order_by_salary(self, descending: bool = False) -> "JobQuerySet":
+        """Order by the lower end of the salary, or by the upper end when descending
+
+        Jobs without that end of the salary are left out, so the order can
+        be served from the salary indexes.
+        """
+        if descending:
+            return self.filter(salary_max__isnull=False).order_by('-salary_max')
+        return self.filter(salary_min__isnull=False).order_by('salary_min')
+
+    def with_user_state(self, user) -> "JobQuerySet":
+        """Annotate whether a user bookmarked each job, and how far their application to it got
+
+        Both are correlated subqueries on the unique (user, job) indexes of
+        bookmarks and applications, so they cost one index lookup per row and
+        no extra queries. `application_status` is the furthest stage reached,
+        "applied" when none was, or `None` without an application.
+
+        :param user: The user to annotate the state of
+        """
+        applications = JobApplication.objects.filter(user=user, job=models.OuterRef('pk'))
+        return self.annotate(
+            is_bookmarked=models.Exists(JobBookmark.objects.filter(user=user, job=models.OuterRef('pk'))),
+            application_status=models.Subquery(applications.annotate(status=models.Case(
+                models.When(tested=True, then=models.Value('tested')),
+                models.When(interviewed=True, then=models.Value('interviewed')),
+                models.When(processed=True, then=models.Value('processed')),
+                models.When(sent=True, then=models.Value('sent')),
+                default=models.Value('applied'),
+            )).values('status')[:1]),
+        )
 
 
 class Job(models.Model):
@@ -21,14 +87,197 @@ class Job(models.Model):
     job_fields = models.CharField(max_length=500)
     holland = models.CharField(max_length=500)
     additional = models.CharField(max_length=500)
+    archived = models.BooleanField(default=False)
+    # Parsed from salary when saving, as whole amounts per year
+    salary_min = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    salary_max = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    salary_currency = models.CharField(max_length=3, blank=True, editable=False)
+    salary_period = models.CharField(max_length=5, blank=True, editable=False,
+                                     choices=[(period, period) for period in PERIODS_PER_YEAR])
+    # Updated in batches by jobs.counters
+    view_count = models.IntegerField(default=0, editable=False)
+    bookmark_count = models.IntegerField(default=0, editable=False)
+    application_count = models.IntegerField(default=0, editable=False)
+    popularity = models.IntegerField(default=0, editable=False)
+
+    objects = JobQuerySet.as_manager()
+
+    SALARY_FIELDS = ('salary_min', 'salary_max', 'salary_currency', 'salary_period')
+    # How much each counter adds to the popularity of a job
+    POPULARITY_WEIGHTS = {
+        'view_count': 1,
+        'bookmark_count': 5,
+        'application_count': 10,
+    }
 
     def __str__(self) -> str:
         return self.title
+
+    def parse_salary(self) -> None:
+        """Set the structured salary fields from the free text salary"""
+        self.salary_min, self.salary_max, self.salary_currency, self.salary_period = parse_salary(self.salary)
+
+    def save(self, *args, **kwargs) -> None:
+        self.parse_salary()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'salary' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *self.SALARY_FIELDS}
+        super().save(*args, **kwargs)
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the job is open for applications, like :meth:`JobQuerySet.active`"""
+        return not self.archived and self.deadline_date >= timezone.localdate()
+
+    @property
+    def deadline_date(self) -> datetime.date:
+        """The deadline, also when it was assigned as a string"""
+        return self._meta.get_field('deadline').to_python(self.deadline)
     
     class Meta:
+        indexes = [
+            models.Index(fields=['deadline'], condition=models.Q(archived=False), name="job_active_deadline"),
+            models.Index(fields=['salary_min'], name="job_salary_min"),
+            models.Index(fields=['salary_max'], name="job_salary_max"),
+            models.Index(fields=['-popularity', '-id'], condition=models.Q(archived=False), name="job_active_popularity"),
+        ]
         verbose_name = _lazy("job")
         verbose_name_plural = _lazy("jobs")
 
+class JobTrait(models.Model):
+    """A single MBTI type, Holland code or job field that a job is suited for
+
+    These are parsed from the free text columns of :class:`Job`, so that jobs
+    can be matched on them with indexed lookups.
+    """
+    class Kind(models.TextChoices):
+        MBTI = 'mbti', _lazy('MBTI type')
+        HOLLAND = 'holland', _lazy('Holland code')
+        FIELD = 'field', _lazy('job field')
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='traits')
+    kind = models.CharField(max_length=8, choices=Kind.choices)
+    value = models.CharField(max_length=100)
+
+    @classmethod
+    def for_job(cls, job: Job) -> list["JobTrait"]:
+        """Parse the traits of a job
+
+        :param job: The job to parse the traits of
+        :return: The unsaved traits of the job
+        """
+        return [
+            *(cls(job=job, kind=cls.Kind.MBTI, value=value) for value in parse_mbti(job.mbti)),
+            *(cls(job=job, kind=cls.Kind.HOLLAND, value=value) for value in parse_holland(job.holland)),
+            *(cls(job=job, kind=cls.Kind.FIELD, value=value) for value in dict.fromkeys(
+                field[:100] for field in parse_job_fields(job.job_fields))),
+        ]
+
+    @classmethod
+    def for_result(cls, result: QuestionResult) -> dict[str, list[str]]:
+        """Parse the traits a questionnaire result matches jobs on
+
+        :param result: The questionnaire result
+        :return: The values of the traits, per kind
+        """
+        return {
+            cls.Kind.MBTI: parse_mbti(result.MbtiType),
+            cls.Kind.HOLLAND: parse_holland(f"{result.codeOne} {result.codeTwo}"),
+            cls.Kind.FIELD: [field[:100] for category in (result.category_one, result.category_two, result.category_three)
+                             for field in parse_job_fields(category)],
+        }
+
+    @classmethod
+    def candidates(cls, result: QuestionResult) -> models.QuerySet:
+        """Get the open jobs that are recommended for a questionnaire result
+
+        :param result: The questionnaire result
+        :return: The IDs of the open jobs sharing at least one trait with the result
+        """
+        traits = models.Q()
+        for kind, values in cls.for_result(result).items():
+            traits |= models.Q(kind=kind, value__in=values)
+        return cls.objects\
+            .filter(traits)\
+            .filter(job__in=Job.objects.active())\
+            .values_list('job_id', flat=True)\
+            .distinct()
+
+    def __str__(self) -> str:
+        return f'{self.get_kind_display()}: {self.value}'
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['job', 'kind', 'value'], name="jtconstraint")]
+        indexes = [models.Index(fields=['kind', 'value'], name="jobtrait_kind_value")]
+        verbose_name = _lazy("job trait")
+        verbose_name_plural = _lazy("job traits")
+
+class JobNeighbor(models.Model):
+    """One of the most related jobs to a job, precomputed in batch
+
+    Similar jobs are computed from their text and traits by
+    :mod:`jobs.similar`, and jobs that were applied to by the same users by
+    :mod:`jobs.collaborative`.
+    """
+    class Kind(models.TextChoices):
+        SIMILAR = 'similar', _lazy('similar job')
+        APPLIED = 'applied', _lazy('also applied to')
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=8, choices=Kind.choices, default=Kind.SIMILAR)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    def __str__(self) -> str:
+        return f'{self.job} - {self.neighbor}'
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['job', 'kind', 'rank'], name="jnkindconstraint")]
+        verbose_name = _lazy("job neighbor")
+        verbose_name_plural = _lazy("job neighbors")
+
+class PendingNeighborUpdate(models.Model):
+    """A job whose neighbors have to be recomputed, because it was changed"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='+')
+
+    class Meta:
+        verbose_name = _lazy("pending neighbor update")
+        verbose_name_plural = _lazy("pending neighbor updates")
+
+class UserRecommendation(models.Model):
+    """One of the top recommended jobs for a user, precomputed in batch"""
+    class Source(models.TextChoices):
+        COLLABORATIVE = 'collaborative', _lazy('similar users')
+        PROFILE = 'profile', _lazy('questionnaire and profile')
+
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='+')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    source = models.CharField(max_length=16, choices=Source.choices)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    def __str__(self) -> str:
+        return f'{self.user} - {self.job}'
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'source', 'rank'], name="urconstraint")]
+        verbose_name = _lazy("user recommendation")
+        verbose_name_plural = _lazy("user recommendations")
+
+class RecommendationInput(models.Model):
+    """Fingerprints of what the precomputed profile recommendations of a user were computed from"""
+    user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE, primary_key=True, related_name='+')
+    profile_hash = models.CharField(max_length=64)
+    catalog_hash = models.CharField(max_length=64)
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+    class Meta:
+        verbose_name = _lazy("recommendation input")
+        verbose_name_plural = _lazy("recommendation inputs")
+
 class JobApplication(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.PROTECT)
     job = models.ForeignKey(Job, on_delete=models.PROTECT)
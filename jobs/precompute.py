@@ -0,0 +1,137 @@
+import hashlib
+from collections import defaultdict
+from typing import Iterator
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from core.models import User
+from questionnaire.models import QuestionResult
+
+from .models import Job, JobTrait, RecommendationInput, UserRecommendation
+from .ranking import INSERT_BATCH_SIZE, RECOMMENDATIONS, batches, top_k
+from .recommend import job_recommender, profile_text
+
+
+__all__ = ('precompute_recommendations',)
+
+
+def catalog_hash(ids: np.ndarray, matrix: sparse.csr_matrix) -> str:
+    """Fingerprint the vectors of the job catalog
+
+    :param ids: The IDs of the jobs
+    :param matrix: The vectors of the jobs, one per row
+    :return: A hash that changes whenever a job is added, removed or changed
+    """
+    matrix = matrix.copy()
+    matrix.sort_indices()
+    digest = hashlib.sha256()
+    for array in (ids, matrix.indptr, matrix.indices, matrix.data):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def profile_hash(result: QuestionResult, user: User) -> str:
+    """Fingerprint everything a user's recommendations are computed from
+
+    :param result: The latest questionnaire result of the user
+    :param user: The user
+    :return: A hash that changes whenever the result or profile changes
+    """
+    text = "\0".join((str(result.id), result.MbtiType, result.codeOne, result.codeTwo, result.category_one,
+                      result.category_two, result.category_three, profile_text(result, user)))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _latest_results() -> Iterator[QuestionResult]:
+    last_user = None
+    for result in QuestionResult.objects.select_related('user').order_by('user_id', '-id').iterator(chunk_size=2000):
+        if result.user_id != last_user:
+            last_user = result.user_id
+            yield result
+
+
+def _trait_columns(ids: np.ndarray) -> dict[tuple[str, str], np.ndarray]:
+    # The columns of the jobs that have each trait, to find the candidates of
+    # a user like the recommendations that are computed on request do
+    position = {int(id): column for column, id in enumerate(ids)}
+    columns = defaultdict(list)
+    for job_id, kind, value in JobTrait.objects.filter(job__in=Job.objects.active()).values_list('job_id', 'kind', 'value').iterator():
+        if job_id in position:
+            columns[kind, value].append(position[job_id])
+    return {trait: np.array(trait_columns, dtype=np.int64) for trait, trait_columns in columns.items()}
+
+
+def _store(
+        results: list[tuple[QuestionResult, str]],
+        catalog: str,
+        ids: np.ndarray,
+        matrix: sparse.csr_matrix,
+        traits: dict[tuple[str, str], np.ndarray],
+        limit: int) -> None:
+    scores = (job_recommender.profile_vectors([(result, result.user) for result, _ in results]) @ matrix.T).toarray()
+    # Only jobs that share a trait with the user are recommended
+    candidates = np.zeros(scores.shape, dtype=bool)
+    for row, (result, _) in enumerate(results):
+        for kind, values in JobTrait.for_result(result).items():
+            for value in values:
+                candidates[row, traits.get((kind, value), [])] = True
+    scores[~candidates] = 0
+    recommendations = []
+    for (result, _), columns, row_scores in zip(results, *top_k(scores, limit)):
+        recommendations.extend(
+            UserRecommendation(user_id=result.user_id, job_id=int(ids[column]),
+                               source=UserRecommendation.Source.PROFILE, rank=rank, score=float(score))
+            for rank, (column, score) in enumerate(zip(columns, row_scores)) if score > 0
+        )
+
+    users = [result.user_id for result, _ in results]
+    with transaction.atomic():
+        UserRecommendation.objects.filter(user_id__in=users, source=UserRecommendation.Source.PROFILE).delete()
+        UserRecommendation.objects.bulk_create(recommendations, batch_size=INSERT_BATCH_SIZE)
+        RecommendationInput.objects.bulk_create(
+            [RecommendationInput(user_id=result.user_id, profile_hash=hash, catalog_hash=catalog) for result, hash in results],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['profile_hash', 'catalog_hash'],
+        )
+
+
+def precompute_recommendations(full: bool = False, limit: int = RECOMMENDATIONS) -> tuple[int, int]:
+    """Store the top recommended jobs of every user that completed the questionnaire
+
+    Only users whose latest questionnaire result or profile changed since
+    their last run are scored, unless the job catalog changed, in which case
+    all users are. Users are scored against all open jobs as one sparse
+    matrix product per chunk of users, and their top jobs among those that
+    share a trait with them are stored as :class:`UserRecommendation`, the
+    same jobs the recommendations computed on request are chosen from.
+
+    :param full: Recompute every user, even if nothing changed, defaults to False
+    :param limit: The number of recommendations to store per user, defaults to :data:`RECOMMENDATIONS`
+    :return: The number of users that were recomputed, and the number of users with recommendations
+    """
+    ids, matrix = job_recommender.catalog()
+    catalog = catalog_hash(ids, matrix)
+    inputs = {user_id: (profile, catalog) for user_id, profile, catalog
+              in RecommendationInput.objects.values_list('user_id', 'profile_hash', 'catalog_hash')}
+
+    stale, users = [], set()
+    for result in _latest_results():
+        users.add(result.user_id)
+        hash = profile_hash(result, result.user)
+        if full or inputs.get(result.user_id) != (hash, catalog):
+            stale.append((result, hash))
+
+    # Users whose questionnaire results were all deleted
+    gone = [user_id for user_id in inputs if user_id not in users]
+    if gone:
+        with transaction.atomic():
+            UserRecommendation.objects.filter(user_id__in=gone, source=UserRecommendation.Source.PROFILE).delete()
+            RecommendationInput.objects.filter(user_id__in=gone).delete()
+
+    traits = _trait_columns(ids) if stale else {}
+    for batch in batches(np.arange(len(stale)), len(ids)):
+        _store([stale[row] for row in batch], catalog, ids, matrix, traits, limit)
+    return len(stale), len(users)
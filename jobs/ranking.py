@@ -0,0 +1,50 @@
+from typing import Iterator
+
+import numpy as np
+
+
+__all__ = ('INSERT_BATCH_SIZE', 'MAX_BATCH_SCORES', 'RECOMMENDATIONS', 'batches', 'top_k')
+
+
+# The number of recommendations stored per user, and of "also applied to"
+# jobs stored per job
+RECOMMENDATIONS = 20
+
+# The maximum number of scores computed at once, which bounds the memory used
+# for one batch of rows to about 128 MB
+MAX_BATCH_SCORES = 2 ** 24
+
+# The number of rows written per query
+INSERT_BATCH_SIZE = 1000
+
+
+def batches(rows: np.ndarray, columns: int) -> Iterator[np.ndarray]:
+    """Split rows into batches whose dense scores fit in :data:`MAX_BATCH_SCORES`
+
+    :param rows: The rows to score
+    :param columns: The number of scores per row
+    :return: The consecutive batches of rows
+    """
+    size = max(1, MAX_BATCH_SCORES // max(columns, 1))
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def top_k(scores: np.ndarray, limit: int) -> tuple[np.ndarray, np.ndarray]:
+    """Find the highest scores along the last axis
+
+    This partitions the scores before sorting, so only the best `limit` of
+    every row are sorted.
+
+    :param scores: The dense scores, one row or a matrix of rows
+    :param limit: The maximum number of scores to return per row
+    :return: The columns of the highest scores and the scores themselves, highest first
+    """
+    limit = min(limit, scores.shape[-1])
+    if limit <= 0:
+        empty = np.zeros((*scores.shape[:-1], 0), dtype=np.int64)
+        return empty, empty.astype(scores.dtype)
+    best = np.argpartition(-scores, limit - 1, axis=-1)[..., :limit]
+    best_scores = np.take_along_axis(scores, best, axis=-1)
+    order = np.argsort(-best_scores, axis=-1, kind='stable')
+    return np.take_along_axis(best, order, axis=-1), np.take_along_axis(best_scores, order, axis=-1)
@@ -0,0 +1,204 @@
+from typing import Iterable, Optional
+
+import numpy as np
+from django.utils import timezone
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from core.models import User
+from questionnaire.models import QuestionResult
+
+from .expiry import ExpiryQueue
+from .indexes import JobIndex
+from .models import Job
+from .ranking import top_k
+from .traits import HOLLAND_CODES, MBTI_TYPES, parse_holland, parse_mbti
+
+
+__all__ = ('JobRecommender', 'job_recommender')
+
+
+TRAITS = (*MBTI_TYPES, *HOLLAND_CODES)
+_TRAIT_COLUMN = {trait: column for column, trait in enumerate(TRAITS)}
+
+# The relative importance of the questionnaire traits versus the free text
+TRAIT_WEIGHT = 1.0
+TEXT_WEIGHT = 1.0
+
+# Changed jobs are vectorized with the vocabulary of the last fit. Once more
+# than this fraction of the catalog has changed, the whole model is refit so
+# the vocabulary and document frequencies don't drift too far.
+REFIT_FRACTION = 0.2
+
+
+def _trait_vector(mbti: list[str], holland: list[str]) -> sparse.csr_matrix:
+    columns = [_TRAIT_COLUMN[trait] for trait in (*mbti, *holland)]
+    return sparse.csr_matrix(
+        (np.ones(len(columns)), (np.zeros(len(columns), dtype=int), columns)),
+        shape=(1, len(TRAITS)),
+    )
+
+
+def job_text(job: Job) -> str:
+    return " ".join((job.title, job.keywords, job.job_fields, job.requirements, job.description))
+
+
+def job_traits(job: Job) -> sparse.csr_matrix:
+    return _trait_vector(parse_mbti(job.mbti), parse_holland(job.holland))
+
+
+def profile_text(result: QuestionResult, user: User) -> str:
+    return " ".join((result.category_one, result.category_two, result.category_three, user.skill, user.interest))
+
+
+def profile_traits(result: QuestionResult) -> sparse.csr_matrix:
+    return _trait_vector(parse_mbti(result.MbtiType), parse_holland(f"{result.codeOne} {result.codeTwo}"))
+
+
+class JobRecommender(JobIndex):
+    """Content based job recommender
+
+    Every job is represented by a row of a sparse matrix holding the TF-IDF
+    weights of its text next to its MBTI types and Holland codes. A user is
+    represented the same way from their questionnaire result and profile, so
+    that recommending comes down to one sparse matrix-vector product.
+
+    Only open jobs are recommended. The model is fit and kept up to date as
+    described in :class:`JobIndex`; changed jobs are folded in on next use,
+    and jobs are dropped once their deadline passes.
+    """
+    def _clear(self) -> None:
+        self._vectorizer: Optional[TfidfVectorizer] = None
+        self._matrix = sparse.csr_matrix((0, 0))
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._pending: dict[int, Optional[sparse.csr_matrix]] = {}
+        self._changes = 0
+        self._expiry = ExpiryQueue()
+
+    def _build(self) -> None:
+        self._fit()
+
+    def _vectorize(self, texts: list[str], traits: list[sparse.csr_matrix]) -> sparse.csr_matrix:
+        text = normalize(self._vectorizer.transform(texts)) * TEXT_WEIGHT
+        trait = normalize(sparse.vstack(traits, format='csr')) * TRAIT_WEIGHT
+        return normalize(sparse.hstack((text, trait), format='csr'))
+
+    def _fit(self) -> None:
+        ids, texts, traits = [], [], []
+        self._expiry = ExpiryQueue()
+        jobs = Job.objects.active().only('id', 'title', 'keywords', 'job_fields', 'requirements', 'description', 'mbti', 'holland', 'deadline')
+        for job in jobs.iterator(chunk_size=2000):
+            self._expiry.push(job.id, job.deadline)
+            ids.append(job.id)
+            texts.append(job_text(job))
+            traits.append(job_traits(job))
+
+        try:
+            self._vectorizer = TfidfVectorizer(sublinear_tf=True, stop_words='english', dtype=np.float32).fit(texts)
+        except ValueError:
+            # There is no text to learn a vocabulary from yet
+            self._vectorizer = TfidfVectorizer(vocabulary=['job'], dtype=np.float32).fit(['job'])
+        self._ids = np.array(ids, dtype=np.int64)
+        self._matrix = self._vectorize(texts, traits) if ids else sparse.csr_matrix((0, len(self._vectorizer.vocabulary_) + len(TRAITS)))
+        self._pending = {}
+        self._changes = 0
+
+    def _apply_pending(self) -> None:
+        for job_id in self._expiry.pop_expired(timezone.localdate()):
+            self._pending[job_id] = None
+            self._changes += 1
+        if self._changes > REFIT_FRACTION * max(len(self._ids), 1):
+            self._fit()
+            return
+        if not self._pending:
+            return
+        keep = ~np.isin(self._ids, np.fromiter(self._pending, dtype=np.int64))
+        added = [(id, row) for id, row in self._pending.items() if row is not None]
+        self._ids = np.concatenate((self._ids[keep], np.array([id for id, _ in added], dtype=np.int64)))
+        self._matrix = sparse.vstack((self._matrix[keep], *(row for _, row in added)), format='csr')
+        self._pending = {}
+
+    def ensure_fitted(self) -> None:
+        """Fit the model, or refit it if the jobs changed elsewhere, and fold in any changed jobs"""
+        with self._lock:
+            self.ensure_built()
+            self._apply_pending()
+
+    def catalog(self) -> tuple[np.ndarray, sparse.csr_matrix]:
+        """Get the vectors of all open jobs
+
+        :return: The IDs of the jobs, and a matrix with the normalized vector of each job as its row
+        """
+        with self._lock:
+            self.ensure_fitted()
+            return self._ids, self._matrix
+
+    def profile_vectors(self, profiles: list[tuple[QuestionResult, User]]) -> sparse.csr_matrix:
+        """Vectorize users the same way as jobs
+
+        :param profiles: Pairs of the questionnaire result of a user and the user
+        :return: A matrix with the normalized vector of each user as its row
+        """
+        with self._lock:
+            self.ensure_fitted()
+            return self._vectorize([profile_text(result, user) for result, user in profiles],
+                                   [profile_traits(result) for result, _ in profiles])
+
+    def update(self, job: Job) -> None:
+        """Queue a created or changed job to be folded into the model
+
+        :param job: The job that was saved
+        """
+        with self._lock:
+            if not self.built:
+                return
+            if job.is_active:
+                self._pending[job.id] = self._vectorize([job_text(job)], [job_traits(job)])
+                self._expiry.push(job.id, job.deadline_date)
+            else:
+                self._pending[job.id] = None
+                self._expiry.discard(job.id)
+            self._changes += 1
+
+    def remove(self, job_id: int) -> None:
+        """Queue a deleted job to be removed from the model
+
+        :param job_id: The ID of the deleted job
+        """
+        with self._lock:
+            if self.built:
+                self._pending[job_id] = None
+                self._expiry.discard(job_id)
+                self._changes += 1
+
+    def recommend(
+            self,
+            result: QuestionResult,
+            user: User,
+            limit: int = 20,
+            candidates: Optional[Iterable[int]] = None) -> list[tuple[int, float]]:
+        """Score jobs against a user's questionnaire result and profile
+
+        :param result: The questionnaire result of the user
+        :param user: The user to recommend jobs for
+        :param limit: The maximum number of jobs to return, defaults to 20
+        :param candidates: Only score the jobs with these IDs, defaults to all jobs
+        :return: Pairs of job IDs and cosine similarities, best match first
+        """
+        with self._lock:
+            self.ensure_fitted()
+            matrix, ids = self._matrix, self._ids
+            if candidates is not None:
+                rows = np.flatnonzero(np.isin(ids, np.fromiter(candidates, dtype=np.int64)))
+                matrix, ids = matrix[rows], ids[rows]
+            if not len(ids):
+                return []
+            query = self._vectorize([profile_text(result, user)], [profile_traits(result)])
+            scores = (matrix @ query.T).toarray().ravel()
+
+        best, best_scores = top_k(scores, limit)
+        return [(int(ids[i]), float(score)) for i, score in zip(best, best_scores) if score > 0]
+
+
+job_recommender = JobRecommender()
@@ -0,0 +1,137 @@
+import re
+from typing import NamedTuple, Optional
+
+
+__all__ = ('MAX_SALARY', 'PERIODS_PER_YEAR', 'SalaryRange', 'parse_salary', 'salary_overlaps')
+
+
+# How often a salary stated per period is paid in a year, assuming full time
+PERIODS_PER_YEAR = {
+    'hour': 2080,
+    'day': 260,
+    'week': 52,
+    'month': 12,
+    'year': 1,
+}
+
+CURRENCIES = {
+    '€': 'EUR',
+    'eur': 'EUR',
+    'euro': 'EUR',
+    'euros': 'EUR',
+    '$': 'USD',
+    'usd': 'USD',
+    'dollar': 'USD',
+    'dollars': 'USD',
+    '£': 'GBP',
+    'gbp': 'GBP',
+    'pound': 'GBP',
+    'pounds': 'GBP',
+}
+
+PERIOD_WORDS = {
+    'hour': 'hour', 'hours': 'hour', 'hourly': 'hour', 'hr': 'hour', 'h': 'hour', 'uur': 'hour',
+    'day': 'day', 'daily': 'day', 'dag': 'day',
+    'week': 'week', 'weekly': 'week', 'wk': 'week',
+    'month': 'month', 'monthly': 'month', 'mo': 'month', 'maand': 'month', 'pm': 'month',
+    'year': 'year', 'yearly': 'year', 'annual': 'year', 'annually': 'year', 'yr': 'year', 'jaar': 'year', 'pa': 'year',
+}
+
+# Yearly amounts above this are taken to be parsing mistakes, such as a phone
+# number or an hourly rate that was really per month; it is well below the
+# largest value the salary columns can hold
+MAX_SALARY = 10_000_000
+
+_AMOUNT = re.compile(r"(\d+(?:[.,]\d+)*)\s*([km])?(?![a-z])", re.IGNORECASE)
+_RANGE = re.compile(r"^\s*\S*?\s*(?:-|–|—|to|tot)\s*\S*?\s*$", re.IGNORECASE)
+_WORD = re.compile(r"[a-z]+|[€$£]", re.IGNORECASE)
+_MINIMUM = {'from', 'vanaf', 'min', 'minimum', 'least'}
+_MAXIMUM = {'up', 'max', 'maximum', 'maximaal', 'tot'}
+
+
+class SalaryRange(NamedTuple):
+    """A salary, as whole amounts per year"""
+    minimum: Optional[int]
+    maximum: Optional[int]
+    currency: str
+    period: str
+
+
+def _number(text: str) -> float:
+    groups = re.split(r"[.,]", text)
+    if len(groups) == 1:
+        return float(text)
+    # "3.500" and "1,250,000" use thousands separators, "3.5" and "2.500,50" end in decimals
+    if all(len(group) == 3 for group in groups[1:]):
+        return float("".join(groups))
+    return float("".join(groups[:-1]) + "." + groups[-1])
+
+
+def parse_salary(text: str) -> SalaryRange:
+    """Parse a free text salary into a numeric range
+
+    Understands single amounts and ranges, thousands separators in both
+    English and Dutch style, "k" and "m" suffixes, currency symbols and codes,
+    and periods such as "per month", "/hr" or "per jaar". Amounts are
+    converted to whole amounts per year, so salaries stated per different
+    periods can be compared. Without a period, amounts below 1000 are taken
+    to be hourly, and others monthly or yearly depending on their size.
+    Salaries of more than :data:`MAX_SALARY` a year are not believed.
+
+    :param text: Free text, such as "€3.000 - €3.500 per month" or "$50-70k"
+    :return: The range, with `None` for the ends that are not stated, or for both if the salary is implausible
+    """
+    amounts = []
+    for match in _AMOUNT.finditer(text):
+        value = _number(match[1])
+        suffix = (match[2] or "").lower()
+        amounts.append((match, value, suffix))
+    if not amounts:
+        return SalaryRange(None, None, "", "")
+
+    words = [word.lower() for word in _WORD.findall(text)]
+    currency = next((CURRENCIES[word] for word in words if word in CURRENCIES), "")
+    period = next((PERIOD_WORDS[word] for word in words if word in PERIOD_WORDS), "")
+
+    first = amounts[0]
+    second = None
+    if len(amounts) > 1 and _RANGE.match(text[first[0].end():amounts[1][0].start()]):
+        second = amounts[1]
+
+    def scaled(value: float, suffix: str) -> float:
+        return value * {'k': 1000, 'm': 1000000}.get(suffix, 1)
+
+    low = scaled(first[1], first[2] or (second[2] if second and first[1] < second[1] else ""))
+    high = scaled(second[1], second[2]) if second else low
+
+    if not period:
+        period = 'hour' if high < 1000 else 'month' if high < 20000 else 'year'
+    factor = PERIODS_PER_YEAR[period]
+    minimum, maximum = round(min(low, high) * factor), round(max(low, high) * factor)
+    if maximum > MAX_SALARY:
+        return SalaryRange(None, None, "", "")
+
+    if second is None:
+        before = set(_WORD.findall(text[:first[0].start()].lower()))
+        if before & _MINIMUM:
+            maximum = None
+        elif before & _MAXIMUM:
+            minimum = None
+    return SalaryRange(minimum, maximum, currency, period)
+
+
+def salary_overlaps(salary: SalaryRange, minimum: Optional[int] = None, maximum: Optional[int] = None) -> bool:
+    """Check whether a salary overlaps a range, like :meth:`jobs.models.JobQuerySet.salary_between`
+
+    :param salary: The salary of a job
+    :param minimum: The lowest acceptable yearly salary, defaults to no minimum
+    :param maximum: The highest acceptable yearly salary, defaults to no maximum
+    :return: Whether the job matches
+    """
+    if salary.minimum is None and salary.maximum is None:
+        return minimum is None and maximum is None
+    if minimum is not None and salary.maximum is not None and salary.maximum < minimum:
+        return False
+    if maximum is not None and salary.minimum is not None and salary.minimum > maximum:
+        return False
+    return True
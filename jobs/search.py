@@ -0,0 +1,347 @@
+import datetime
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from typing import Iterable, NamedTuple, Optional
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from core.models import Company
+
+from .expiry import ExpiryQueue
+from .indexes import JobIndex
+from .models import Job
+from .salary import SalaryRange, salary_overlaps
+from .traits import parse_job_fields
+
+
+__all__ = ('JobFacets', 'JobSearchIndex', 'RankedJobs', 'job_index', 'tokenize')
+
+
+_TOKEN = re.compile(r"\w+")
+
+# How often the tokens of each part of a job count towards its term frequency
+FIELD_WEIGHTS = (
+    ('title', 3),
+    ('keywords', 2),
+    ('company', 2),
+    ('description', 1),
+)
+
+# The deadline facet groups jobs by the number of days until their deadline
+DEADLINE_BUCKETS = (
+    ('this_week', 7),
+    ('this_month', 31),
+    ('later', None),
+)
+
+# The last word of a query is treated as a prefix; this caps how many terms it
+# may expand to, so a single letter doesn't turn into a scan of the vocabulary
+MAX_PREFIX_EXPANSION = 50
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a text into lowercase word tokens
+
+    :param text: The text to tokenize
+    :return: The tokens, in order of appearance
+    """
+    return _TOKEN.findall(text.lower())
+
+
+def job_terms(job: Job, company_name: str) -> Counter:
+    """Count the weighted terms of a job
+
+    :param job: The job to get the terms for
+    :param company_name: The name of the company of the job
+    :return: The weighted term frequencies
+    """
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        text = company_name if field == 'company' else getattr(job, field)
+        for token in tokenize(text or ""):
+            terms[token] += weight
+    return terms
+
+
+class JobFacets(NamedTuple):
+    """The values of a job that search results can be counted by"""
+    company: int
+    location: str
+    job_fields: tuple[str, ...]
+    deadline: datetime.date
+
+
+def deadline_bucket(deadline: datetime.date, today: datetime.date) -> str:
+    """Get the deadline facet value of a job
+
+    :param deadline: The deadline of the job
+    :param today: The current date
+    :return: The name of the bucket from :data:`DEADLINE_BUCKETS`
+    """
+    days = (deadline - today).days
+    for bucket, until in DEADLINE_BUCKETS:
+        if until is None or days <= until:
+            return bucket
+
+
+class JobSearchIndex(JobIndex):
+    """Inverted index over the searchable text of all jobs, ranked with BM25
+
+    Next to the text, the index holds the facets of every job (company,
+    location, fields and deadline) and running totals of them, so facet counts
+    never need a query. Only open jobs are indexed; jobs are dropped as soon
+    as their deadline has passed.
+
+    The index is built and kept up to date as described in :class:`JobIndex`.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def _clear(self) -> None:
+        self._postings: dict[str, dict[int, int]] = defaultdict(dict)
+        self._terms: list[str] = []
+        self._doc_terms: dict[int, Counter] = {}
+        self._doc_length: dict[int, int] = {}
+        self._doc_facets: dict[int, JobFacets] = {}
+        self._doc_salary: dict[int, SalaryRange] = {}
+        self._company_names: dict[int, str] = {}
+        self._locations: dict[str, str] = {}
+        self._facet_totals: dict[str, Counter] = {field: Counter() for field in JobFacets._fields}
+        self._total_length = 0
+        self._expiry = ExpiryQueue()
+
+    def _build(self) -> None:
+        for company in Company.objects.only('id', 'name').iterator():
+            self._company_names[company.id] = company.name
+        for job in Job.objects.active().select_related('company').iterator(chunk_size=2000):
+            self._add(job)
+
+    def _add(self, job: Job) -> None:
+        self._remove(job.id)
+        if not job.is_active:
+            return
+        terms = job_terms(job, job.company.name)
+        for term, frequency in terms.items():
+            postings = self._postings[term]
+            if not postings:
+                insort(self._terms, term)
+            postings[job.id] = frequency
+        length = sum(terms.values())
+        self._doc_terms[job.id] = terms
+        self._doc_length[job.id] = length
+        self._company_names[job.company_id] = job.company.name
+        self._total_length += length
+
+        location = " ".join(job.location.split())
+        self._locations.setdefault(location.lower(), location)
+        facets = JobFacets(
+            company=job.company_id,
+            location=location.lower(),
+            job_fields=tuple(parse_job_fields(job.job_fields)),
+            deadline=job.deadline_date,
+        )
+        self._doc_facets[job.id] = facets
+        self._count_facets(facets, 1)
+        self._doc_salary[job.id] = SalaryRange(job.salary_min, job.salary_max, job.salary_currency, job.salary_period)
+        self._expiry.push(job.id, facets.deadline)
+
+    def _count_facets(self, facets: JobFacets, delta: int, totals: Optional[dict[str, Counter]] = None) -> None:
+        totals = self._facet_totals if totals is None else totals
+        for facet, values in zip(JobFacets._fields, facets):
+            counter = totals[facet]
+            for value in values if facet == 'job_fields' else (values,):
+                counter[value] += delta
+                if not counter[value]:
+                    del counter[value]
+
+    def _remove(self, job_id: int) -> None:
+        self._expiry.discard(job_id)
+        terms = self._doc_terms.pop(job_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(job_id, None)
+            if not postings:
+                del self._postings[term]
+                position = bisect_left(self._terms, term)
+                if position < len(self._terms) and self._terms[position] == term:
+                    del self._terms[position]
+        self._total_length -= self._doc_length.pop(job_id)
+        self._count_facets(self._doc_facets.pop(job_id), -1)
+        del self._doc_salary[job_id]
+
+    def _expire(self) -> None:
+        for job_id in self._expiry.pop_expired(timezone.localdate()):
+            self._remove(job_id)
+
+    def add(self, job: Job) -> None:
+        """Add a job to the index, or refresh it if it is already in there
+
+        :param job: The job to index, with its company loaded
+        """
+        with self._lock:
+            if self.built:
+                self._add(job)
+
+    def remove(self, job_id: int) -> None:
+        """Remove a job from the index
+
+        :param job_id: The ID of the job to remove
+        """
+        with self._lock:
+            if self.built:
+                self._remove(job_id)
+
+    def update_company(self, company: Company) -> None:
+        """Refresh all jobs of a company, after the company itself changed
+
+        :param company: The changed company
+        """
+        with self._lock:
+            if not self.built:
+                return
+            self._company_names[company.id] = company.name
+            for job in Job.objects.active().filter(company=company).select_related('company').iterator():
+                self._add(job)
+
+    def remove_company(self, company_id: int) -> None:
+        """Forget about a deleted company
+
+        :param company_id: The ID of the deleted company
+        """
+        with self._lock:
+            self._company_names.pop(company_id, None)
+
+    def _expand(self, prefix: str) -> Iterable[str]:
+        position = bisect_left(self._terms, prefix)
+        end = min(position + MAX_PREFIX_EXPANSION, len(self._terms))
+        while position < end and self._terms[position].startswith(prefix):
+            yield self._terms[position]
+            position += 1
+
+    def _companies_matching(self, company: str) -> set[int]:
+        company = company.lower()
+        return {id for id, name in self._company_names.items() if company in name.lower()}
+
+    def search(
+            self,
+            query: str,
+            company: str = "",
+            min_salary: Optional[int] = None,
+            max_salary: Optional[int] = None) -> list[int]:
+        """Find jobs matching a query, best match first
+
+        :param query: The search string; the last word may be incomplete
+        :param company: Only return jobs of companies whose name contains this, defaults to ""
+        :param min_salary: Only return jobs whose yearly salary can be at least this, defaults to no minimum
+        :param max_salary: Only return jobs whose yearly salary can be at most this, defaults to no maximum
+        :return: The IDs of the matching jobs, ordered by relevance
+        """
+        self.ensure_built()
+        tokens = tokenize(query)
+        with self._lock:
+            self._expire()
+            companies = self._companies_matching(company) if company else None
+
+            if not tokens:
+                return sorted(
+                    id for id, facets in self._doc_facets.items()
+                    if (companies is None or facets.company in companies)
+                    and salary_overlaps(self._doc_salary[id], min_salary, max_salary)
+                )
+
+            *complete, partial = tokens
+            terms = {*complete, *self._expand(partial)}
+            documents = len(self._doc_length)
+            average_length = self._total_length / documents if documents else 0.0
+            scores: dict[int, float] = defaultdict(float)
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+                for job_id, frequency in postings.items():
+                    if companies is not None and self._doc_facets[job_id].company not in companies:
+                        continue
+                    if not salary_overlaps(self._doc_salary[job_id], min_salary, max_salary):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_length[job_id] / average_length)
+                    scores[job_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return sorted(scores, key=lambda job_id: (-scores[job_id], job_id))
+
+    def sort_by_salary(self, ids: Iterable[int], descending: bool = False) -> list[int]:
+        """Order jobs like :meth:`jobs.models.JobQuerySet.order_by_salary`
+
+        :param ids: The IDs of the jobs to order
+        :param descending: Order by the upper end of the salary, highest first, defaults to False
+        :return: The IDs of the jobs that state that end of their salary, in order
+        """
+        with self._lock:
+            if descending:
+                salaries = {id: self._doc_salary[id].maximum for id in ids if id in self._doc_salary}
+                return sorted((id for id, salary in salaries.items() if salary is not None),
+                              key=lambda id: (-salaries[id], -id))
+            salaries = {id: self._doc_salary[id].minimum for id in ids if id in self._doc_salary}
+            return sorted((id for id, salary in salaries.items() if salary is not None),
+                          key=lambda id: (salaries[id], id))
+
+    def facets(self, ids: Optional[Iterable[int]] = None, limit: int = 20) -> dict[str, list[tuple[str, int]]]:
+        """Count the jobs per company, location, field and deadline
+
+        :param ids: The jobs to count, such as a search result, defaults to all jobs
+        :param limit: The maximum number of values per facet, defaults to 20
+        :return: Per facet, the most common values with their number of jobs
+        """
+        self.ensure_built()
+        with self._lock:
+            self._expire()
+            if ids is None:
+                totals = self._facet_totals
+            else:
+                totals = {field: Counter() for field in JobFacets._fields}
+                for id in ids:
+                    if id in self._doc_facets:
+                        self._count_facets(self._doc_facets[id], 1, totals)
+
+            today = timezone.localdate()
+            deadlines = Counter()
+            for deadline, count in totals['deadline'].items():
+                deadlines[deadline_bucket(deadline, today)] += count
+
+            return {
+                'company': [(self._company_names.get(id, ""), count) for id, count in totals['company'].most_common(limit)],
+                'location': [(self._locations[location], count) for location, count in totals['location'].most_common(limit)],
+                'job_fields': totals['job_fields'].most_common(limit),
+                'deadline': [(bucket, deadlines[bucket]) for bucket, _ in DEADLINE_BUCKETS if deadlines[bucket]],
+            }
+
+
+class RankedJobs(Sequence):
+    """A lazily loaded list of jobs in a given order
+
+    Only the slices that are actually accessed, such as the current page, are
+    fetched from the database.
+    """
+    def __init__(self, ids: list[int], queryset: Optional[QuerySet] = None) -> None:
+        self._ids = ids
+        self._queryset = queryset if queryset is not None else Job.objects.select_related('company')
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            ids = self._ids[item]
+            jobs = self._queryset.in_bulk(ids)
+            return [jobs[id] for id in ids if id in jobs]
+        return self[item:item + 1 or None][0]
+
+
+job_index = JobSearchIndex()
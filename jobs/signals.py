@@ -0,0 +1,128 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from careernavigator.util.cache import bump_version, table_version
+from core.models import Company, User
+from questionnaire.models import QuestionResult
+
+from .models import Job, JobNeighbor, JobTrait, PendingNeighborUpdate, RecommendationInput, UserRecommendation
+from .recommend import job_recommender
+from .search import job_index
+from .suggest import job_suggestions
+
+
+# Sent by jobs.bulk.create_jobs with the created jobs as `instances`, since
+# bulk_create doesn't send post_save
+jobs_created = Signal()
+
+
+@receiver(post_save, sender=Job)
+def index_job(sender, instance: Job, raw: bool = False, **kwargs):
+    if not raw:
+        job_index.add(instance)
+        job_suggestions.add(instance)
+        job_recommender.update(instance)
+
+
+@receiver(post_save, sender=Job)
+def sync_job_traits(sender, instance: Job, raw: bool = False, created: bool = False, **kwargs):
+    if raw:
+        return
+    if not created:
+        JobTrait.objects.filter(job=instance).delete()
+    JobTrait.objects.bulk_create(JobTrait.for_job(instance))
+
+
+@receiver(jobs_created)
+def index_created_jobs(sender, instances: list[Job], **kwargs):
+    JobTrait.objects.bulk_create([trait for job in instances for trait in JobTrait.for_job(job)])
+    for job in instances:
+        job_index.add(job)
+        job_suggestions.add(job)
+        job_recommender.update(job)
+
+
+@receiver(post_save, sender=Job)
+def queue_neighbor_update(sender, instance: Job, raw: bool = False, **kwargs):
+    if not raw:
+        PendingNeighborUpdate.objects.get_or_create(job=instance)
+
+
+@receiver(jobs_created)
+def queue_created_neighbor_updates(sender, instances: list[Job], **kwargs):
+    PendingNeighborUpdate.objects.bulk_create([PendingNeighborUpdate(job=job) for job in instances], ignore_conflicts=True)
+
+
+@receiver(pre_delete, sender=Job)
+def queue_listing_neighbor_updates(sender, instance: Job, **kwargs):
+    # The neighbors pointing to this job are deleted with it, so the jobs that
+    # listed it have to get a replacement
+    listing = JobNeighbor.objects.filter(neighbor=instance, kind=JobNeighbor.Kind.SIMILAR).exclude(job=instance).values_list('job_id', flat=True)
+    PendingNeighborUpdate.objects.bulk_create([PendingNeighborUpdate(job_id=id) for id in listing], ignore_conflicts=True)
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance: Job, **kwargs):
+    job_index.remove(instance.id)
+    job_suggestions.remove(instance.id)
+    job_recommender.remove(instance.id)
+
+
+def _drop_profile_recommendations(user_id: int) -> None:
+    # Until the next batch run, the recommendations are computed on request
+    UserRecommendation.objects.filter(user_id=user_id, source=UserRecommendation.Source.PROFILE).delete()
+    RecommendationInput.objects.filter(user_id=user_id).delete()
+
+
+@receiver(post_save, sender=QuestionResult)
+@receiver(post_delete, sender=QuestionResult)
+def drop_result_recommendations(sender, instance: QuestionResult, raw: bool = False, **kwargs):
+    if not raw:
+        _drop_profile_recommendations(instance.user_id)
+
+
+# The fields of a user that their recommendations are computed from
+PROFILE_FIELDS = ('skill', 'interest')
+
+
+@receiver(pre_save, sender=User)
+def check_profile_changed(sender, instance: User, raw: bool = False, update_fields=None, **kwargs):
+    instance._profile_changed = False
+    if raw or instance.pk is None or (update_fields is not None and not set(PROFILE_FIELDS) & set(update_fields)):
+        return
+    stored = User.objects.filter(pk=instance.pk).values(*PROFILE_FIELDS).first()
+    instance._profile_changed = stored is not None and any(stored[field] != getattr(instance, field) for field in PROFILE_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def drop_profile_recommendations(sender, instance: User, raw: bool = False, created: bool = False, **kwargs):
+    if not raw and not created and getattr(instance, '_profile_changed', False):
+        _drop_profile_recommendations(instance.id)
+
+
+@receiver(post_save, sender=Company)
+def index_company(sender, instance: Company, raw: bool = False, **kwargs):
+    if not raw:
+        job_index.update_company(instance)
+        job_suggestions.update_company(instance)
+
+
+@receiver(post_delete, sender=Company)
+def unindex_company(sender, instance: Company, **kwargs):
+    job_index.remove_company(instance.id)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(jobs_created)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def bump_job_versions(sender, **kwargs):
+    # The in-memory indexes were updated by the handlers above, so they can
+    # keep the new version; if another process wrote in between, their
+    # version differs from the previous one and they are rebuilt
+    previous = table_version(Job, Company)
+    bump_version(Job, Company)
+    current = table_version(Job, Company)
+    for index in (job_index, job_suggestions, job_recommender):
+        index.follow_version(previous, current)
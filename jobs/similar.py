@@ -0,0 +1,116 @@
+from typing import Iterable, Iterator
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Min, Q, QuerySet
+from scipy import sparse
+
+from careernavigator.util.cache import bump_version
+
+from .models import Job, JobNeighbor, PendingNeighborUpdate
+from .ranking import batches, top_k
+from .recommend import job_recommender
+
+
+__all__ = ('NEIGHBORS', 'update_neighbors')
+
+
+# The number of similar jobs that is stored per job
+NEIGHBORS = 10
+
+# The number of rows that is written or deleted per query
+CHUNK_SIZE = 500
+
+
+def _similar() -> QuerySet:
+    return JobNeighbor.objects.filter(kind=JobNeighbor.Kind.SIMILAR)
+
+
+def _chunks(values: list) -> Iterator[list]:
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def top_neighbors(matrix: sparse.csr_matrix, rows: np.ndarray, limit: int) -> Iterator[tuple[int, list[tuple[int, float]]]]:
+    """Find the most similar rows of a matrix for some of its rows
+
+    :param matrix: The normalized vectors, one per row
+    :param rows: The rows to find the neighbors of
+    :param limit: The maximum number of neighbors per row
+    :return: Per row, its neighbors as pairs of row and cosine similarity, most similar first
+    """
+    limit = min(limit, matrix.shape[0] - 1)
+    for batch in batches(rows, matrix.shape[0]):
+        scores = (matrix[batch] @ matrix.T).toarray()
+        scores[np.arange(len(batch)), batch] = 0
+        for row, neighbors, neighbor_scores in zip(batch, *top_k(scores, limit)):
+            yield row, [(int(neighbor), float(score)) for neighbor, score in zip(neighbors, neighbor_scores) if score > 0]
+
+
+def _affected_rows(ids: np.ndarray, matrix: sparse.csr_matrix, changed: Iterable[int], limit: int) -> set[int]:
+    position = {int(id): row for row, id in enumerate(ids)}
+    changed_rows = np.array(sorted(position[id] for id in changed if id in position), dtype=np.int64)
+    affected = {int(row) for row in changed_rows}
+
+    # Jobs that list a changed or closed job as one of their neighbors
+    listing = JobNeighbor.objects\
+        .filter(kind=JobNeighbor.Kind.SIMILAR)\
+        .filter(Q(neighbor__in=PendingNeighborUpdate.objects.values('job_id')) | ~Q(neighbor__in=Job.objects.active()))\
+        .values_list('job_id', flat=True)
+    affected.update(position[id] for id in listing if id in position)
+
+    # Jobs that a changed job is now more similar to than their last neighbor
+    if len(changed_rows):
+        threshold = np.zeros(len(ids))
+        for job_id, count, lowest in _similar().values('job_id').annotate(count=Count('id'), lowest=Min('score'))\
+                .values_list('job_id', 'count', 'lowest'):
+            if job_id in position and count >= limit:
+                threshold[position[job_id]] = lowest
+        for batch in batches(changed_rows, len(ids)):
+            scores = (matrix[batch] @ matrix.T).max(axis=0).toarray().ravel()
+            affected.update(int(row) for row in np.flatnonzero(scores > threshold))
+    return affected
+
+
+def update_neighbors(full: bool = False, limit: int = NEIGHBORS) -> int:
+    """Recompute the stored neighbors of the jobs that are affected by changes
+
+    Changed jobs are recorded as :class:`PendingNeighborUpdate` by the signal
+    handlers in :mod:`jobs.signals`. Besides those jobs, this recomputes the
+    jobs that list a changed or closed job as neighbor, and the jobs that a
+    changed job now belongs among the neighbors of. All similarities are
+    computed in batches of sparse matrix products.
+
+    :param full: Recompute the neighbors of all jobs, defaults to False
+    :param limit: The number of neighbors to store per job, defaults to :data:`NEIGHBORS`
+    :return: The number of jobs whose neighbors were recomputed
+    """
+    ids, matrix = job_recommender.catalog()
+
+    with transaction.atomic():
+        changed = list(PendingNeighborUpdate.objects.values_list('job_id', flat=True))
+        if full:
+            rows = np.arange(len(ids))
+            _similar().delete()
+        else:
+            rows = np.array(sorted(_affected_rows(ids, matrix, changed, limit)), dtype=np.int64)
+            for chunk in _chunks(ids[rows].tolist()):
+                _similar().filter(job_id__in=chunk).delete()
+            _similar().exclude(job__in=Job.objects.active()).delete()
+
+        neighbors = []
+        for row, similar in top_neighbors(matrix, rows, limit):
+            neighbors.extend(
+                JobNeighbor(job_id=int(ids[row]), neighbor_id=int(ids[neighbor]), kind=JobNeighbor.Kind.SIMILAR, rank=rank, score=score)
+                for rank, (neighbor, score) in enumerate(similar)
+            )
+            if len(neighbors) >= CHUNK_SIZE:
+                JobNeighbor.objects.bulk_create(neighbors)
+                neighbors = []
+        JobNeighbor.objects.bulk_create(neighbors)
+
+        for chunk in _chunks(changed):
+            PendingNeighborUpdate.objects.filter(job_id__in=chunk).delete()
+
+    bump_version(JobNeighbor)
+    return len(rows)
@@ -0,0 +1,203 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Optional
+
+from django.utils import timezone
+
+from core.models import Company
+
+from .expiry import ExpiryQueue
+from .indexes import JobIndex
+from .models import Job
+
+
+__all__ = ('SuggestionIndex', 'job_suggestions')
+
+
+_KEYWORD_SEPARATOR = re.compile(r"[,;\n]")
+
+# Separates the lookup key from the phrase it belongs to in the sorted entries
+_SEPARATOR = "\x00"
+
+# The number of distinct prefixes whose suggestions are remembered
+MAX_CACHED_QUERIES = 10000
+
+# The number of suggestions remembered per prefix; the route never asks for more
+CACHED_SUGGESTIONS = 50
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def job_phrases(job: Job, company_name: str) -> list[str]:
+    """Get the phrases a job contributes to the suggestions
+
+    :param job: The job
+    :param company_name: The name of the company of the job
+    :return: The title, the separate keywords and the company name of the job
+    """
+    phrases = [job.title, company_name, *_KEYWORD_SEPARATOR.split(job.keywords)]
+    return list(dict.fromkeys(phrase.strip() for phrase in phrases if phrase.strip()))
+
+
+class SuggestionIndex(JobIndex):
+    """Prefix index over job titles, keywords and company names
+
+    Every phrase is stored under its own text and under every word suffix of
+    it, so "dev" completes to "Python developer". The entries are kept in a
+    sorted list, so all completions of a prefix are found with a binary search.
+    Phrases are weighted by the number of open jobs that use them. The best
+    phrases of every prefix asked for are remembered, and kept in order as
+    jobs change, so only changes to the phrases a prefix matches cost it a
+    new lookup.
+
+    The index is built and kept up to date as described in :class:`JobIndex`.
+    """
+    def _clear(self) -> None:
+        self._entries: list[str] = []
+        self._references: Counter = Counter()
+        self._weights: Counter = Counter()
+        self._display: dict[str, str] = {}
+        self._job_phrases: dict[int, list[str]] = {}
+        # Per prefix, its best phrases, and whether those are all phrases matching it
+        self._cache: dict[str, tuple[list[str], bool]] = {}
+        self._expiry = ExpiryQueue()
+
+    def _build(self) -> None:
+        jobs = Job.objects.active().select_related('company').only('id', 'title', 'keywords', 'deadline', 'archived', 'company__name')
+        for job in jobs.iterator(chunk_size=2000):
+            self._add(job)
+
+    def _entries_for(self, phrase: str) -> list[str]:
+        words = phrase.split(" ")
+        return [" ".join(words[i:]) + _SEPARATOR + phrase for i in range(len(words))]
+
+    def _add(self, job: Job) -> None:
+        self._remove(job.id)
+        if not job.is_active:
+            return
+        keys = {}
+        for phrase in job_phrases(job, job.company.name):
+            keys.setdefault(normalize(phrase), phrase)
+        for key, phrase in keys.items():
+            self._display.setdefault(key, phrase)
+            self._weights[key] += 1
+            for entry in self._entries_for(key):
+                if not self._references[entry]:
+                    insort(self._entries, entry)
+                self._references[entry] += 1
+            self._rerank(key, grew=True)
+        self._job_phrases[job.id] = list(keys)
+        self._expiry.push(job.id, job.deadline_date)
+
+    def _remove(self, job_id: int) -> None:
+        self._expiry.discard(job_id)
+        phrases = self._job_phrases.pop(job_id, None)
+        if phrases is None:
+            return
+        for key in phrases:
+            self._weights[key] -= 1
+            if not self._weights[key]:
+                del self._weights[key]
+                del self._display[key]
+            for entry in self._entries_for(key):
+                self._references[entry] -= 1
+                if not self._references[entry]:
+                    del self._references[entry]
+                    del self._entries[bisect_left(self._entries, entry)]
+            self._rerank(key, grew=False)
+
+    def _rank(self, key: str) -> tuple[int, str]:
+        return -self._weights[key], key
+
+    def _rerank(self, key: str, grew: bool) -> None:
+        # Update the remembered suggestions of the prefixes a phrase matches,
+        # after its weight changed, instead of forgetting all of them
+        prefixes = {suffix[:end] for suffix in (entry.partition(_SEPARATOR)[0] for entry in self._entries_for(key))
+                    for end in range(1, len(suffix) + 1)}
+        for prefix in prefixes:
+            cached = self._cache.get(prefix)
+            if cached is None:
+                continue
+            best, complete = cached
+            remembered = key in best
+            if remembered:
+                if not complete and not grew:
+                    # A phrase that isn't remembered may now rank higher
+                    del self._cache[prefix]
+                    continue
+                best.remove(key)
+            if key in self._weights and (complete or remembered or self._rank(key) < self._rank(best[-1])):
+                insort(best, key, key=self._rank)
+                if len(best) > CACHED_SUGGESTIONS:
+                    best.pop()
+                    complete = False
+            self._cache[prefix] = (best, complete)
+
+    def add(self, job: Job) -> None:
+        """Add a job to the index, or refresh it if it is already in there
+
+        :param job: The job to index, with its company loaded
+        """
+        with self._lock:
+            if self.built:
+                self._add(job)
+
+    def remove(self, job_id: int) -> None:
+        """Remove a job from the index
+
+        :param job_id: The ID of the job to remove
+        """
+        with self._lock:
+            if self.built:
+                self._remove(job_id)
+
+    def update_company(self, company: Company) -> None:
+        """Refresh all jobs of a company, after the company itself changed
+
+        :param company: The changed company
+        """
+        with self._lock:
+            if not self.built:
+                return
+            for job in Job.objects.active().filter(company=company).select_related('company').iterator():
+                self._add(job)
+
+    def suggest(self, prefix: str, limit: int = 10, version: Optional[str] = None) -> list[tuple[str, int]]:
+        """Complete a prefix to the most popular phrases
+
+        :param prefix: What the user has typed so far
+        :param limit: The maximum number of suggestions, defaults to 10
+        :param version: The current version of the jobs, defaults to reading it from the cache
+        :return: Pairs of phrases and the number of jobs that use them, most popular first
+        """
+        self.ensure_built(version)
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            for job_id in self._expiry.pop_expired(timezone.localdate()):
+                self._remove(job_id)
+
+            cached = self._cache.get(prefix)
+            if cached is None or limit > CACHED_SUGGESTIONS:
+                matches = set()
+                position = bisect_left(self._entries, prefix)
+                while position < len(self._entries) and self._entries[position].startswith(prefix):
+                    matches.add(self._entries[position].partition(_SEPARATOR)[2])
+                    position += 1
+
+                best = heapq.nsmallest(max(limit, CACHED_SUGGESTIONS), matches, key=self._rank)
+                cached = (best, len(best) == len(matches))
+                if limit <= CACHED_SUGGESTIONS:
+                    if len(self._cache) >= MAX_CACHED_QUERIES:
+                        self._cache.clear()
+                    self._cache[prefix] = cached
+            return [(self._display[phrase], self._weights[phrase]) for phrase in cached[0][:limit]]
+
+
+job_suggestions = SuggestionIndex()
@@ -0,0 +1,889 @@
+import atexit
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from ninja_jwt.tokens import RefreshToken
+
+from careernavigator.util.cache import bump_version, table_version
+from careernavigator.util.test import seed_database
+from core.models import Company, User
+from questionnaire.models import QuestionResult
+
+from .counters import JobCounters, job_counters
+from .evaluation import Split, profile_recommender
+from .models import Job, JobApplication, JobBookmark, JobTrait, PendingNeighborUpdate, UserRecommendation
+from .precompute import precompute_recommendations
+from .recommend import job_recommender
+from .salary import SalaryRange, parse_salary
+from .search import job_index
+from .similar import update_neighbors
+from .suggest import SuggestionIndex, job_suggestions
+
+
+def create_job(company: Company, **fields) -> Job:
+    defaults = dict(
+        title="Job",
+        location="Enschede",
+        description="",
+        requirements="",
+        salary="",
+        instructions="",
+        deadline=datetime.date.today() + datetime.timedelta(days=30),
+        keywords="",
+        image="https://example.com/image.png",
+        contact_info="",
+        mbti="",
+        job_fields="",
+        holland="",
+        additional="",
+    )
+    defaults.update(fields)
+    return Job.objects.create(company=company, **defaults)
+
+
+class JobSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        job_index.reset()
+        self.db_seed = seed_database()
+        self.acme = Company.objects.create(name="Acme", slug="acme", description="")
+        self.initech = Company.objects.create(name="Initech", slug="initech", description="")
+        self.developer = create_job(self.acme, title="Python developer", keywords="python django")
+        self.tester = create_job(self.acme, title="Software tester", description="Testing python software")
+        self.printer = create_job(self.initech, title="Printer technician", keywords="hardware")
+
+    def tearDown(self) -> None:
+        job_index.reset()
+
+    def test_ranks_title_matches_first(self) -> None:
+        self.assertEqual(job_index.search("python"), [self.developer.id, self.tester.id])
+
+    def test_last_word_is_a_prefix(self) -> None:
+        self.assertEqual(job_index.search("print"), [self.printer.id])
+        self.assertEqual(job_index.search("python dev")[0], self.developer.id)
+
+    def test_company_filter(self) -> None:
+        self.assertEqual(job_index.search("", company="init"), [self.printer.id])
+        self.assertEqual(job_index.search("python", company="initech"), [])
+
+    def test_indexes_follow_other_processes(self) -> None:
+        job_suggestions.reset()
+        job_recommender.reset()
+        job_index.ensure_built()
+        job_suggestions.ensure_built()
+        job_recommender.ensure_fitted()
+        version = job_index.version
+
+        # Local writes are applied to the indexes without rebuilding them
+        self.printer.title = "Printer mechanic"
+        self.printer.save()
+        self.assertNotEqual(job_index.version, version)
+        self.assertEqual(job_index.version, table_version(Job, Company))
+        self.assertEqual(job_suggestions.version, job_index.version)
+
+        # Another process only shares the version stamps
+        Job.objects.filter(id=self.printer.id).update(title="Plumber")
+        bump_version(Job, Company)
+        self.assertEqual(job_index.search("plumber"), [self.printer.id])
+        self.assertEqual(job_suggestions.suggest("plum"), [("Plumber", 1)])
+        self.assertNotEqual(job_recommender.version, table_version(Job, Company))
+        job_recommender.ensure_fitted()
+        self.assertEqual(job_recommender.version, table_version(Job, Company))
+        job_suggestions.reset()
+        job_recommender.reset()
+
+    def test_index_follows_changes(self) -> None:
+        job_index.ensure_built()
+        self.printer.title = "Python printer"
+        self.printer.save()
+        self.assertIn(self.printer.id, job_index.search("python"))
+
+        self.tester.delete()
+        self.assertNotIn(self.tester.id, job_index.search("python"))
+
+        self.initech.name = "Initrode"
+        self.initech.save()
+        self.assertEqual(job_index.search("initrode"), [self.printer.id])
+
+    def test_search_endpoint(self) -> None:
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        response = Client().get('/api/jobs/search?search=python', headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        page = json.loads(response.content)
+        self.assertEqual(page["count"], 2)
+        self.assertEqual([job["id"] for job in page["items"]], [self.developer.id, self.tester.id])
+        self.assertIsNone(page["facets"])
+
+    def test_facets(self) -> None:
+        self.tester.location = "Amsterdam"
+        self.tester.job_fields = "Software, Quality assurance"
+        self.tester.deadline = datetime.date.today() + datetime.timedelta(days=3)
+        self.tester.save()
+
+        facets = job_index.facets(job_index.search("python"))
+        self.assertEqual(facets["company"], [("Acme", 2)])
+        self.assertEqual(sorted(facets["location"]), [("Amsterdam", 1), ("Enschede", 1)])
+        self.assertEqual(facets["job_fields"], [("software", 1), ("quality assurance", 1)])
+        self.assertEqual(facets["deadline"], [("this_week", 1), ("this_month", 1)])
+
+        self.tester.delete()
+        self.assertNotIn(("Amsterdam", 1), job_index.facets()["location"])
+
+    def test_skips_closed_jobs(self) -> None:
+        job_index.ensure_built()
+        self.tester.deadline = datetime.date.today() - datetime.timedelta(days=1)
+        self.tester.save()
+        self.assertEqual(job_index.search("python"), [self.developer.id])
+
+        # The index drops jobs by itself once their deadline has passed
+        later = datetime.date.today() + datetime.timedelta(days=31)
+        with mock.patch('django.utils.timezone.localdate', return_value=later):
+            self.assertEqual(job_index.search("python"), [])
+
+    def test_search_endpoint_facets(self) -> None:
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        response = Client().get('/api/jobs/search?search=python&facets=true', headers={'Authorization': f'Bearer {ret.access_token}'})
+        page = json.loads(response.content)
+        self.assertEqual(page["facets"]["company"], [{"value": "Acme", "count": 2}])
+        self.assertEqual(page["facets"]["location"], [{"value": "Enschede", "count": 2}])
+
+
+class JobRecommenderTestCase(TestCase):
+    def setUp(self) -> None:
+        job_recommender.reset()
+        self.db_seed = seed_database()
+        self.company = Company.objects.create(name="Acme", slug="acme", description="")
+        self.analyst = create_job(self.company, title="Data analyst", mbti="INTJ", holland="Investigative", job_fields="Science")
+        self.nurse = create_job(self.company, title="Nurse", mbti="ESFJ", holland="Social", job_fields="Health care")
+        self.chef = create_job(self.company, title="Chef", mbti="ISFP", holland="Realistic", job_fields="Food")
+        QuestionResult.objects.create(
+            user=self.db_seed.jobseeker,
+            MbtiType="INTJ",
+            codeOne="I",
+            codeTwo="C",
+            category_one="Science",
+            category_two="Technology",
+            category_three="Mathematics",
+        )
+
+    def tearDown(self) -> None:
+        job_recommender.reset()
+
+    def _recommended(self, user):
+        ret = RefreshToken.for_user(user)
+        response = Client().get('/api/jobs/recommended', headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_recommends_matching_jobs(self) -> None:
+        jobs = self._recommended(self.db_seed.jobseeker)
+        self.assertEqual(jobs[0]["id"], self.analyst.id)
+        self.assertNotIn(self.chef.id, [job["id"] for job in jobs])
+        self.assertEqual(jobs, sorted(jobs, key=lambda job: -job["score"]))
+
+    def test_evaluation_matches_production(self) -> None:
+        # The chef matches the skills of the user, but none of their traits
+        User.objects.filter(id=self.db_seed.jobseeker.id).update(skill="Chef")
+        live = [job["id"] for job in self._recommended(self.db_seed.jobseeker)]
+        split = Split({}, {self.db_seed.jobseeker.id: set()}, [], [], set(), None)
+        self.assertEqual(profile_recommender(split)(self.db_seed.jobseeker.id, 20), live)
+        self.assertNotIn(self.chef.id, live)
+
+    def test_follows_job_changes(self) -> None:
+        job_recommender.ensure_fitted()
+        self.chef.mbti = "INTJ"
+        self.chef.save()
+        self.analyst.delete()
+        jobs = self._recommended(self.db_seed.jobseeker)
+        self.assertEqual(jobs[0]["id"], self.chef.id)
+        self.assertNotIn(self.analyst.id, [job["id"] for job in jobs])
+
+    def test_traits_are_normalized(self) -> None:
+        self.assertEqual(
+            sorted(self.analyst.traits.values_list('kind', 'value')),
+            [('field', 'science'), ('holland', 'I'), ('mbti', 'INTJ')],
+        )
+        self.analyst.mbti = "INTJ, ENTJ"
+        self.analyst.job_fields = "Science; IT"
+        self.analyst.save()
+        self.assertEqual(
+            sorted(self.analyst.traits.values_list('kind', 'value')),
+            [('field', 'it'), ('field', 'science'), ('holland', 'I'), ('mbti', 'ENTJ'), ('mbti', 'INTJ')],
+        )
+
+    def test_nothing_without_questionnaire(self) -> None:
+        self.assertIsNone(self._recommended(self.db_seed.sad_jobseeker))
+
+    def test_precomputed_recommendations(self) -> None:
+        live = self._recommended(self.db_seed.jobseeker)
+        self.assertEqual(precompute_recommendations(), (1, 1))
+        self.assertEqual(precompute_recommendations(), (0, 1))
+        stored = UserRecommendation.objects.filter(user=self.db_seed.jobseeker, source=UserRecommendation.Source.PROFILE)
+        # Both paths recommend from the jobs that share a trait with the user
+        self.assertEqual(list(stored.order_by('rank').values_list('job_id', flat=True)), [job["id"] for job in live])
+        self.assertEqual(stored.get(rank=0).job_id, self.analyst.id)
+        stored.filter(rank=0).update(score=42)
+        self.assertEqual(self._recommended(self.db_seed.jobseeker)[0]["score"], 42)
+
+        # Saving a user only drops their recommendations if their profile changed
+        jobseeker = User.objects.get(id=self.db_seed.jobseeker.id)
+        jobseeker.mentor = self.db_seed.mentor
+        jobseeker.save()
+        self.assertTrue(stored.exists())
+        jobseeker.skill = "Statistics"
+        jobseeker.save()
+        self.assertFalse(stored.exists())
+        self.assertEqual(precompute_recommendations(), (1, 1))
+
+        # Changing the catalog recomputes everyone, and a new result drops the stale rows
+        self.nurse.title = "Data scientist"
+        self.nurse.save()
+        job_recommender.reset()
+        self.assertEqual(precompute_recommendations(), (1, 1))
+        QuestionResult.objects.create(user=self.db_seed.jobseeker, MbtiType="ESFJ", codeOne="S")
+        self.assertFalse(stored.exists())
+        self.assertEqual(self._recommended(self.db_seed.jobseeker)[0]["id"], self.nurse.id)
+
+
+class ImportJobsTestCase(TestCase):
+    def _write(self, suffix: str, content: str) -> str:
+        file = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+        with file:
+            file.write(content)
+        self.addCleanup(os.unlink, file.name)
+        return file.name
+
+    def test_imports_jsonl(self) -> None:
+        Company.objects.create(name="Acme", slug="acme", description="Old")
+        row = dict(
+            title="Welder", location="Hengelo", description="", requirements="", salary="",
+            instructions="", deadline="2030-01-01", keywords="", image="https://example.com/a.png",
+            contact_info="", mbti="ISTP", job_fields="", holland="R", additional="",
+        )
+        lines = [
+            json.dumps({**row, "company_name": "Acme", "company_description": "New"}),
+            json.dumps({**row, "company_name": "Globex", "title": "Fitter"}),
+            json.dumps({**row, "company_name": "Globex", "deadline": "never"}),
+            "[]",
+            '"x"',
+        ]
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_jobs', self._write('.jsonl', "\n".join(lines)), batch_size=1, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(Company.objects.get(slug="acme").description, "New")
+        self.assertEqual(Job.objects.get(title="Fitter").company.slug, "globex")
+        self.assertTrue(JobTrait.objects.filter(job__title="Welder", kind=JobTrait.Kind.MBTI, value="ISTP").exists())
+        self.assertIn("skipped 3 invalid rows", stdout.getvalue())
+        self.assertIn("row 3", stderr.getvalue())
+        self.assertIn("row 4: expected an object, got list", stderr.getvalue())
+
+    def test_imports_csv(self) -> None:
+        fields = ["title", "company_name", "location", "description", "requirements", "salary", "instructions",
+                  "deadline", "keywords", "image", "contact_info", "mbti", "job_fields", "holland", "additional"]
+        content = io.StringIO()
+        writer = csv.writer(content)
+        writer.writerow(fields)
+        for i in range(5):
+            writer.writerow([f"Job {i}", "Initech", "Delft", "", "", "", "", "2030-01-01", "", "https://example.com/a.png", "", "", "", "", ""])
+        call_command('import_jobs', self._write('.csv', content.getvalue()), batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(Job.objects.filter(company__name="Initech").count(), 5)
+        self.assertEqual(Company.objects.filter(slug="initech").count(), 1)
+
+
+class BulkCreateJobsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.db_seed = seed_database()
+        self.job = dict(
+            title="Welder", location="Hengelo", description="", requirements="", salary="",
+            instructions="", deadline="2030-01-01", keywords="", image="https://example.com/a.png",
+            contact_info="", mbti="", job_fields="", holland="", additional="",
+        )
+
+    def _post(self, user, jobs):
+        ret = RefreshToken.for_user(user)
+        return Client().post('/api/jobs/manage/bulk', data=jobs, content_type='application/json',
+                             headers={'Authorization': f'Bearer {ret.access_token}'})
+
+    def test_creates_jobs_and_companies(self) -> None:
+        Company.objects.create(name="Acme", slug="acme", description="")
+        response = self._post(self.db_seed.mentor, [
+            {**self.job, "company_name": "Acme", "company_description": ""},
+            {**self.job, "title": "Fitter", "company_name": "Globex", "company_description": "Globex Corporation"},
+            {**self.job, "title": "Painter", "company_name": "Globex", "company_description": ""},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.content)
+
+        self.assertEqual([result["title"] for result in results], ["Welder", "Fitter", "Painter"])
+        self.assertEqual([result["company_slug"] for result in results], ["acme", "globex", "globex"])
+        self.assertEqual(Company.objects.count(), 2)
+        self.assertEqual(Company.objects.get(slug="globex").description, "Globex Corporation")
+        self.assertEqual(Job.objects.get(pk=results[2]["id"]).title, "Painter")
+
+    def test_matches_companies_by_name(self) -> None:
+        eemcs = Company.objects.create(name="University of Twente Faculty of EEMCS",
+                                       slug="university-of-twente-faculty-of", description="")
+        names = ["University of Twente Faculty of EEMCS", "University of Twente Faculty of BMS", "株式会社", "ООО"]
+        response = self._post(self.db_seed.mentor, [
+            {**self.job, "company_name": name, "company_description": ""} for name in names
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.content)
+
+        self.assertEqual(results[0]["company_id"], eemcs.id)
+        self.assertEqual([Company.objects.get(pk=result["company_id"]).name for result in results], names)
+        slugs = [result["company_slug"] for result in results]
+        self.assertEqual(slugs[1], "university-of-twente-faculty-o-2")
+        self.assertEqual(sorted(slugs[2:]), ["company", "company-2"])
+
+    def test_single_and_bulk_agree(self) -> None:
+        Company.objects.create(name="Acme Labs", slug="acme", description="")
+        acme = Company.objects.create(name="Acme", slug="acme", description="")
+        ret = RefreshToken.for_user(self.db_seed.mentor)
+        response = Client().post('/api/jobs/manage/', data={**self.job, "company_name": "Acme", "company_description": ""},
+                                 content_type='application/json', headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        response = self._post(self.db_seed.mentor, [{**self.job, "company_name": "Acme", "company_description": ""}])
+        self.assertEqual(json.loads(response.content)[0]["company_id"], acme.id)
+        self.assertEqual(list(Job.objects.values_list('company_id', flat=True)), [acme.id, acme.id])
+
+        response = Client().post('/api/jobs/manage/', data={**self.job, "company_name": "Globex", "company_description": ""},
+                                 content_type='application/json', headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Job.objects.get(company__name="Globex").company.slug, "globex")
+
+    def test_requires_mentor(self) -> None:
+        response = self._post(self.db_seed.jobseeker, [{**self.job, "company_name": "Acme", "company_description": ""}])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+
+class JobApplicationTestCase(TestCase):
+    def setUp(self) -> None:
+        self.db_seed = seed_database()
+        self.company = Company.objects.create(name="Acme", slug="acme", description="")
+        self.jobs = [create_job(self.company, title=f"Job {i}", keywords="welding") for i in range(3)]
+        self.applications = [
+            JobApplication.objects.create(user=self.db_seed.jobseeker, job=job, sent=True)
+            for job in self.jobs
+        ]
+        JobApplication.objects.create(user=self.db_seed.sad_jobseeker, job=self.jobs[0])
+
+    def _get(self, user, url, **params):
+        ret = RefreshToken.for_user(user)
+        return Client().get(url, params, headers={'Authorization': f'Bearer {ret.access_token}'})
+
+    def test_list_applications(self) -> None:
+        with self.assertNumQueries(3):
+            # authentication, the count and the page itself
+            response = self._get(self.db_seed.jobseeker, '/api/jobs/applications', limit=2)
+        page = json.loads(response.content)
+
+        self.assertEqual(page["count"], 3)
+        self.assertEqual(page["items"][0], {
+            "id": self.applications[0].id,
+            "applied_date": page["items"][0]["applied_date"],
+            "organization": "Acme",
+            "location": "Enschede",
+            "position": "Job 0",
+            "image": "https://example.com/image.png",
+            "keywords": "welding",
+            "sent": True,
+            "processed": False,
+            "interviewed": False,
+            "tested": False,
+            "feedback": "",
+        })
+
+        page = json.loads(self._get(self.db_seed.jobseeker, '/api/jobs/applications', cursor=page["next_cursor"]).content)
+        self.assertEqual([item["position"] for item in page["items"]], ["Job 2"])
+
+    def _post(self, user, url, data):
+        ret = RefreshToken.for_user(user)
+        return Client().post(url, data, content_type='application/json', headers={'Authorization': f'Bearer {ret.access_token}'})
+
+    def test_batch_feedback(self) -> None:
+        feedback = [
+            {"id": application.id, "sent": True, "processed": True, "interviewed": i == 0, "tested": False, "feedback": f"Note {i}"}
+            for i, application in enumerate(self.applications)
+        ]
+        response = self._post(self.db_seed.mentor, '/api/jobs/applications/set-feedback', feedback)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["feedback"] for item in json.loads(response.content)], ["Note 0", "Note 1", "Note 2"])
+        self.assertEqual(
+            list(JobApplication.objects.filter(user=self.db_seed.jobseeker).order_by('id').values_list('interviewed', 'processed')),
+            [(True, True), (False, True), (False, True)],
+        )
+
+        # Nothing changes when one of the applications is not of a mentee
+        other = JobApplication.objects.get(user=self.db_seed.sad_jobseeker)
+        feedback = [{**feedback[0], "feedback": "Changed"}, {**feedback[0], "id": other.id}]
+        response = self._post(self.db_seed.mentor, '/api/jobs/applications/set-feedback', feedback)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(JobApplication.objects.get(id=self.applications[0].id).feedback, "Note 0")
+
+
+class JobResponseCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        job_index.reset()
+        self.db_seed = seed_database()
+        self.company = Company.objects.create(name="Acme", slug="acme", description="")
+        self.job = create_job(self.company, title="Welder")
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.db_seed.jobseeker).access_token}'}
+
+    def tearDown(self) -> None:
+        job_index.reset()
+
+    def test_conditional_get(self) -> None:
+        client = Client()
+        url = f'/api/jobs/by-id/{self.job.id}'
+        response = client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        with self.assertNumQueries(1):
+            # only authentication
+            response = client.get(url, headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        with self.assertNumQueries(1):
+            response = client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["title"], "Welder")
+
+    def test_internal_columns_are_not_exposed(self) -> None:
+        internal = {'archived', *Job.SALARY_FIELDS, *Job.POPULARITY_WEIGHTS, 'popularity'}
+        for url in (f'/api/jobs/by-id/{self.job.id}', '/api/jobs', '/api/jobs/popular', '/api/jobs/search?search=welder'):
+            content = json.loads(Client().get(url, headers=self.headers).content)
+            job = content["items"][0] if "items" in content else content
+            self.assertEqual(job["title"], "Welder")
+            self.assertFalse(internal & job.keys(), url)
+
+    def test_new_day_invalidates(self) -> None:
+        client = Client()
+        url = f'/api/jobs/by-id/{self.job.id}'
+        etag = client.get(url, headers=self.headers).headers['ETag']
+
+        # The job closes at midnight, without any write
+        tomorrow = self.job.deadline + datetime.timedelta(days=1)
+        with mock.patch('django.utils.timezone.localdate', return_value=tomorrow):
+            response = client.get(url, headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 404)
+
+    def test_writes_invalidate(self) -> None:
+        client = Client()
+        url = '/api/jobs/search?search=welder'
+        etag = client.get(url, headers=self.headers).headers['ETag']
+
+        self.job.title = "Welder and fitter"
+        self.job.save()
+        response = client.get(url, headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(json.loads(response.content)["items"][0]["title"], "Welder and fitter")
+
+    def test_query_parameters_are_part_of_the_key(self) -> None:
+        client = Client()
+        create_job(self.company, title="Fitter")
+        first = json.loads(client.get('/api/jobs', {'limit': 1}, headers=self.headers).content)
+        second = json.loads(client.get('/api/jobs', {'limit': 1, 'offset': 1}, headers=self.headers).content)
+        self.assertNotEqual(first["items"][0]["id"], second["items"][0]["id"])
+
+    def test_user_state(self) -> None:
+        client = Client()
+        other = {'Authorization': f'Bearer {RefreshToken.for_user(self.db_seed.sad_jobseeker).access_token}'}
+        mentor = {'Authorization': f'Bearer {RefreshToken.for_user(self.db_seed.mentor).access_token}'}
+
+        def state(url: str, headers: dict) -> tuple:
+            content = json.loads(client.get(url, headers=headers).content)
+            job = content["items"][0] if "items" in content else content
+            return job["is_bookmarked"], job["application_status"]
+
+        urls = ('/api/jobs', '/api/jobs/search?search=welder', f'/api/jobs/by-id/{self.job.id}')
+        for url in urls:
+            self.assertEqual(state(url, self.headers), (False, None))
+
+        client.post(f'/api/bookmark?jobid={self.job.id}', headers=self.headers)
+        client.post('/api/jobs/applications/', {"job_id": self.job.id}, content_type='application/json', headers=self.headers)
+        for url in urls:
+            self.assertEqual(state(url, self.headers), (True, "applied"))
+            self.assertEqual(state(url, other), (False, None))
+
+        application = JobApplication.objects.get(user=self.db_seed.jobseeker)
+        client.post('/api/jobs/applications/set-feedback', [{"id": application.id, "sent": True, "processed": False,
+                    "interviewed": True, "tested": False, "feedback": ""}], content_type='application/json', headers=mentor)
+        self.assertEqual(state('/api/jobs', self.headers), (True, "interviewed"))
+
+        # The state is part of the page query, however many jobs there are
+        for i in range(5):
+            create_job(self.company, title=f"Fitter {i}")
+        with self.assertNumQueries(3):
+            # authentication, the count and the page itself
+            client.get('/api/jobs', headers=self.headers)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_cache'}})
+    def test_database_cache(self) -> None:
+        # The database backend can't be used synchronously from the async routes
+        call_command('createcachetable')
+        client = Client()
+        mentor = {'Authorization': f'Bearer {RefreshToken.for_user(self.db_seed.mentor).access_token}'}
+        url = f'/api/jobs/by-id/{self.job.id}'
+        self.assertEqual(client.get(url, headers=self.headers).status_code, 200)
+
+        self.assertEqual(client.post(f'/api/bookmark?jobid={self.job.id}', headers=self.headers).status_code, 200)
+        self.assertEqual(client.post('/api/jobs/applications/', {"job_id": self.job.id}, content_type='application/json',
+                                     headers=self.headers).status_code, 200)
+        application = JobApplication.objects.get(user=self.db_seed.jobseeker)
+        response = client.post('/api/jobs/applications/set-feedback', [{"id": application.id, "sent": True, "processed": False,
+                               "interviewed": True, "tested": False, "feedback": ""}], content_type='application/json', headers=mentor)
+        self.assertEqual(response.status_code, 200)
+        job = json.loads(client.get(url, headers=self.headers).content)
+        self.assertEqual((job["is_bookmarked"], job["application_status"]), (True, "interviewed"))
+
+        self.assertEqual(client.delete(f'/api/bookmark?job_id={self.job.id}', headers=self.headers).status_code, 200)
+        self.assertFalse(json.loads(client.get(url, headers=self.headers).content)["is_bookmarked"])
+        for url in ('/api/jobs', '/api/jobs/search?search=welder'):
+            response = client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(client.get(url, headers={**self.headers, 'If-None-Match': response.headers['ETag']}).status_code, 304)
+            self.assertEqual(client.get(url, headers=self.headers).content, response.content)
+
+
+class JobSuggestionTestCase(TestCase):
+    def setUp(self) -> None:
+        job_suggestions.reset()
+        self.db_seed = seed_database()
+        self.acme = Company.objects.create(name="Acme", slug="acme", description="")
+        self.developer = create_job(self.acme, title="Python developer", keywords="python, django")
+        create_job(self.acme, title="Java developer", keywords="java")
+        create_job(self.acme, title="Data scientist", keywords="python, statistics")
+
+    def tearDown(self) -> None:
+        job_suggestions.reset()
+
+    def test_suggests_by_popularity(self) -> None:
+        self.assertEqual(job_suggestions.suggest("py"), [("python", 2), ("Python developer", 1)])
+        self.assertEqual(job_suggestions.suggest("dev"), [("Java developer", 1), ("Python developer", 1)])
+        self.assertEqual(job_suggestions.suggest("ac"), [("Acme", 3)])
+        self.assertEqual(job_suggestions.suggest(""), [])
+
+    def test_follows_changes(self) -> None:
+        job_suggestions.ensure_built()
+        self.developer.title = "Rust developer"
+        self.developer.save()
+        self.assertEqual(job_suggestions.suggest("rust"), [("Rust developer", 1)])
+        self.assertEqual(job_suggestions.suggest("python d"), [])
+
+        self.acme.name = "Globex"
+        self.acme.save()
+        self.assertEqual(job_suggestions.suggest("acme"), [])
+        self.assertEqual(job_suggestions.suggest("glo"), [("Globex", 3)])
+
+    def test_remembered_suggestions_follow_changes(self) -> None:
+        prefixes = ("p", "py", "d", "de", "j", "s", "a", "r")
+
+        def check() -> None:
+            fresh = SuggestionIndex()
+            for prefix in prefixes:
+                self.assertEqual(job_suggestions.suggest(prefix, limit=2), fresh.suggest(prefix, limit=2), prefix)
+
+        with mock.patch('jobs.suggest.CACHED_SUGGESTIONS', 2):
+            check()
+            create_job(self.acme, title="Rust developer", keywords="rust, python")
+            check()
+            self.assertIn("j", job_suggestions._cache)
+            create_job(self.acme, title="Data engineer", keywords="data, python")
+            create_job(self.acme, title="Data engineer", keywords="data")
+            check()
+            self.developer.delete()
+            check()
+            Job.objects.get(title="Java developer").delete()
+            check()
+
+    def test_suggest_endpoint(self) -> None:
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        response = Client().get('/api/jobs/suggest', {'q': 'Stat'}, headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(json.loads(response.content), [{"text": "statistics", "jobs": 1}])
+
+
+class ActiveJobsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.db_seed = seed_database()
+        self.acme = Company.objects.create(name="Acme", slug="acme", description="")
+        today = datetime.date.today()
+        self.open = create_job(self.acme, title="Open")
+        self.closed = create_job(self.acme, title="Closed", deadline=today - datetime.timedelta(days=2))
+        self.old = create_job(self.acme, title="Old", deadline=today - datetime.timedelta(days=60))
+        JobBookmark.objects.create(user=self.db_seed.jobseeker, job=self.old)
+        JobBookmark.objects.create(user=self.db_seed.jobseeker, job=self.open)
+
+    def test_endpoints_only_show_open_jobs(self) -> None:
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        headers = {'Authorization': f'Bearer {ret.access_token}'}
+        ids = [job["id"] for job in json.loads(Client().get('/api/jobs', headers=headers).content)["items"]]
+        self.assertIn(self.open.id, ids)
+        self.assertNotIn(self.closed.id, ids)
+        self.assertNotIn(self.old.id, ids)
+        self.assertEqual(Client().get(f'/api/jobs/by-id/{self.closed.id}', headers=headers).status_code, 404)
+
+    def test_archive_jobs(self) -> None:
+        out = io.StringIO()
+        call_command('archive_jobs', '--days=30', '--batch-size=1', stdout=out)
+        self.assertIn("Archived 1 jobs", out.getvalue())
+        self.assertEqual(list(Job.objects.filter(archived=True)), [self.old])
+        self.assertTrue(JobBookmark.objects.filter(job=self.old).exists())
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        bookmarks = json.loads(Client().get('/api/bookmark', headers={'Authorization': f'Bearer {ret.access_token}'}).content)["items"]
+        # Bookmarks of closed jobs are still listed, with their deadline
+        self.assertEqual([job["id"] for job in bookmarks], [self.open.id, self.old.id])
+        self.assertEqual(bookmarks[1]["deadline"], self.old.deadline.isoformat())
+
+        call_command('archive_jobs', '--days=0', stdout=out)
+        self.assertFalse(Job.objects.get(id=self.closed.id).is_active)
+        self.assertTrue(Job.objects.get(id=self.open.id).is_active)
+
+
+class SimilarJobsTestCase(TestCase):
+    def setUp(self) -> None:
+        job_recommender.reset()
+        self.db_seed = seed_database()
+        self.acme = Company.objects.create(name="Acme", slug="acme", description="")
+        self.python = create_job(self.acme, title="Python developer", keywords="python, django", mbti="INTJ")
+        self.django = create_job(self.acme, title="Django developer", keywords="python, django", mbti="INTJ")
+        self.java = create_job(self.acme, title="Java developer", keywords="java, spring", mbti="ISTJ")
+        self.chef = create_job(self.acme, title="Chef", keywords="cooking", mbti="ESFP")
+
+    def tearDown(self) -> None:
+        job_recommender.reset()
+
+    def _similar(self, job: Job) -> list[int]:
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        response = Client().get(f'/api/jobs/by-id/{job.id}/similar', headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        return [job["id"] for job in json.loads(response.content)]
+
+    def test_similar_endpoint(self) -> None:
+        self.assertEqual(self._similar(self.python), [])
+        update_neighbors(full=True)
+        self.assertEqual(self._similar(self.python)[:2], [self.django.id, self.java.id])
+        self.assertNotIn(self.chef.id, self._similar(self.python))
+        self.assertFalse(PendingNeighborUpdate.objects.exists())
+
+        # Unknown and closed jobs have no similar jobs to list
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.db_seed.jobseeker).access_token}'}
+        Job.objects.filter(id=self.java.id).update(archived=True)
+        for id in (self.java.id, 0):
+            for url in (f'/api/jobs/by-id/{id}/similar', f'/api/jobs/by-id/{id}/also-applied'):
+                self.assertEqual(Client().get(url, headers=headers).status_code, 404)
+
+    def test_only_affected_jobs_are_recomputed(self) -> None:
+        nurse = create_job(self.acme, title="Nurse", keywords="care", mbti="ISFJ")
+        update_neighbors(full=True)
+        self.chef.title = "Python developer"
+        self.chef.keywords = "python, django"
+        self.chef.mbti = "INTJ"
+        self.chef.save()
+        self.assertEqual(list(PendingNeighborUpdate.objects.values_list('job_id', flat=True)), [self.chef.id])
+
+        # Only the nurse has nothing in common with the chef, before or after
+        self.assertEqual(update_neighbors(), 4)
+        self.assertEqual(self._similar(self.python)[0], self.chef.id)
+        self.assertEqual(self._similar(nurse), [])
+        self.assertEqual(update_neighbors(), 0)
+
+
+class SalaryTestCase(TestCase):
+    def setUp(self) -> None:
+        job_index.reset()
+        self.db_seed = seed_database()
+        self.acme = Company.objects.create(name="Acme", slug="acme", description="")
+        self.junior = create_job(self.acme, title="Junior developer", salary="€2.500 - €3.000 per month")
+        self.senior = create_job(self.acme, title="Senior developer", salary="€60k - €75k per year")
+        self.intern = create_job(self.acme, title="Intern developer", salary="€15,50/h")
+        self.unknown = create_job(self.acme, title="Developer", salary="Competitive")
+
+    def tearDown(self) -> None:
+        job_index.reset()
+
+    def _ids(self, path: str, **params) -> list[int]:
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        response = Client().get(path, params, headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        return [job["id"] for job in json.loads(response.content)["items"]]
+
+    def test_parse_salary(self) -> None:
+        self.assertEqual(parse_salary("€3.000 - €3.500 per month"), SalaryRange(36000, 42000, "EUR", "month"))
+        self.assertEqual(parse_salary("$50-70k"), SalaryRange(50000, 70000, "USD", "year"))
+        self.assertEqual(parse_salary("2.500,50 bruto per maand"), SalaryRange(30006, 30006, "", "month"))
+        self.assertEqual(parse_salary("from €3000"), SalaryRange(36000, None, "EUR", "month"))
+        self.assertEqual(parse_salary("up to 20 EUR per hour"), SalaryRange(None, 41600, "EUR", "hour"))
+        self.assertEqual(parse_salary("Competitive"), SalaryRange(None, None, "", ""))
+        # Values that would not fit the salary columns are not believed
+        self.assertEqual(parse_salary("€2m per hour"), SalaryRange(None, None, "", ""))
+        self.assertEqual(parse_salary("Call 0612345678"), SalaryRange(None, None, "", ""))
+
+    def test_parsed_on_save(self) -> None:
+        self.assertEqual((self.junior.salary_min, self.junior.salary_max), (30000, 36000))
+        self.junior.salary = "€3.500 per month"
+        self.junior.save(update_fields=['salary'])
+        self.junior.refresh_from_db()
+        self.assertEqual((self.junior.salary_min, self.junior.salary_max, self.junior.salary_period), (42000, 42000, "month"))
+
+    def test_filter_and_sort(self) -> None:
+        self.assertEqual(self._ids('/api/jobs', min_salary=35000, sort='salary'), [self.junior.id, self.senior.id])
+        self.assertEqual(self._ids('/api/jobs', max_salary=35000, sort='-salary'), [self.junior.id, self.intern.id])
+        self.assertEqual(self._ids('/api/jobs/search', search="developer", min_salary=40000), [self.senior.id])
+        self.assertEqual(self._ids('/api/jobs/search', search="developer", sort='-salary'),
+                         [self.senior.id, self.junior.id, self.intern.id])
+
+    def test_keyset_pagination_by_salary(self) -> None:
+        ret = RefreshToken.for_user(self.db_seed.jobseeker)
+        headers = {'Authorization': f'Bearer {ret.access_token}'}
+        page = json.loads(Client().get('/api/jobs', {'sort': 'salary', 'limit': 2}, headers=headers).content)
+        self.assertEqual([job["id"] for job in page["items"]], [self.junior.id, self.intern.id])
+        page = json.loads(Client().get('/api/jobs', {'sort': 'salary', 'limit': 2, 'cursor': page["next_cursor"]}, headers=headers).content)
+        self.assertEqual([job["id"] for job in page["items"]], [self.senior.id])
+
+    def test_backfill(self) -> None:
+        Job.objects.filter(id=self.senior.id).update(salary_min=None, salary_max=None, salary_currency="", salary_period="")
+        out = io.StringIO()
+        call_command('parse_salaries', '--batch-size=2', stdout=out)
+        self.assertIn("of which 1 changed", out.getvalue())
+        self.assertEqual(Job.objects.get(id=self.senior.id).salary_min, 60000)
+
+
+class JobCountersTestCase(TestCase):
+    def setUp(self) -> None:
+        job_counters.flush()
+        self.db_seed = seed_database()
+        self.acme = Company.objects.create(name="Acme", slug="acme", description="")
+        self.popular = create_job(self.acme, title="Popular")
+        self.quiet = create_job(self.acme, title="Quiet")
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.db_seed.jobseeker).access_token}'}
+
+    def test_counts_are_buffered(self) -> None:
+        for _ in range(3):
+            self.assertEqual(Client().get(f'/api/jobs/by-id/{self.popular.id}', headers=self.headers).status_code, 200)
+        Client().get(f'/api/jobs/by-id/{self.quiet.id}', headers=self.headers)
+        Client().post(f'/api/bookmark?jobid={self.quiet.id}', headers=self.headers)
+        self.assertEqual(Job.objects.get(id=self.popular.id).view_count, 0)
+
+        job_counters.flush()
+        popular = Job.objects.get(id=self.popular.id)
+        quiet = Job.objects.get(id=self.quiet.id)
+        self.assertEqual((popular.view_count, popular.popularity), (3, 3))
+        self.assertEqual((quiet.view_count, quiet.bookmark_count, quiet.popularity), (1, 1, 6))
+
+        Client().delete(f'/api/bookmark?job_id={self.quiet.id}', headers=self.headers)
+        job_counters.flush()
+        self.assertEqual(Job.objects.get(id=self.quiet.id).bookmark_count, 0)
+
+    def test_flush_groups_updates(self) -> None:
+        other = create_job(self.acme, title="Other")
+        for job in (self.popular, self.quiet, other):
+            job_counters.add(job.id, 'view_count')
+        job_counters.add(other.id, 'application_count')
+        with self.assertNumQueries(2):
+            self.assertEqual(job_counters.flush(), 3)
+
+    @override_settings(JOB_COUNTER_FLUSH_INTERVAL=0.01)
+    def test_flushes_without_requests(self) -> None:
+        counters = JobCounters()
+        self.addCleanup(atexit.unregister, counters.stop)
+        counters.add(self.popular.id, 'view_count')
+        flushed = threading.Event()
+        with mock.patch.object(counters, 'flush', side_effect=lambda: flushed.set() or 0):
+            counters.start()
+            self.assertTrue(flushed.wait(5))
+            counters._stopped.set()
+            counters._thread.join(5)
+
+        # Stopping, as happens when the process exits, writes what is left
+        counters.stop()
+        self.assertEqual(Job.objects.get(id=self.popular.id).view_count, 1)
+
+    def test_popular_endpoint(self) -> None:
+        job_counters.add(self.quiet.id, 'bookmark_count')
+        job_counters.flush()
+        response = Client().get('/api/jobs/popular', headers=self.headers)
+        ids = [job["id"] for job in json.loads(response.content)["items"]]
+        self.assertLess(ids.index(self.quiet.id), ids.index(self.popular.id))
+
+
+class CollaborativeTestCase(TestCase):
+    def setUp(self) -> None:
+        self.db_seed = seed_database()
+        self.acme = Company.objects.create(name="Acme", slug="acme", description="")
+        self.python = create_job(self.acme, title="Python developer")
+        self.django = create_job(self.acme, title="Django developer")
+        self.java = create_job(self.acme, title="Java developer")
+        self.closed = create_job(self.acme, title="Closed", archived=True)
+        for user, jobs in (
+                (self.db_seed.jobseeker, (self.python, self.django)),
+                (self.db_seed.sad_jobseeker, (self.python, self.django, self.java, self.closed)),
+                (self.db_seed.lazy_jobseeker, (self.python,))):
+            for job in jobs:
+                JobApplication.objects.create(user=user, job=job)
+        JobBookmark.objects.create(user=self.db_seed.lazy_jobseeker, job=self.closed)
+
+    def _ids(self, path: str, user) -> list[int]:
+        ret = RefreshToken.for_user(user)
+        response = Client().get(path, headers={'Authorization': f'Bearer {ret.access_token}'})
+        self.assertEqual(response.status_code, 200)
+        return [job["id"] for job in json.loads(response.content)]
+
+    def test_recommendations(self) -> None:
+        lazy = self.db_seed.lazy_jobseeker
+        self.assertEqual(self._ids('/api/jobs/recommended/collaborative', lazy), [])
+
+        out = io.StringIO()
+        call_command('train_recommender', stdout=out)
+        self.assertIn("scoring", out.getvalue())
+        self.assertEqual(self._ids('/api/jobs/recommended/collaborative', lazy), [self.django.id, self.java.id])
+        self.assertEqual(self._ids('/api/jobs/recommended/collaborative', self.db_seed.sad_jobseeker), [])
+
+    def test_also_applied(self) -> None:
+        call_command('train_recommender', stdout=io.StringIO())
+        also_applied = self._ids(f'/api/jobs/by-id/{self.python.id}/also-applied', self.db_seed.jobseeker)
+        self.assertEqual(also_applied, [self.django.id, self.java.id])
+        self.assertEqual(self._ids(f'/api/jobs/by-id/{self.python.id}/similar', self.db_seed.jobseeker), [])
+
+
+class EvaluateRecommenderTestCase(TestCase):
+    def tearDown(self) -> None:
+        job_recommender.reset()
+
+    def test_synthetic_evaluation(self) -> None:
+        out = io.StringIO()
+        call_command('evaluate_recommender', '--synthetic', '40', '--synthetic-jobs', '30', '--k', '5', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:4]], ['profile', 'collaborative', 'popular'])
+        self.assertIn("precision@5", lines[1])
+        self.assertIn("latency p50/p95/p99", lines[1])
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(JobApplication.objects.exists())
+
+
+class BenchmarkRendererTestCase(TestCase):
+    def test_renderers_agree(self) -> None:
+        out = io.StringIO()
+        call_command('benchmark_renderer', '--jobs', '10', '--repeat', '1', stdout=out)
+        self.assertIn("orjson renders 10 jobs", out.getvalue())
+
+
+class BenchmarkSerializationTestCase(TestCase):
+    def test_serializers_agree(self) -> None:
+        out = io.StringIO()
+        call_command('benchmark_serialization', '--jobs', '10', '--repeat', '1', stdout=out)
+        self.assertIn("Trusted serialization of 10 jobs", out.getvalue())
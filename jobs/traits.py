@@ -0,0 +1,69 @@
+import re
+
+
+__all__ = ('HOLLAND_CODES', 'MBTI_TYPES', 'parse_holland', 'parse_job_fields', 'parse_mbti')
+
+
+MBTI_TYPES = tuple(
+    a + b + c + d
+    for a in 'EI'
+    for b in 'SN'
+    for c in 'TF'
+    for d in 'JP'
+)
+
+HOLLAND_CODES = 'RIASEC'
+
+HOLLAND_NAMES = {
+    'realistic': 'R',
+    'investigative': 'I',
+    'artistic': 'A',
+    'social': 'S',
+    'enterprising': 'E',
+    'conventional': 'C',
+}
+
+_MBTI = re.compile(r"\b([EI][SN][TF][JP])(?:-[AT])?\b")
+_WORD = re.compile(r"[A-Za-z]+")
+_HOLLAND_LETTERS = re.compile(r"[RIASEC]{1,6}")
+_FIELD_SEPARATOR = re.compile(r"[,;/\n]")
+
+
+def parse_mbti(text: str) -> list[str]:
+    """Find all MBTI types mentioned in a text
+
+    :param text: Free text, such as "INTJ, ENTP"
+    :return: The distinct MBTI types, in order of appearance
+    """
+    return list(dict.fromkeys(_MBTI.findall(text.upper())))
+
+
+def parse_holland(text: str) -> list[str]:
+    """Find all Holland codes mentioned in a text
+
+    Both spelled out codes ("Investigative") and upper case letter codes
+    ("RIA") are understood.
+
+    :param text: Free text describing Holland codes
+    :return: The distinct Holland code letters, in order of appearance
+    """
+    codes = []
+    for word in _WORD.findall(text):
+        if word.lower() in HOLLAND_NAMES:
+            codes.append(HOLLAND_NAMES[word.lower()])
+        elif _HOLLAND_LETTERS.fullmatch(word):
+            codes.extend(word)
+    return list(dict.fromkeys(codes))
+
+
+def parse_job_fields(text: str) -> list[str]:
+    """Split a text into normalized job fields
+
+    :param text: A list of job fields separated by commas, semicolons, slashes or newlines
+    :return: The distinct lower case job fields, in order of appearance
+    """
+    return list(dict.fromkeys(
+        " ".join(field.split()).lower()
+        for field in _FIELD_SEPARATOR.split(text)
+        if field.strip()
+    ))